@@ -1,25 +1,45 @@
-from typing import Annotated
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+import hmac
+from typing import Annotated, AsyncIterator, Callable, Optional
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
+from app.core.admission import tenant_scheduler
 from app.core.config import settings
+from app.core.logging import bind
+from app.core.tokens import token_verifier
 from app.models.auth import TokenData
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/admin/login")
+operator_key_scheme = APIKeyHeader(name="X-Operator-Key", auto_error=False)
 
-async def get_current_admin(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenData:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        org_name: str = payload.get("org_name")
-        if email is None or org_name is None:
-            raise credentials_exception
-        token_data = TokenData(email=email, org_name=org_name)
-    except JWTError:
-        raise credentials_exception
+async def get_current_admin(request: Request, token: Annotated[str, Depends(oauth2_scheme)]) -> TokenData:
+    token_data = token_verifier.verify(token)
+    if token_data is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    bind(org=token_data.org_name)
+    # Rate limits on authenticated routes are kept per organization
+    request.state.org_name = token_data.org_name
     return token_data
+
+
+def admitted_admin(cost: float = 1.0) -> Callable[..., AsyncIterator[TokenData]]:
+    """
+    Like get_current_admin, but the request also holds one of its
+    organization's slots in the tenant scheduler until the response is sent.
+    `cost` is the operation's share of the organization's rate and fair share.
+    """
+    async def admit(current_admin: Annotated[TokenData, Depends(get_current_admin)]) -> AsyncIterator[TokenData]:
+        async with tenant_scheduler.slot(current_admin.org_name, cost):
+            yield current_admin
+
+    return admit
+
+
+async def require_operator(key: Annotated[Optional[str], Depends(operator_key_scheme)]) -> None:
+    """Cross-tenant routes: the caller must present OPERATOR_API_KEY."""
+    expected = settings.OPERATOR_API_KEY
+    if not expected or key is None or not hmac.compare_digest(key.encode(), expected.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operator credentials required")
@@ -1,43 +1,198 @@
-from fastapi import APIRouter, status, Depends, HTTPException, Request
-from app.models.org import OrgCreate, OrgResponse, OrgUpdate
-from app.services.org_service import OrganizationService
-from app.api.deps import get_current_admin
+import json
+from typing import Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, status, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from app.models.job import JobResponse
+from app.db.mongodb import db
+from app.models.org import (
+    BulkCreateResult,
+    OrgCreate,
+    OrgEvent,
+    OrgPage,
+    OrgResponse,
+    OrgSummary,
+    OrgUpdate,
+    TenantDataSummary,
+    TenantImportResult,
+)
+from app.services.event_service import org_events
+from app.services.job_service import JobService
+from app.services.org_service import ListOrder, OrganizationService
+from app.services.provisioning_service import BulkProvisioningService
+from app.services.summary_service import TenantSummaryService
+from app.services.transfer_service import TenantTransferService, TransferFormat
+from app.api.deps import admitted_admin, require_operator
 from app.models.auth import TokenData
+from app.core.config import settings
+from app.core.responses import ModelResponse
 from app.core.rate_limit import limiter
 
 
 router = APIRouter()
 
+# Tenant scheduler cost of streaming a whole tenant, relative to other operations
+TRANSFER_COST = 10.0
+
 @router.post("/create", response_model=OrgResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("10/minute")
-async def create_organization(request: Request, org_in: OrgCreate):
+async def create_organization(request: Request, response: Response, org_in: OrgCreate):
     """
     Create a new organization.
     """
     return await OrganizationService.create_organization(org_in)
 
+@router.post(
+    "/bulk-create",
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": OrgCreate.model_json_schema()}},
+        }
+    },
+    responses={200: {"content": {"application/x-ndjson": {"schema": BulkCreateResult.model_json_schema()}}}},
+    dependencies=[Depends(require_operator)],
+)
+@limiter.limit("2/minute")
+async def bulk_create_organizations(request: Request, response: Response):
+    """
+    Create many organizations from an NDJSON body, one OrgCreate per line.
+    Operator only (X-Operator-Key); at most BULK_CREATE_MAX_RECORDS records.
+    Streams back one NDJSON result per record (`line`, `status`, and
+    `collection_name` or `error`) as each batch completes.
+    """
+    records, failures = await BulkProvisioningService.parse(request.stream())
+
+    async def results():
+        for failure in failures:
+            yield failure.model_dump_json(exclude_none=True) + "\n"
+        async for result in BulkProvisioningService.provision(records):
+            yield result.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @router.get("/get", response_model=OrgResponse)
 @limiter.limit("100/minute")
-async def get_organization(request: Request, organization_name: str):
+async def get_organization(request: Request, response: Response, organization_name: str):
     """
     Get organization details.
     """
     org = await OrganizationService.get_organization(organization_name)
-    return OrgResponse(
+    return ModelResponse(OrgResponse(
         organization_name=org["organization_name"],
         collection_name=org["collection_name"]
+    ))
+
+@router.get(
+    "/list",
+    response_class=StreamingResponse,
+    responses={200: {"model": OrgPage}},
+    dependencies=[Depends(require_operator)],
+)
+@limiter.limit("30/minute")
+async def list_organizations(
+    request: Request,
+    response: Response,
+    limit: int = Query(settings.ORG_LIST_DEFAULT_LIMIT, ge=1, le=settings.ORG_LIST_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    prefix: Optional[str] = Query(None, min_length=1, description="Case-insensitive name prefix"),
+    order: ListOrder = "name",
+    include_total: bool = False,
+):
+    """
+    List organizations by name or creation time. Operator only (X-Operator-Key).
+    Pages are keyset-paginated: pass `next_cursor` back as `cursor` with the
+    same `order` and `prefix`. `approximate_total` (with `include_total`)
+    comes from collection metadata and ignores `prefix`.
+    Items are written out as they are read from MongoDB.
+    """
+    if cursor:
+        # Reject a malformed cursor before the response starts
+        OrganizationService.decode_cursor(cursor, order)
+    total = await OrganizationService.approximate_total() if include_total else None
+    # One extra document tells whether another page follows
+    orgs = OrganizationService.list_organizations(limit + 1, cursor, prefix, order)
+
+    async def page():
+        yield '{"items":['
+        count, last, more = 0, None, False
+        try:
+            async for org in orgs:
+                if count == limit:
+                    more = True
+                    break
+                yield ("," if count else "") + OrgSummary.model_validate(org).model_dump_json()
+                count, last = count + 1, org
+        finally:
+            await orgs.aclose()
+        next_cursor = OrganizationService.encode_cursor(last, order) if more else None
+        yield f'],"next_cursor":{json.dumps(next_cursor)},"approximate_total":{json.dumps(total)}}}'
+
+    return StreamingResponse(page(), media_type="application/json")
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {"schema": OrgEvent.model_json_schema()}}}},
+    dependencies=[Depends(require_operator)],
+)
+@limiter.limit("10/minute")
+async def organization_events(
+    request: Request,
+    response: Response,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-sent events for organization creates, updates, renames and
+    deletes, as they happen. Operator only (X-Operator-Key); needs a
+    replica set or sharded cluster. Reconnect with `Last-Event-ID` to
+    receive missed events; a `reset` event means some were lost and the
+    client should list organizations again. The connection takes no
+    tenant scheduler slot.
+    """
+    if not db.replicated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Organization events need a replica set or sharded cluster",
+        )
+    return StreamingResponse(
+        org_events.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-@router.put("/update", response_model=OrgResponse)
+@router.get("/summary", response_model=TenantDataSummary)
+@limiter.limit("100/minute")
+async def get_organization_summary(
+    request: Request,
+    response: Response,
+    organization_name: str,
+    current_admin: TokenData = Depends(admitted_admin())
+):
+    """
+    Document count, approximate size and last write of the organization's
+    data. Protected route. With TENANT_SUMMARIES_ENABLED this reads one
+    document kept current from a change stream; otherwise it scans the data.
+    """
+    if organization_name != current_admin.org_name:
+         raise HTTPException(status_code=403, detail="Not authorized to view this organization")
+    org = await OrganizationService.get_organization(organization_name)
+    return ModelResponse(await TenantSummaryService.get(org))
+
+@router.put("/update", response_model=OrgResponse | JobResponse)
 @limiter.limit("10/minute")
 async def update_organization(
     request: Request,
+    response: Response,
     org_in: OrgUpdate,
-    current_admin: TokenData = Depends(get_current_admin)
+    current_admin: TokenData = Depends(admitted_admin())
 ):
     """
     Update organization. Protected route.
-    If name changes, performs data migration.
+    If name changes, data migration runs as a background job and the
+    job is returned with 202 Accepted; poll it at /jobs/{job_id}.
     """
     # Logic: Can only update OWN org? Or any if 'admin' implies super-admin?
     # Prompt says: "Update Organization Service... Implement update_organization(old_name, new_data)"
@@ -59,17 +214,23 @@ async def update_organization(
     # If the user tries to rename their org, the 'old_name' is what's in the token.
     # We pass that to the service.
     
-    return await OrganizationService.update_organization(old_name, org_in)
+    result = await OrganizationService.update_organization(old_name, org_in)
+    if isinstance(result, JobResponse):
+        response.status_code = status.HTTP_202_ACCEPTED
+    return result
 
-@router.delete("/delete", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/delete", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 @limiter.limit("10/minute")
 async def delete_organization(
     request: Request,
+    response: Response,
     organization_name: str,
-    current_admin: TokenData = Depends(get_current_admin)
+    current_admin: TokenData = Depends(admitted_admin())
 ):
     """
     Delete organization. Protected route.
+    The organization disappears immediately; its collection is dropped by a
+    background job, which is returned.
     """
     # Ensure admin can only delete their own org?
     # Or matches requirement: "Only authenticated Admins can delete."
@@ -78,5 +239,86 @@ async def delete_organization(
     if organization_name != current_admin.org_name:
          raise HTTPException(status_code=403, detail="Not authorized to delete this organization")
          
-    await OrganizationService.delete_organization(organization_name)
-    return None
+    return await OrganizationService.delete_organization(organization_name)
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/zstd": {"schema": {"type": "string", "format": "binary"}}}}},
+)
+@limiter.limit("5/minute")
+async def export_organization_data(
+    request: Request,
+    response: Response,
+    organization_name: str,
+    format: TransferFormat = "bson",
+    current_admin: TokenData = Depends(admitted_admin(TRANSFER_COST))
+):
+    """
+    Download the organization's documents. Protected route.
+    The body is zstd-compressed BSON documents, or extended JSON lines with
+    `format=ndjson`, written out as they are read; /org/import loads it.
+    """
+    if organization_name != current_admin.org_name:
+         raise HTTPException(status_code=403, detail="Not authorized to export this organization")
+    org = await OrganizationService.get_organization(organization_name)
+    filename = f"{org['collection_name']}.{format}.zst"
+    return StreamingResponse(
+        TenantTransferService.export(org, format),
+        media_type="application/zstd",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.post(
+    "/import",
+    response_model=TenantImportResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/zstd": {"schema": {"type": "string", "format": "binary"}}},
+        }
+    },
+)
+@limiter.limit("2/minute")
+async def import_organization_data(
+    request: Request,
+    response: Response,
+    organization_name: str,
+    format: TransferFormat = "bson",
+    current_admin: TokenData = Depends(admitted_admin(TRANSFER_COST))
+):
+    """
+    Load an /org/export body into the organization. Protected route.
+    Documents whose `_id` already exists are skipped, so an interrupted
+    import can be sent again.
+    """
+    if organization_name != current_admin.org_name:
+         raise HTTPException(status_code=403, detail="Not authorized to import into this organization")
+    org = await OrganizationService.get_organization(organization_name)
+    return ModelResponse(await TenantTransferService.import_documents(org, format, request.stream()))
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+@limiter.limit("100/minute")
+async def get_job(
+    request: Request,
+    response: Response,
+    job_id: str,
+    current_admin: TokenData = Depends(admitted_admin())
+):
+    """
+    Get the status of a background job. Protected route.
+    Admins can only see jobs of their own organization, matched by its `_id`
+    so that a later organization of the same name cannot see them.
+    """
+    if current_admin.org_id is None:
+        # Tokens issued before they carried org_id
+        org_id = (await OrganizationService.get_organization(current_admin.org_name))["_id"]
+    else:
+        try:
+            org_id = ObjectId(current_admin.org_id)
+        except InvalidId:
+            raise HTTPException(status_code=404, detail="Job not found")
+    job = await JobService.get_job(job_id, org_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobService.to_response(job)
@@ -0,0 +1,280 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Mapping, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import Histogram, MetricsRegistry, metrics
+
+logger = get_logger(__name__)
+
+# Weight of the newest sample in the queue delay average
+QUEUE_DELAY_SMOOTHING = 0.2
+
+
+class AdmissionRejectedError(RuntimeError):
+    """A tenant operation was turned away; retry after `retry_after` seconds."""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TenantRateLimitedError(AdmissionRejectedError):
+    """The organization used up its token bucket."""
+
+    status_code = 429
+
+
+class TenantOverloadedError(AdmissionRejectedError):
+    """Queueing is slower than the target and this organization already has requests waiting."""
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, cost: float, now: float) -> float:
+        """Take cost tokens; returns 0, or the seconds until they are available."""
+        self.refill(now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class _Tenant:
+    __slots__ = ("bucket", "weight", "running", "queued", "finish")
+
+    def __init__(self, bucket: TokenBucket, weight: float):
+        self.bucket = bucket
+        self.weight = weight
+        self.running = 0
+        self.queued = 0
+        self.finish = 0.0  # Virtual finish time of its latest request
+
+
+class _Waiter:
+    __slots__ = ("org", "future")
+
+    def __init__(self, org: str, future: asyncio.Future):
+        self.org = org
+        self.future = future
+
+
+class TenantScheduler:
+    """
+    Admission control for authenticated tenant operations, per process.
+
+    Each organization has a token bucket (`rate` per second up to `burst`;
+    an operation takes `cost` tokens) and may run at most
+    `tenant_concurrency` operations at once, out of `capacity` in total.
+    Operations beyond that wait and are started in start-time fair queueing
+    order: every request gets a virtual start tag of max(virtual clock,
+    the organization's previous finish tag) and advances that finish tag by
+    cost / weight, so a tenant with a thousand queued exports cannot make a
+    tenant with one listing wait behind all of them.
+
+    When the average queue delay is above `target_wait_ms`, requests that
+    would queue behind others of the same organization are shed with
+    TenantOverloadedError instead; an organization's first waiting request
+    is always queued, which keeps small tenants served while a large one is
+    pushed back.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        tenant_concurrency: int,
+        rate: float,
+        burst: float,
+        target_wait_ms: float,
+        max_queue: int,
+        weights: Optional[Mapping[str, float]] = None,
+        max_tenants: int = 10_000,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.tenant_concurrency = tenant_concurrency
+        self.rate = rate
+        self.burst = burst
+        self.target_wait_ms = target_wait_ms
+        self.max_queue = max_queue
+        self.weights = {name.lower(): weight for name, weight in (weights or {}).items()}
+        self.max_tenants = max_tenants
+        self._tenants: Dict[str, _Tenant] = {}
+        self._heap: List[Tuple[float, int, _Waiter]] = []
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._running = 0
+        self._waiting = 0
+
+        # Metrics
+        self.queue_delay_ms = 0.0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+        self._wait_time: Optional[Histogram] = None
+
+    def _tenant(self, key: str, now: float) -> _Tenant:
+        tenant = self._tenants.get(key)
+        if tenant is None:
+            if len(self._tenants) >= self.max_tenants:
+                self._forget_idle(now)
+            tenant = _Tenant(TokenBucket(self.rate, self.burst, now), self.weights.get(key, 1.0))
+            self._tenants[key] = tenant
+        return tenant
+
+    def _forget_idle(self, now: float) -> None:
+        """Drop tenants with nothing running or queued whose bucket has refilled."""
+        for key, tenant in list(self._tenants.items()):
+            tenant.bucket.refill(now)
+            if not tenant.running and not tenant.queued and tenant.bucket.tokens >= tenant.bucket.burst:
+                del self._tenants[key]
+
+    def _dispatch(self) -> None:
+        """Start waiters in tag order while there is capacity."""
+        blocked = []
+        while self._running < self.capacity and self._heap:
+            entry = heapq.heappop(self._heap)
+            tag, _, waiter = entry
+            if waiter.future.done():  # Cancelled while waiting
+                continue
+            tenant = self._tenants[waiter.org]
+            if tenant.running >= self.tenant_concurrency:
+                blocked.append(entry)
+                continue
+            self._virtual_time = max(self._virtual_time, tag)
+            tenant.queued -= 1
+            tenant.running += 1
+            self._waiting -= 1
+            self._running += 1
+            waiter.future.set_result(None)
+        for entry in blocked:
+            heapq.heappush(self._heap, entry)
+
+    async def acquire(self, org_name: str, cost: float = 1.0) -> None:
+        key = org_name.lower()
+        now = time.monotonic()
+        tenant = self._tenant(key, now)
+        retry_after = tenant.bucket.take(cost, now)
+        if retry_after:
+            self.rate_limited += 1
+            raise TenantRateLimitedError(f"Request rate of '{org_name}' exceeded", retry_after)
+
+        start = max(self._virtual_time, tenant.finish)
+        if self._running < self.capacity and tenant.running < self.tenant_concurrency and not self._waiting:
+            tenant.finish = start + cost / tenant.weight
+            self._virtual_time = start
+            tenant.running += 1
+            self._running += 1
+            self.admitted += 1
+            return
+
+        overloaded = self.queue_delay_ms > self.target_wait_ms and tenant.queued > 0
+        if overloaded or self._waiting >= self.max_queue:
+            tenant.bucket.tokens += cost  # Not spent
+            self.shed += 1
+            raise TenantOverloadedError(
+                f"Too many queued requests for '{org_name}'", max(1.0, self.queue_delay_ms / 1000)
+            )
+
+        tenant.finish = start + cost / tenant.weight
+        waiter = _Waiter(key, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._heap, (start, next(self._sequence), waiter))
+        tenant.queued += 1
+        self._waiting += 1
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(org_name)  # Started just as it was cancelled
+            else:
+                tenant.queued -= 1
+                self._waiting -= 1
+            raise
+        waited_ms = (time.monotonic() - now) * 1000
+        self.queue_delay_ms += QUEUE_DELAY_SMOOTHING * (waited_ms - self.queue_delay_ms)
+        self.admitted += 1
+        if self._wait_time is not None:
+            self._wait_time.observe(waited_ms)
+
+    def release(self, org_name: str) -> None:
+        tenant = self._tenants[org_name.lower()]
+        tenant.running -= 1
+        self._running -= 1
+        if not self._waiting:
+            # Nothing queued: let the delay estimate decay towards zero
+            self.queue_delay_ms *= 1 - QUEUE_DELAY_SMOOTHING
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, org_name: str, cost: float = 1.0) -> AsyncIterator[None]:
+        """Hold one of the organization's slots for the duration of the block."""
+        if not self.enabled:
+            yield
+            return
+        await self.acquire(org_name, cost)
+        try:
+            yield
+        finally:
+            self.release(org_name)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "running": self._running,
+            "waiting": self._waiting,
+            "tenants": len(self._tenants),
+            "queue_delay_ms": self.queue_delay_ms,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed": self.shed,
+        }
+
+    def register_metrics(self, registry: MetricsRegistry) -> None:
+        """Export slot usage, queue delay and rejections."""
+        self._wait_time = registry.histogram(
+            "tenant_admission_wait_seconds", "Time tenant operations waited for a slot"
+        )
+        registry.register_callback(
+            "tenant_admission_decisions_total",
+            "Tenant operations by admission outcome",
+            lambda: {("admitted",): self.admitted, ("rate_limited",): self.rate_limited, ("shed",): self.shed},
+            ("outcome",),
+            kind="counter",
+        )
+        registry.register_callback(
+            "tenant_admission_running", "Tenant operations holding a slot", lambda: self._running
+        )
+        registry.register_callback(
+            "tenant_admission_waiting", "Tenant operations waiting for a slot", lambda: self._waiting
+        )
+
+
+tenant_scheduler = TenantScheduler(
+    capacity=settings.TENANT_SCHEDULER_CAPACITY,
+    tenant_concurrency=settings.TENANT_MAX_CONCURRENCY,
+    rate=settings.TENANT_RATE_PER_SECOND,
+    burst=settings.TENANT_BURST,
+    target_wait_ms=settings.TENANT_QUEUE_TARGET_MS,
+    max_queue=settings.TENANT_MAX_QUEUE,
+    weights=settings.TENANT_WEIGHTS,
+    enabled=settings.TENANT_SCHEDULER_ENABLED,
+)
+tenant_scheduler.register_metrics(metrics)
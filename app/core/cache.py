@@ -0,0 +1,116 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+def _retrieve_exception(task: asyncio.Future) -> None:
+    # A load whose callers were all cancelled still finishes; an unobserved
+    # failure is not logged as a warning.
+    if not task.cancelled():
+        task.exception()
+
+
+class AsyncTTLCache(Generic[V]):
+    """
+    Bounded LRU cache with a per-entry TTL and single-flight loading.
+
+    Concurrent misses for the same key share one loader call instead of each
+    issuing their own query. `None` results are not cached.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Bumped on every invalidation so a load that started before it
+        # cannot repopulate the cache with a stale value.
+        self._epoch = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Return a fresh cached value or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a key and detach any in-flight load for it."""
+        self._epoch += 1
+        self._entries.pop(key, None)
+        self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._epoch += 1
+        self._entries.clear()
+        self._inflight.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Optional[V]]]) -> Optional[V]:
+        """Return the cached value for key, calling loader once on a miss."""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        # The load runs as its own task, so a caller that is cancelled (its
+        # client went away) does not take the other waiters down with it.
+        load = asyncio.ensure_future(self._load(key, loader, self._epoch))
+        load.add_done_callback(_retrieve_exception)
+        self._inflight[key] = load
+        return await asyncio.shield(load)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Optional[V]]], epoch: int) -> Optional[V]:
+        load = asyncio.current_task()
+        try:
+            value = await loader()
+        finally:
+            if self._inflight.get(key) is load:
+                del self._inflight[key]
+        if value is not None and epoch == self._epoch:
+            self.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for logging and metrics."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
@@ -1,3 +1,4 @@
+from typing import Any, Dict, List, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -7,11 +8,156 @@ class Settings(BaseSettings):
     # MongoDB
     MONGO_URL: str
     MONGO_DB_NAME: str = "master_metadata"
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_CONNECTING: int = 2
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+    MONGO_COMPRESSORS: str = ""  # e.g. "zstd,snappy,zlib"; zstd needs `zstandard`
+    MONGO_READ_PREFERENCE: str = "primary"
+    # Metadata lookups that tolerate bounded staleness (organization by name or
+    # email, listings). A process reads its own writes (causal sessions), but
+    # other workers and replicas only see them with ORG_CACHE_INVALIDATION=
+    # change_stream; with "local", secondary reads can miss a fresh create.
+    MONGO_STALE_READ_PREFERENCE: str = "primary"
+    MONGO_MAX_STALENESS_SECONDS: Optional[int] = 90  # Driver minimum is 90; None for no bound
+    MONGO_POOL_WARMUP: bool = True
+    MONGO_MONITORING_ENABLED: bool = True
+    DB_ENSURE_INDEXES: bool = True
+    DB_VERIFY_QUERY_PLANS: bool = True
+    # "background" serves requests while indexes and query plans are checked
+    DB_STARTUP_CHECKS: Literal["blocking", "background"] = "blocking"
+    DB_TRANSACTIONS: bool = True  # Used where the deployment supports them (replica set, sharded)
+
+    # Serving (python -m app.serve). One process per lease window runs the
+    # index and query plan checks and the reconciliation; the other workers
+    # and replicas starting up wait until they are recorded done.
+    WEB_CONCURRENCY: Optional[int] = None  # Worker processes; None sizes to the available cores
+    STARTUP_LEADER_LOCK: bool = True
+    STARTUP_LEADER_LEASE_SECONDS: int = 120
+
+    # Crash recovery: interrupted creates and deletes and orphaned tenant
+    # storage are repaired in the background at startup.
+    RECONCILE_ON_STARTUP: bool = True
+    RECONCILE_BATCH_SIZE: int = 500
+    INTENT_GRACE_SECONDS: int = 300  # Younger create intents may still be in flight
+
+    # Tenant collections
+    TENANT_COLLECTION_LAYOUT: Literal["standard", "clustered", "timeseries"] = "standard"
+    TENANT_TIMESERIES_TIME_FIELD: str = "created_at"
+    TENANT_TIMESERIES_META_FIELD: Optional[str] = None
+    TENANT_VALIDATOR: Optional[Dict[str, Any]] = None  # e.g. {"$jsonSchema": {...}} as JSON
+    TENANT_VALIDATION_LEVEL: Literal["off", "moderate", "strict"] = "moderate"
+    TENANT_VALIDATION_ACTION: Literal["error", "warn"] = "error"
+    TENANT_INDEXES: List[str] = []  # Fields indexed ascending in every tenant collection
+    TENANT_SPARE_POOL_SIZE: int = 4  # Pre-provisioned empty collections; 0 disables
+    # Where new tenants' data goes: an org_<name> collection each, one shared
+    # collection keyed by tenant_id, or a database each. Existing tenants keep
+    # the placement recorded in their metadata.
+    TENANT_PLACEMENT: Literal["collection", "shared", "database"] = "collection"
+
+    # Tenant collection migration on rename
+    MIGRATION_STRATEGY: Literal["auto", "rename", "out", "copy"] = "auto"
+    MIGRATION_BATCH_SIZE: int = 1000
+
+    # Bulk organization provisioning (NDJSON import, operator only)
+    BULK_CREATE_MAX_RECORDS: int = 500
+    BULK_CREATE_MAX_LINE_BYTES: int = 4096
+    BULK_CREATE_BATCH_SIZE: int = 500
+    BULK_CREATE_CONCURRENCY: int = 16  # Tenant collections initialized at once
+
+    # Tenant data export/import (/org/export, /org/import)
+    TENANT_EXPORT_BATCH_SIZE: int = 1000  # Documents read and compressed at a time
+    TENANT_EXPORT_ZSTD_LEVEL: int = 3
+    TENANT_IMPORT_BATCH_SIZE: int = 1000  # Documents per insert_many
+    TENANT_IMPORT_BATCH_BYTES: int = 8 * 1024 * 1024
+    TENANT_IMPORT_PARALLELISM: int = 4  # insert_many batches in flight
+
+    # Tenant data summaries (/org/summary) and organization events
+    # (/org/events), both fed by change streams: replica set or sharded cluster.
+    # One process at a time (a lease in `locks`) maintains the summaries.
+    TENANT_SUMMARIES_ENABLED: bool = False
+    TENANT_SUMMARY_LEASE_SECONDS: int = 30
+    TENANT_SUMMARY_BATCH_SIZE: int = 1000  # Changes aggregated per summary flush
+    # Record pre- and post-images on new tenant collections: exact sizes for
+    # updates and deletes, and deletes attributed in the shared layout
+    TENANT_SUMMARY_PRE_IMAGES: bool = False
+    ORG_EVENTS_BUFFER: int = 1000  # Recent events replayed to clients resuming with Last-Event-ID
+    ORG_EVENTS_KEEPALIVE_SECONDS: float = 15.0
+
+    # Background jobs (renames, deletes)
+    JOB_RUNNER_ENABLED: bool = True
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: int = 60
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETENTION_SECONDS: int = 7 * 24 * 3600
+    # Maximum jobs of each type running at once in each worker process
+    JOB_CONCURRENCY: Dict[str, int] = {"rename": 2, "delete": 4}
     
+    # Rate limiting. "mongodb" shares counters across workers and replicas;
+    # batching (RATE_LIMIT_SYNC_INTERVAL_SECONDS > 0) needs sliding-window-counter.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORAGE: Literal["memory", "mongodb"] = "memory"
+    RATE_LIMIT_STRATEGY: Literal["fixed-window", "sliding-window-counter"] = "fixed-window"
+    RATE_LIMIT_SYNC_INTERVAL_SECONDS: float = 0.25
+
     # Security
     SECRET_KEY: str
+    # Sent as X-Operator-Key by the platform operator on cross-tenant routes;
+    # unset, those routes refuse every request
+    OPERATOR_API_KEY: Optional[str] = None
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    JWT_BACKEND: Literal["jose", "hmac"] = "jose"  # hmac: fast stdlib path for HS* algorithms
+    JWT_CACHE_ENABLED: bool = True
+    JWT_CACHE_MAX_SIZE: int = 10_000
+    JWT_CACHE_TTL_SECONDS: float = 300.0
+
+    # Password hashing worker pool
+    HASH_POOL_KIND: Literal["thread", "process"] = "thread"
+    HASH_POOL_SIZE: Optional[int] = None  # Defaults to the number of CPUs
+    HASH_MAX_PENDING: int = 64
+
+    # Password hashing policy
+    BCRYPT_ROUNDS: Optional[int] = None  # Fixed cost; None calibrates to BCRYPT_TARGET_MS at startup
+    BCRYPT_TARGET_MS: float = 250.0
+    BCRYPT_MIN_ROUNDS: int = 10  # Calibration never picks a weaker cost
+    BCRYPT_MAX_ROUNDS: int = 16
+
+    # Tenant admission for authenticated operations (app.core.admission)
+    TENANT_SCHEDULER_ENABLED: bool = True
+    TENANT_SCHEDULER_CAPACITY: int = 64  # Tenant operations running at once per process
+    TENANT_MAX_CONCURRENCY: int = 8  # Per organization
+    TENANT_RATE_PER_SECOND: float = 20.0  # Token bucket refill; heavy operations cost more tokens
+    TENANT_BURST: float = 40.0
+    TENANT_QUEUE_TARGET_MS: float = 100.0  # Above this queue delay, a tenant's extra requests are shed
+    TENANT_MAX_QUEUE: int = 1000
+    TENANT_WEIGHTS: Dict[str, float] = {}  # Fair-share weight per organization name; default 1
+
+    # Organization metadata cache
+    ORG_CACHE_ENABLED: bool = True
+    ORG_CACHE_TTL_SECONDS: float = 30.0
+    ORG_CACHE_MAX_SIZE: int = 10_000
+    ORG_CACHE_INVALIDATION: Literal["local", "change_stream"] = "local"
+
+    # Organization listing (/org/list)
+    ORG_LIST_DEFAULT_LIMIT: int = 50
+    ORG_LIST_MAX_LIMIT: int = 1000
+    ORG_LIST_BATCH_SIZE: int = 200  # Documents per cursor batch fetched from MongoDB
+
+    # Logging. Records go through a bounded queue and are written by a
+    # background thread; INFO/DEBUG of unsampled requests are dropped.
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    LOG_QUEUE_SIZE: int = 10_000
+    LOG_SAMPLE_RATE: float = 1.0  # Fraction of requests whose INFO logs are kept
+
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED: bool = True
+
+    # API reference UI at /docs (the OpenAPI schema is always served)
+    DOCS_ENABLED: bool = True
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,263 @@
+import asyncio
+import math
+import os
+import secrets
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import Histogram, MetricsRegistry, metrics
+
+logger = get_logger(__name__)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Calibration times this cost and extrapolates: each extra round doubles it.
+CALIBRATION_PROBE_ROUNDS = 8
+
+
+@lru_cache(maxsize=None)
+def _bcrypt(rounds: int):
+    return pwd_context.handler("bcrypt").using(rounds=rounds)
+
+
+def hash_password_sync(password: str, rounds: Optional[int] = None) -> str:
+    """
+    Hash a password on the calling thread.
+
+    The cost is passed in rather than read from pwd_context so process pool
+    workers hash with the policy of the parent process.
+    """
+    if rounds is None:
+        return pwd_context.hash(password)
+    return _bcrypt(rounds).hash(password)
+
+
+def verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the calling thread."""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+_OPERATIONS = {hash_password_sync: "hash", verify_password_sync: "verify"}
+
+
+def _timed_call(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """Run fn inside the worker and report how long it actually ran."""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class HasherOverloadedError(RuntimeError):
+    """Raised when the hashing queue is full and the request must be shed."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing/verification on a bounded worker pool.
+
+    bcrypt is deliberately slow (hundreds of ms per call), so running it on the
+    event loop stalls every other in-flight request. Calls are submitted to a
+    thread or process pool instead; once `max_pending` calls are already queued
+    behind the busy workers, new calls are rejected with HasherOverloadedError.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: Optional[int] = None, max_pending: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hash pool kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+
+        # Hashing policy: None hashes at passlib's default cost
+        self.rounds: Optional[int] = None
+        self._policy = pwd_context
+        self._dummy_hash: Optional[str] = None
+
+        # Metrics
+        self._outstanding = 0
+        self.completed = 0
+        self.rejected = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+        self._run_time: Optional[Histogram] = None
+        self._wait_time: Optional[Histogram] = None
+
+    def start(self) -> None:
+        """Create the worker pool. Safe to call more than once."""
+        if self._executor is not None:
+            return
+        if self.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        logger.info("Password hasher started (%s pool, %s workers)", self.kind, self.max_workers)
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, waiting for running calls to finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of calls waiting for a free worker."""
+        return max(0, self._outstanding - self.max_workers)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently running on a worker."""
+        return min(self._outstanding, self.max_workers)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool utilisation for logging and metrics."""
+        return {
+            "kind": self.kind,
+            "rounds": self.rounds,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": (self._total_wait / self.completed * 1000) if self.completed else 0.0,
+            "avg_run_ms": (self._total_run / self.completed * 1000) if self.completed else 0.0,
+        }
+
+    def register_metrics(self, registry: MetricsRegistry) -> None:
+        """Export bcrypt timings and pool counters."""
+        self._run_time = registry.histogram(
+            "password_hash_duration_seconds", "bcrypt time on a worker, by operation", ("operation",)
+        )
+        self._wait_time = registry.histogram(
+            "password_hash_wait_seconds", "Time bcrypt calls waited for a free worker"
+        )
+        registry.register_callback(
+            "password_hash_calls_total",
+            "Hashing pool calls by outcome",
+            lambda: {("completed",): self.completed, ("rejected",): self.rejected},
+            ("outcome",),
+            kind="counter",
+        )
+        registry.register_callback(
+            "password_hash_queue_depth", "Hashing calls waiting for a free worker", lambda: self.queue_depth
+        )
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.queue_depth >= self.max_pending:
+            self.rejected += 1
+            logger.warning("Password hasher overloaded: %s calls queued", self.queue_depth)
+            raise HasherOverloadedError("Password hashing queue is full")
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        self._outstanding += 1
+        try:
+            result, run_time = await loop.run_in_executor(self._executor, _timed_call, fn, *args)
+        finally:
+            self._outstanding -= 1
+        total = time.perf_counter() - submitted
+        self.completed += 1
+        self._total_run += run_time
+        self._total_wait += max(0.0, total - run_time)
+        if self._run_time is not None:
+            self._run_time.labels(_OPERATIONS.get(fn, fn.__name__)).observe(run_time * 1000)
+            self._wait_time.observe(max(0.0, total - run_time) * 1000)
+        return result
+
+    def set_rounds(self, rounds: int) -> None:
+        """
+        Hash new passwords at `rounds` and flag older hashes below it.
+
+        Only weaker hashes need a rehash, never stronger ones: workers that
+        calibrate a round apart would otherwise keep rehashing each other's
+        hashes.
+        """
+        self.rounds = rounds
+        self._policy = pwd_context.copy(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+        self._dummy_hash = None
+
+    async def calibrate(self, target_ms: float, min_rounds: int, max_rounds: int) -> int:
+        """
+        Pick the highest cost whose hash takes at most target_ms on this hardware.
+
+        Times a few cheap hashes on the pool, so the measurement includes
+        the pool's own overhead, and clamps the result to [min_rounds,
+        max_rounds].
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        probe_ms = min([
+            (await loop.run_in_executor(
+                self._executor, _timed_call, hash_password_sync, "calibration", CALIBRATION_PROBE_ROUNDS
+            ))[1] * 1000
+            for _ in range(3)
+        ])
+        rounds = CALIBRATION_PROBE_ROUNDS + math.floor(math.log2(target_ms / probe_ms))
+        rounds = max(min_rounds, min(max_rounds, rounds))
+        self.set_rounds(rounds)
+        logger.info(
+            "Calibrated bcrypt to %s rounds (~%.0f ms per hash, target %.0f ms)",
+            rounds, probe_ms * 2 ** (rounds - CALIBRATION_PROBE_ROUNDS), target_ms,
+        )
+        return rounds
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Whether a hash uses a weaker cost or scheme than the current policy."""
+        return self._policy.needs_update(hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop."""
+        return await self._run(hash_password_sync, password, self.rounds)
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """
+        Hash passwords for a bulk operation.
+
+        At most `max_workers` calls are submitted at once, so a bulk import
+        keeps the workers busy without filling the queue interactive logins
+        rely on; if the queue is full anyway the bulk caller backs off
+        rather than being shed.
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def hash_one(password: str) -> str:
+            async with semaphore:
+                while True:
+                    try:
+                        return await self.hash(password)
+                    except HasherOverloadedError:
+                        await asyncio.sleep(0.1)
+
+        return list(await asyncio.gather(*(hash_one(password) for password in passwords)))
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop."""
+        return await self._run(verify_password_sync, plain_password, hashed_password)
+
+    async def verify_dummy(self, plain_password: str) -> bool:
+        """
+        Spend the cost of a real verification, for logins with no account.
+
+        Without it, an unknown email is answered a whole bcrypt run faster
+        than a wrong password, which tells a caller which emails exist.
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(secrets.token_urlsafe(16))
+        await self.verify(plain_password, self._dummy_hash)
+        return False
+
+
+password_hasher = PasswordHasher(
+    kind=settings.HASH_POOL_KIND,
+    max_workers=settings.HASH_POOL_SIZE,
+    max_pending=settings.HASH_MAX_PENDING,
+)
+password_hasher.register_metrics(metrics)
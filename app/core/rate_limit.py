@@ -1,4 +1,110 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from typing import TYPE_CHECKING, Any, Callable
 
-limiter = Limiter(key_func=get_remote_address, headers_enabled=True)
+from fastapi import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.request_context import route_template
+
+if TYPE_CHECKING:
+    from slowapi.errors import RateLimitExceeded
+
+# slowapi, limits and the synchronous pymongo client behind the MongoDB
+# storage are only imported when rate limiting is on and configured to use
+# them; together they are a noticeable share of cold start.
+
+
+def _storage_uri() -> str:
+    if settings.RATE_LIMIT_STORAGE == "mongodb":
+        # Importing the storage registers its URI scheme with limits
+        from app.db.rate_limits import SCHEME_PREFIX
+
+        return f"{SCHEME_PREFIX}{settings.MONGO_URL}"
+    return "memory://"
+
+
+def _storage_options() -> dict:
+    if settings.RATE_LIMIT_STORAGE != "mongodb":
+        return {}
+    return {
+        "database_name": settings.MONGO_DB_NAME,
+        "sync_interval": settings.RATE_LIMIT_SYNC_INTERVAL_SECONDS,
+        "maxPoolSize": 4,
+        "serverSelectionTimeoutMS": 2000,
+    }
+
+
+def tenant_or_remote_address(request: Request) -> str:
+    """Rate limit key: the organization on authenticated routes, the client address elsewhere."""
+    org_name = getattr(request.state, "org_name", None)
+    if org_name:
+        return f"org:{org_name.lower()}"
+    from slowapi.util import get_remote_address
+
+    return get_remote_address(request)
+
+
+class DisabledLimiter:
+    """Stands in for slowapi's Limiter when RATE_LIMIT_ENABLED is off."""
+
+    enabled = False
+    _storage = None
+
+    def limit(self, *args: Any, **kwargs: Any) -> Callable[[Callable], Callable]:
+        return lambda endpoint: endpoint
+
+
+def _build_limiter() -> Any:
+    if not settings.RATE_LIMIT_ENABLED:
+        return DisabledLimiter()
+    if settings.RATE_LIMIT_STORAGE == "mongodb":
+        # Checks against MongoDB run off the event loop
+        from app.db.rate_limits import OffloadedLimiter as Limiter
+    else:
+        from slowapi import Limiter
+
+    return Limiter(
+        key_func=tenant_or_remote_address,
+        # X-RateLimit-* headers need a `response: Response` parameter on every
+        # limited endpoint.
+        headers_enabled=True,
+        strategy=settings.RATE_LIMIT_STRATEGY,
+        storage_uri=_storage_uri(),
+        storage_options=_storage_options(),
+        # If MongoDB is unreachable, limit per process rather than failing requests
+        in_memory_fallback_enabled=settings.RATE_LIMIT_STORAGE == "mongodb",
+    )
+
+
+limiter = _build_limiter()
+
+
+rate_limit_rejections = metrics.counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter", ("route",)
+)
+metrics.register_callback(
+    "rate_limit_storage_round_trips_total",
+    "MongoDB round trips made by the shared rate limit storage",
+    lambda: getattr(limiter._storage, "round_trips", 0),
+    kind="counter",
+)
+
+
+def rate_limit_exceeded_handler(request: Request, exc: "RateLimitExceeded") -> Response:
+    """slowapi's 429 response, counted per route."""
+    from slowapi import _rate_limit_exceeded_handler
+
+    rate_limit_rejections.labels(route_template(request.scope) or "unmatched").inc()
+    return _rate_limit_exceeded_handler(request, exc)
+
+
+def close_rate_limit_storage() -> None:
+    """Flush batched counters on shutdown."""
+    if settings.RATE_LIMIT_STORAGE != "mongodb" or not settings.RATE_LIMIT_ENABLED:
+        return
+    from app.db.rate_limits import MongoCounterStorage
+
+    storage = limiter._storage
+    if isinstance(storage, MongoCounterStorage):
+        storage.close()
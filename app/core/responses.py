@@ -0,0 +1,31 @@
+from typing import Any, Mapping, Optional
+
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+
+
+class ModelResponse(Response):
+    """
+    JSON response for a model the handler has already built and validated.
+
+    FastAPI validates whatever a handler returns against its response_model
+    before serializing it, so returning a model means validating it twice.
+    A Response is passed through untouched: this one is rendered straight
+    to bytes by pydantic-core. Routes keep `response_model` for the OpenAPI
+    schema.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: BaseModel,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ):
+        super().__init__(content, status_code, headers, self.media_type, background)
+
+    def render(self, content: Any) -> bytes:
+        return content.__pydantic_serializer__.to_json(content)
@@ -0,0 +1,39 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class StartupTimer:
+    """
+    Durations of the startup phases, logged as one line when the app is ready.
+
+    `imported_at` is when app.main finished importing, so the log also
+    shows the time from first import to ready: the cold start users wait
+    for. `python -m benchmarks.bench_startup` breaks the import part down
+    per module.
+    """
+
+    def __init__(self, import_started: float, imported_at: Optional[float] = None):
+        self.import_started = import_started
+        self.imported_at = imported_at
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    def report(self) -> Dict[str, float]:
+        now = time.perf_counter()
+        summary = {"total_ms": round((now - self.import_started) * 1000, 1)}
+        if self.imported_at is not None:
+            summary["import_ms"] = round((self.imported_at - self.import_started) * 1000, 1)
+        logger.info("Startup finished in %s ms", summary["total_ms"], extra={**summary, "phases": self.phases})
+        return summary
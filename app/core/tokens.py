@@ -0,0 +1,157 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Dict, Optional
+
+from jose import JWTError, jwk, jwt
+
+from app.core.cache import AsyncTTLCache
+from app.core.config import settings
+from app.core.metrics import MetricsRegistry, metrics
+from app.models.auth import TokenData
+
+
+class InvalidTokenError(Exception):
+    """Raised by a JWT backend when a token fails verification."""
+
+
+class JoseBackend:
+    """python-jose with the signing key constructed once instead of per call."""
+
+    def __init__(self, secret_key: str, algorithm: str):
+        self.algorithm = algorithm
+        self._key = jwk.construct(secret_key, algorithm)
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        return jwt.encode(claims, self._key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        try:
+            return jwt.decode(token, self._key, algorithms=[self.algorithm])
+        except JWTError as e:
+            raise InvalidTokenError(str(e)) from e
+
+
+class HMACBackend:
+    """
+    Minimal stdlib verifier for HS256/HS384/HS512 tokens.
+
+    Skips python-jose's generic JWS machinery: the keyed HMAC state is built
+    once and copied per call, the header must name exactly the configured
+    algorithm, and only `exp`/`nbf` are checked (the registered claims this
+    service issues). Encoding still goes through python-jose.
+    """
+
+    DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+    def __init__(self, secret_key: str, algorithm: str):
+        if algorithm not in self.DIGESTS:
+            raise ValueError(f"JWT_BACKEND=hmac only supports {', '.join(self.DIGESTS)}, not {algorithm}")
+        self.algorithm = algorithm
+        self._mac = hmac.new(secret_key.encode(), digestmod=self.DIGESTS[algorithm])
+        self._encoder = JoseBackend(secret_key, algorithm)
+
+    @staticmethod
+    def _b64decode(segment: str) -> bytes:
+        return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        return self._encoder.encode(claims)
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        try:
+            header_segment, payload_segment, signature_segment = token.split(".")
+            header = json.loads(self._b64decode(header_segment))
+            if header.get("alg") != self.algorithm:
+                raise InvalidTokenError("Unexpected signing algorithm")
+
+            mac = self._mac.copy()
+            mac.update(f"{header_segment}.{payload_segment}".encode("ascii"))
+            if not hmac.compare_digest(mac.digest(), self._b64decode(signature_segment)):
+                raise InvalidTokenError("Signature verification failed")
+
+            claims = json.loads(self._b64decode(payload_segment))
+            now = time.time()
+            if "exp" in claims and float(claims["exp"]) < now:
+                raise InvalidTokenError("Signature has expired")
+            if "nbf" in claims and float(claims["nbf"]) > now:
+                raise InvalidTokenError("The token is not yet valid")
+        except InvalidTokenError:
+            raise
+        except (ValueError, TypeError, AttributeError, binascii.Error) as e:
+            raise InvalidTokenError(f"Malformed token: {e}") from e
+        if not isinstance(claims, dict):
+            raise InvalidTokenError("Malformed token: claims are not an object")
+        return claims
+
+
+JWT_BACKENDS = {"jose": JoseBackend, "hmac": HMACBackend}
+
+
+class TokenVerifier:
+    """
+    Verifies bearer tokens, remembering tokens that already verified.
+
+    Entries are keyed by a digest of the token (raw tokens are never kept)
+    and expire at the token's own `exp`, capped by the cache TTL.
+    """
+
+    def __init__(self, backend, cache_enabled: bool = True, max_size: int = 10_000, ttl: float = 300.0):
+        self.backend = backend
+        self.cache_enabled = cache_enabled
+        self.cache: AsyncTTLCache[TokenData] = AsyncTTLCache(max_size=max_size, ttl=ttl)
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        return self.backend.encode(claims)
+
+    def verify(self, token: str) -> Optional[TokenData]:
+        """Return the token's data, or None if it is invalid or expired."""
+        key = self._digest(token) if self.cache_enabled else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.hits += 1
+                return cached
+            self.cache.misses += 1
+
+        try:
+            payload = self.backend.decode(token)
+        except InvalidTokenError:
+            return None
+        email = payload.get("sub")
+        org_name = payload.get("org_name")
+        if email is None or org_name is None:
+            return None
+
+        token_data = TokenData(email=email, org_name=org_name, org_id=payload.get("org_id"))
+        if key is not None and "exp" in payload:
+            remaining = float(payload["exp"]) - time.time()
+            if remaining > 0:
+                self.cache.set(key, token_data, ttl=remaining)
+        return token_data
+
+    def register_metrics(self, registry: MetricsRegistry) -> None:
+        """Export verification cache hits and misses."""
+        registry.register_callback(
+            "jwt_cache_lookups_total",
+            "Verified-token cache lookups by result",
+            lambda: {("hits",): self.cache.hits, ("misses",): self.cache.misses},
+            ("result",),
+            kind="counter",
+        )
+
+
+token_verifier = TokenVerifier(
+    JWT_BACKENDS[settings.JWT_BACKEND](settings.SECRET_KEY, settings.ALGORITHM),
+    cache_enabled=settings.JWT_CACHE_ENABLED,
+    max_size=settings.JWT_CACHE_MAX_SIZE,
+    ttl=settings.JWT_CACHE_TTL_SECONDS,
+)
+token_verifier.register_metrics(metrics)
@@ -0,0 +1,60 @@
+from typing import Any, Dict, Optional
+
+from bson.timestamp import Timestamp
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def read_preference(mode: str, max_staleness: Optional[int] = None):
+    """
+    The read preference for a mode name (as in a connection string).
+
+    max_staleness excludes secondaries estimated to be further behind the
+    primary than that many seconds; the driver requires at least 90.
+    """
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    if mode == "primary":
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=-1 if max_staleness is None else max_staleness)
+
+
+class CausalClock:
+    """
+    The latest cluster and operation time of metadata writes this process
+    made, or learned about from another worker.
+
+    A causally consistent session advanced to it reads with
+    `afterClusterTime`, so a secondary answers only once it has replicated
+    those writes: a login right after a create, or a get right after a
+    rename, sees the change even when it reads from a lagging secondary.
+    """
+
+    def __init__(self):
+        self.cluster_time: Optional[Dict[str, Any]] = None
+        self.operation_time: Optional[Timestamp] = None
+
+    def observe(self, session) -> None:
+        """Advance to the times a session's writes reached."""
+        cluster_time = session.cluster_time
+        if cluster_time and (self.cluster_time is None or cluster_time["clusterTime"] > self.cluster_time["clusterTime"]):
+            self.cluster_time = cluster_time
+        self.observe_time(session.operation_time)
+
+    def observe_time(self, operation_time: Optional[Timestamp]) -> None:
+        if operation_time is not None and (self.operation_time is None or operation_time > self.operation_time):
+            self.operation_time = operation_time
+
+    def apply(self, session) -> None:
+        """Make a session's reads wait for every write observed so far."""
+        if self.cluster_time:
+            session.advance_cluster_time(self.cluster_time)
+        if self.operation_time:
+            session.advance_operation_time(self.operation_time)
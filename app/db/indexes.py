@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Set
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.collation import Collation, CollationStrength
+from pymongo.errors import OperationFailure
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.leader import LOCKS_COLLECTION
+from app.db.mongodb import db
+
+logger = get_logger(__name__)
+
+# get_tenant_collection_name lowercases organization names, so "Acme" and
+# "acme" share a collection. Uniqueness and lookups on names and emails are
+# therefore case-insensitive; every query on these fields must pass this
+# collation to be able to use the indexes below.
+ORG_COLLATION = Collation(locale="en", strength=CollationStrength.SECONDARY)
+
+ORGANIZATION_INDEXES = [
+    IndexModel(
+        [("organization_name", ASCENDING)],
+        name="organization_name_unique",
+        unique=True,
+        collation=ORG_COLLATION,
+    ),
+    IndexModel(
+        [("admin_email", ASCENDING)],
+        name="admin_email_unique",
+        unique=True,
+        collation=ORG_COLLATION,
+    ),
+    # Sanitization also strips punctuation, so distinct names can still map
+    # to the same collection; guard the collection name itself.
+    IndexModel(
+        [("collection_name", ASCENDING)],
+        name="collection_name_unique",
+        unique=True,
+    ),
+    # Keyset pagination in creation order; _id breaks ties. Same collation
+    # as the name indexes so listings filtered by name prefix can use it.
+    IndexModel(
+        [("created_at", ASCENDING), ("_id", ASCENDING)],
+        name="created_at_id",
+        collation=ORG_COLLATION,
+    ),
+    # Only set while a delete is pending; the reconciler looks these up
+    IndexModel([("status", ASCENDING)], name="status", sparse=True),
+    # Database-per-tenant placements, checked by the orphan scan
+    IndexModel([("placement.database", ASCENDING)], name="placement_database", sparse=True),
+    # Shared-collection tenants, looked up by the tenant summary feed
+    IndexModel([("placement.tenant_id", ASCENDING)], name="placement_tenant_id", sparse=True),
+]
+
+INTENT_INDEXES = [
+    IndexModel([("created_at", ASCENDING)], name="created_at"),
+]
+
+JOB_INDEXES = [
+    # At most one queued/running job per organization
+    IndexModel([("active_key", ASCENDING)], name="active_key_unique", unique=True, sparse=True),
+    # Collection names held by queued/running renames, so creates cannot take them
+    IndexModel([("reserved_key", ASCENDING)], name="reserved_key_unique", unique=True, sparse=True),
+    IndexModel([("status", ASCENDING), ("type", ASCENDING), ("created_at", ASCENDING)], name="claim_order"),
+    IndexModel(
+        [("finished_at", ASCENDING)],
+        name="finished_at_ttl",
+        expireAfterSeconds=settings.JOB_RETENTION_SECONDS,
+    ),
+]
+
+LOCK_INDEXES = [
+    IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+]
+
+RATE_LIMIT_INDEXES = [
+    IndexModel([("expireAt", ASCENDING)], name="expire_at_ttl", expireAfterSeconds=0),
+]
+
+# Hot queries that must be served by an index: (description, filter, collation).
+HOT_QUERIES = [
+    ("organization by name", {"organization_name": "__plan_check__"}, ORG_COLLATION),
+    ("organization by admin email", {"admin_email": "__plan_check__"}, ORG_COLLATION),
+    ("organization by collection name", {"collection_name": "__plan_check__"}, None),
+    (
+        "organizations by name prefix",
+        {"organization_name": {"$gte": "__plan_check__", "$lt": "__plan_check__\uffff"}},
+        ORG_COLLATION,
+    ),
+    ("organizations by creation time", {"created_at": {"$gt": datetime(1970, 1, 1)}}, ORG_COLLATION),
+]
+
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class QueryPlanError(RuntimeError):
+    """Raised when a hot query would not be served by an index."""
+
+
+async def ensure_indexes() -> None:
+    """
+    Create the indexes on `organizations`, `jobs`, `intents`, `locks` and, with
+    RATE_LIMIT_STORAGE=mongodb, the rate limit collections. Collections are
+    handled concurrently.
+
+    Idempotent: creating an index that already exists with the same
+    definition is a no-op. An existing index with the same name but a
+    different definition, or duplicate data, aborts startup.
+    """
+    master_db = db.get_master_database()
+    collections = [
+        ("organizations", ORGANIZATION_INDEXES),
+        ("jobs", JOB_INDEXES),
+        ("intents", INTENT_INDEXES),
+        (LOCKS_COLLECTION, LOCK_INDEXES),
+    ]
+    if settings.RATE_LIMIT_STORAGE == "mongodb":
+        from app.db.rate_limits import BUCKETS_COLLECTION, WORKERS_COLLECTION
+
+        collections += [(BUCKETS_COLLECTION, RATE_LIMIT_INDEXES), (WORKERS_COLLECTION, RATE_LIMIT_INDEXES)]
+
+    async def ensure(collection_name: str, indexes: List[IndexModel]) -> None:
+        try:
+            created = await master_db[collection_name].create_indexes(indexes)
+        except OperationFailure as e:
+            logger.error("Failed to create indexes on '%s': %s", collection_name, e)
+            raise
+        logger.info("Indexes ensured on '%s': %s", collection_name, ", ".join(created))
+
+    await asyncio.gather(*(ensure(name, indexes) for name, indexes in collections))
+
+
+def schema_digest() -> str:
+    """
+    Short digest of the index definitions and hot queries.
+
+    Startup checks are deduplicated per digest, so a release that changes
+    an index gets its checks run even if the previous release ran them
+    moments ago.
+    """
+    schema = [
+        [index.document for index in indexes]
+        for indexes in (ORGANIZATION_INDEXES, INTENT_INDEXES, JOB_INDEXES, LOCK_INDEXES, RATE_LIMIT_INDEXES)
+    ]
+    raw = json.dumps([schema, HOT_QUERIES], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:12]
+
+
+def _plan_stages(plan: Any) -> Set[str]:
+    """Collect every stage name in an explain plan tree."""
+    stages: Set[str] = set()
+    if isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            stages.add(plan["stage"])
+        for value in plan.values():
+            stages |= _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            stages |= _plan_stages(item)
+    return stages
+
+
+async def verify_query_plans() -> None:
+    """
+    Explain each hot query and fail loudly if any would scan the collection.
+    """
+    collection = db.get_master_database()["organizations"]
+    failures: List[str] = []
+
+    async def check(description: str, query: Dict[str, Any], collation: Any) -> None:
+        cursor = collection.find(query, collation=collation).limit(1)
+        explain: Dict[str, Any] = await cursor.explain()
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        if "COLLSCAN" in stages or not any("IXSCAN" in s or s == "IDHACK" for s in stages):
+            failures.append(f"{description} (stages: {', '.join(sorted(stages)) or 'unknown'})")
+
+    await asyncio.gather(*(check(*hot_query) for hot_query in HOT_QUERIES))
+
+    if failures:
+        message = "Hot queries are not using an index: " + "; ".join(failures)
+        logger.error(message)
+        raise QueryPlanError(message)
+    logger.info("Query plans verified: all hot queries use an index")
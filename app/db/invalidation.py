@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from pymongo.errors import PyMongoError
+
+from app.core.logging import get_logger
+from app.db.mongodb import db
+
+logger = get_logger(__name__)
+
+# Receives the organization names and admin emails whose cache entries are
+# stale. (None, None) means messages may have been lost: drop everything.
+InvalidationHandler = Callable[[Optional[List[str]], Optional[List[str]]], Awaitable[None]]
+
+
+class InvalidationChannel:
+    """
+    Carries cache invalidations to the other processes serving the API.
+
+    The publishing worker applies its own invalidations directly; channels
+    only need to deliver them everywhere else.
+    """
+
+    async def start(self, handler: InvalidationHandler) -> None:
+        self._handler = handler
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, names: List[str], emails: List[str]) -> None:
+        raise NotImplementedError
+
+
+class LocalInvalidationChannel(InvalidationChannel):
+    """
+    In-process stand-in for single-worker deployments and tests.
+
+    Nothing leaves the current worker; other workers rely on the cache TTL.
+    """
+
+    async def publish(self, names: List[str], emails: List[str]) -> None:
+        pass
+
+
+class ChangeStreamInvalidationChannel(InvalidationChannel):
+    """
+    Broadcasts invalidations through a MongoDB change stream.
+
+    Publishing inserts a small message into the `cache_invalidations`
+    collection (expired by a TTL index); every worker watches that collection
+    and applies the messages it sees. Requires a replica set or sharded
+    cluster.
+    """
+
+    COLLECTION = "cache_invalidations"
+    MESSAGE_TTL_SECONDS = 300
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def _collection(self):
+        return db.get_master_database()[self.COLLECTION]
+
+    async def start(self, handler: InvalidationHandler) -> None:
+        await super().start(handler)
+        await self._collection().create_index("created_at", expireAfterSeconds=self.MESSAGE_TTL_SECONDS)
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(self, names: List[str], emails: List[str]) -> None:
+        try:
+            await self._collection().insert_one({
+                "names": names,
+                "emails": emails,
+                "created_at": datetime.now(timezone.utc),
+            })
+        except PyMongoError as e:
+            # The write itself succeeded; other workers fall back to the TTL.
+            logger.error("Failed to publish cache invalidation: %s", e)
+
+    async def _watch(self) -> None:
+        resume_token = None
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                async with self._collection().watch(pipeline, resume_after=resume_token) as stream:
+                    logger.info("Watching cache invalidations via change stream")
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        # Reloads wait until a secondary has the other worker's write
+                        db.clock.observe_time(change.get("clusterTime"))
+                        message = change["fullDocument"]
+                        await self._handler(message.get("names", []), message.get("emails", []))
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                logger.error("Cache invalidation change stream failed, retrying: %s", e)
+                await self._handler(None, None)
+                await asyncio.sleep(1)
+
+
+def get_invalidation_channel(kind: str) -> InvalidationChannel:
+    """Build the invalidation channel configured by ORG_CACHE_INVALIDATION."""
+    if kind == "change_stream":
+        return ChangeStreamInvalidationChannel()
+    if kind == "local":
+        return LocalInvalidationChannel()
+    raise ValueError(f"Unknown cache invalidation channel: {kind}")
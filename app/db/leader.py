@@ -0,0 +1,59 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+from app.db.mongodb import db
+
+LOCKS_COLLECTION = "locks"
+
+
+class LeaderLease:
+    """
+    A named lease in `master_metadata.locks`, held by one process at a time.
+
+    Taking it is a single upsert that only matches a lease that has expired
+    or is already ours; while another process holds it the upsert collides
+    on `_id` and fails. The holder renews it by acquiring it again; once it
+    stops, the lease lapses after `ttl_seconds`, which also makes it a
+    window within which the work it guards is not repeated by the other
+    workers and replicas starting up.
+
+    `finish()` records, in a marker that outlives the lease, that the
+    guarded work completed, so the others can wait for it (`finished()`).
+    """
+
+    def __init__(self, name: str, ttl_seconds: float):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def _locks(self):
+        return db.get_master_database()[LOCKS_COLLECTION]
+
+    async def acquire(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self._locks().update_one(
+                {"_id": self.name, "$or": [{"expires_at": {"$lte": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.ttl_seconds)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def release(self) -> None:
+        await self._locks().delete_one({"_id": self.name, "owner": self.owner})
+
+    async def finish(self) -> None:
+        await self._locks().update_one(
+            {"_id": f"{self.name}:done"},
+            {"$set": {"owner": self.owner, "finished_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+
+    async def finished(self) -> bool:
+        return await self._locks().find_one({"_id": f"{self.name}:done"}, {"_id": 1}) is not None
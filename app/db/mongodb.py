@@ -1,27 +1,213 @@
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+from motor.motor_asyncio import (
+    AsyncIOMotorClient,
+    AsyncIOMotorClientSession,
+    AsyncIOMotorCollection,
+    AsyncIOMotorDatabase,
+)
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import CollectionInvalid
+from pymongo.read_preferences import Primary
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.metrics import MetricsRegistry, metrics
+from app.db.consistency import CausalClock, read_preference
+from app.db.monitoring import command_monitor, pool_monitor
+from app.db.placement import PLACEMENTS, Placement, TenantPlacement, TenantScope
+from app.db.tenant_pool import SpareCollectionPool
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
 class DatabaseManager:
     client: AsyncIOMotorClient = None
 
-    def __init__(self):
+    def __init__(self, client_factory: Callable[..., AsyncIOMotorClient] = AsyncIOMotorClient):
+        # Called as client_factory(MONGO_URL, **client_options()) on connect;
+        # tests pass an in-memory fake (mongomock-motor)
+        self.client_factory = client_factory
         self.client = None
+        # Whether the deployment runs multi-document transactions; set on connect
+        self.transactions = False
+        # Whether the deployment has logical sessions, and whether it is a
+        # replica set or sharded cluster (change streams); set on connect
+        self.sessions = False
+        self.replicated = False
+        # For metadata reads that tolerate bounded staleness (see get_read_database)
+        self.stale_reads = read_preference(settings.MONGO_STALE_READ_PREFERENCE, settings.MONGO_MAX_STALENESS_SECONDS)
+        self._reset()
+
+    def _reset(self) -> None:
+        """State that belongs to one connected deployment; connect starts from scratch."""
+        self.clock = CausalClock()
+        self.spares = SpareCollectionPool(self, settings.TENANT_SPARE_POOL_SIZE)
+        self.placements: Dict[str, TenantPlacement] = {layout: cls(self) for layout, cls in PLACEMENTS.items()}
+
+    @staticmethod
+    def client_options() -> Dict[str, Any]:
+        """Pool, compression and monitoring options from settings."""
+        options: Dict[str, Any] = {
+            "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+            "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+            "maxConnecting": settings.MONGO_MAX_CONNECTING,
+            "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "readPreference": settings.MONGO_READ_PREFERENCE,
+        }
+        if settings.MONGO_WAIT_QUEUE_TIMEOUT_MS is not None:
+            options["waitQueueTimeoutMS"] = settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
+        if settings.MONGO_MAX_IDLE_TIME_MS is not None:
+            options["maxIdleTimeMS"] = settings.MONGO_MAX_IDLE_TIME_MS
+        if settings.MONGO_COMPRESSORS:
+            options["compressors"] = settings.MONGO_COMPRESSORS
+        if settings.MONGO_MONITORING_ENABLED:
+            options["event_listeners"] = [pool_monitor, command_monitor]
+        return options
 
     async def connect(self):
         """Establish connection to MongoDB."""
         logger.info("Connecting to MongoDB...")
         try:
-            self.client = AsyncIOMotorClient(settings.MONGO_URL)
+            self._reset()
+            self.client = self.client_factory(settings.MONGO_URL, **self.client_options())
+            if settings.MONGO_POOL_WARMUP:
+                # The `hello` round trip overlaps with opening the pool
+                await asyncio.gather(self.warm_up(), self.detect_features())
+            else:
+                await self.detect_features()
+            logger.info(
+                "Multi-document transactions: %s, causally consistent reads: %s",
+                "on" if self.transactions else "off",
+                "on" if self.sessions else "off",
+            )
+            if self.replicated and not isinstance(self.stale_reads, Primary) and settings.ORG_CACHE_INVALIDATION == "local":
+                logger.warning(
+                    "MONGO_STALE_READ_PREFERENCE=%s with ORG_CACHE_INVALIDATION=local: other workers and replicas "
+                    "can read organizations from a secondary up to MONGO_MAX_STALENESS_SECONDS behind; "
+                    "use change_stream to carry each write's operation time to them",
+                    settings.MONGO_STALE_READ_PREFERENCE,
+                )
             logger.info("--- Connected to MongoDB ---")
         except Exception as e:
-             logger.error(f"Failed to connect to MongoDB: {e}")
+             logger.error("Failed to connect to MongoDB: %s", e)
              raise e
 
+    async def warm_up(self):
+        """
+        Open connections before the first request needs them.
+
+        Issues one ping per connection wanted (MONGO_MIN_POOL_SIZE, at least
+        one) concurrently, which also fails startup early if MongoDB is
+        unreachable.
+        """
+        connections = max(1, settings.MONGO_MIN_POOL_SIZE)
+        await asyncio.gather(*(self.client.admin.command("ping") for _ in range(connections)))
+        logger.info("Connection pool warmed up with %s connection(s)", connections)
+
+    async def detect_features(self) -> None:
+        """
+        Set `sessions`, `replicated` and `transactions` from `hello`. Every
+        current server has sessions; replica sets and sharded clusters also
+        run transactions and change streams.
+        """
+        try:
+            hello = await self.client.admin.command("hello")
+        except Exception as e:
+            logger.warning("Could not detect session and transaction support, assuming none: %s", e)
+            hello = {}
+        self.sessions = "logicalSessionTimeoutMinutes" in hello
+        self.replicated = "setName" in hello or hello.get("msg") == "isdbgrid"
+        self.transactions = settings.DB_TRANSACTIONS and self.replicated
+
+    async def in_transaction(self, writes: Callable[[Optional[AsyncIOMotorClientSession]], Awaitable[T]]) -> T:
+        """
+        Run writes(session) as one multi-document transaction, retried on
+        transient errors, when the deployment supports them. Otherwise
+        writes runs its writes one at a time in a causal_session (or with
+        None), and the caller's write-ahead records have to cover a crash in
+        between.
+        """
+        if not self.transactions:
+            async with self.causal_session() as session:
+                return await writes(session)
+        async with await self.client.start_session() as session:
+            try:
+                return await session.with_transaction(writes)
+            finally:
+                self.clock.observe(session)
+
+    @asynccontextmanager
+    async def causal_session(self) -> AsyncIterator[Optional[AsyncIOMotorClientSession]]:
+        """
+        Session for metadata writes that later reads must see, or None
+        without session support. The writes are recorded in `clock` when
+        the block exits.
+        """
+        if not self.sessions:
+            yield None
+            return
+        async with await self.client.start_session(causal_consistency=True) as session:
+            try:
+                yield session
+            finally:
+                self.clock.observe(session)
+
+    @asynccontextmanager
+    async def read_session(self) -> AsyncIterator[Optional[AsyncIOMotorClientSession]]:
+        """
+        Session for reads from get_read_database that waits for every
+        metadata write in `clock`, or None when there is nothing to wait for
+        (no sessions, no writes yet, or reads going to the primary anyway).
+        """
+        if not self.sessions or self.clock.operation_time is None or isinstance(self.stale_reads, Primary):
+            yield None
+            return
+        async with await self.client.start_session(causal_consistency=True) as session:
+            self.clock.apply(session)
+            yield session
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool and per-command latency statistics."""
+        return {"pool": pool_monitor.stats(), "commands": command_monitor.stats()}
+
+    def register_metrics(self, registry: MetricsRegistry) -> None:
+        """Export pool saturation and spare collection counters."""
+        registry.register_callback(
+            "mongodb_pool_connections",
+            "MongoDB connections by state",
+            lambda: {
+                ("open",): pool_monitor.open_connections,
+                ("in_use",): pool_monitor.in_use,
+                ("waiting",): pool_monitor.waiting,
+            },
+            ("state",),
+        )
+        registry.register_callback(
+            "mongodb_pool_checkout_failures_total",
+            "Failed connection checkouts by reason",
+            lambda: {(reason,): count for reason, count in list(pool_monitor.checkout_failures.items())},
+            ("reason",),
+            kind="counter",
+        )
+        registry.register_callback(
+            "mongodb_pool_clears_total",
+            "Connection pool clears (network errors, failovers)",
+            lambda: pool_monitor.pool_clears,
+            kind="counter",
+        )
+        registry.register_callback(
+            "tenant_spare_collections_total",
+            "Tenant collection creations served from the spare pool, and misses",
+            lambda: {("claimed",): self.spares.claimed, ("missed",): self.spares.misses},
+            ("outcome",),
+            kind="counter",
+        )
+
     async def close(self):
         """Close MongoDB connection."""
+        await self.spares.stop()
         if self.client:
             logger.info("Closing MongoDB connection...")
             self.client.close()
@@ -33,6 +219,16 @@ class DatabaseManager:
              raise RuntimeError("Database not initialized. Call connect() first.")
         return self.client[settings.MONGO_DB_NAME]
 
+    def get_read_database(self) -> AsyncIOMotorDatabase:
+        """
+        The master database routed for reads that tolerate bounded staleness
+        (MONGO_STALE_READ_PREFERENCE, MONGO_MAX_STALENESS_SECONDS). Use it
+        with read_session to still see the writes this process knows about.
+        """
+        if not self.client:
+             raise RuntimeError("Database not initialized. Call connect() first.")
+        return self.client.get_database(settings.MONGO_DB_NAME, read_preference=self.stale_reads)
+
     def get_tenant_collection_name(self, org_name: str) -> str:
         """Generate sanitized collection name for a tenant."""
         # Simple sanitization: lowercase and replace spaces with underscores. 
@@ -60,4 +256,76 @@ class DatabaseManager:
         collection_name = self.get_tenant_collection_name(org_name)
         return self.client[settings.MONGO_DB_NAME][collection_name]
 
+    @staticmethod
+    def tenant_collection_options() -> Dict[str, Any]:
+        """create_collection options for tenant collections, from settings."""
+        options: Dict[str, Any] = {}
+        if settings.TENANT_COLLECTION_LAYOUT == "clustered":
+            options["clusteredIndex"] = {"key": {"_id": 1}, "unique": True}
+        elif settings.TENANT_COLLECTION_LAYOUT == "timeseries":
+            timeseries = {"timeField": settings.TENANT_TIMESERIES_TIME_FIELD}
+            if settings.TENANT_TIMESERIES_META_FIELD:
+                timeseries["metaField"] = settings.TENANT_TIMESERIES_META_FIELD
+            options["timeseries"] = timeseries
+        if settings.TENANT_SUMMARY_PRE_IMAGES and settings.TENANT_COLLECTION_LAYOUT != "timeseries":
+            # Lets the summary feed size updates and deletes exactly
+            options["changeStreamPreAndPostImages"] = {"enabled": True}
+        if settings.TENANT_VALIDATOR:
+            options["validator"] = settings.TENANT_VALIDATOR
+            options["validationLevel"] = settings.TENANT_VALIDATION_LEVEL
+            options["validationAction"] = settings.TENANT_VALIDATION_ACTION
+        return options
+
+    @staticmethod
+    def tenant_indexes() -> List[IndexModel]:
+        """Default indexes of every tenant collection."""
+        return [IndexModel([(field, ASCENDING)], name=f"{field}_1") for field in settings.TENANT_INDEXES]
+
+    async def provision_collection(
+        self, collection: AsyncIOMotorCollection, indexes: Optional[List[IndexModel]] = None
+    ) -> AsyncIOMotorCollection:
+        """
+        Create a collection with the tenant options and indexes (the default tenant indexes unless given).
+
+        An existing collection (e.g. one a crashed request already created)
+        is kept as it is, apart from ensuring the indexes.
+        """
+        try:
+            await collection.database.create_collection(collection.name, **self.tenant_collection_options())
+        except CollectionInvalid:
+            pass
+        indexes = self.tenant_indexes() if indexes is None else indexes
+        if indexes:
+            await collection.create_indexes(indexes)
+        return collection
+
+    def tenant_placement(self, layout: Optional[str] = None) -> TenantPlacement:
+        """The placement strategy for a layout, by default the one new tenants get (TENANT_PLACEMENT)."""
+        return self.placements[layout or settings.TENANT_PLACEMENT]
+
+    @staticmethod
+    def placement_of(org: Dict[str, Any]) -> Placement:
+        """An organization's recorded placement; metadata from before placements means collection-per-tenant."""
+        return org.get("placement") or {
+            "layout": "collection",
+            "database": settings.MONGO_DB_NAME,
+            "collection": org["collection_name"],
+        }
+
+    def tenant_scope(self, org: Dict[str, Any]) -> TenantScope:
+        """Collection and filter holding an organization's documents."""
+        placement = self.placement_of(org)
+        return self.placements[placement["layout"]].scope(placement)
+
+    async def provision_tenant(self, org_name: str, placement: Placement) -> None:
+        """Create the storage an assigned placement needs."""
+        await self.placements[placement["layout"]].provision(org_name, placement)
+
+    async def drop_tenant(self, org: Dict[str, Any]) -> None:
+        """Delete an organization's documents along with any storage of its own."""
+        placement = self.placement_of(org)
+        await self.placements[placement["layout"]].drop(placement)
+
+
 db = DatabaseManager()
+db.register_metrics(metrics)
@@ -0,0 +1,134 @@
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+from pymongo import monitoring
+
+from app.core.metrics import LatencyHistogram, metrics
+
+TENANT_COLLECTION_PREFIXES = ("org_", "spare_tenant_")
+
+mongodb_command_duration = metrics.histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by command and collection (tenant collections share one label)",
+    ("command", "collection"),
+)
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection pool saturation from pymongo's CMAP events."""
+
+    def __init__(self):
+        self.checkout_wait = LatencyHistogram()
+        self.open_connections = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.checkout_failures: Dict[str, int] = defaultdict(int)
+        self.pool_clears = 0
+        self._lock = threading.Lock()
+
+    def _add(self, attr: str, delta: int) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + delta)
+
+    def pool_created(self, event): pass
+
+    def pool_ready(self, event): pass
+
+    def pool_cleared(self, event):
+        self._add("pool_clears", 1)
+
+    def pool_closed(self, event): pass
+
+    def connection_created(self, event):
+        self._add("open_connections", 1)
+
+    def connection_ready(self, event): pass
+
+    def connection_closed(self, event):
+        self._add("open_connections", -1)
+
+    def connection_check_out_started(self, event):
+        self._add("waiting", 1)
+
+    def connection_check_out_failed(self, event):
+        self._add("waiting", -1)
+        with self._lock:
+            self.checkout_failures[str(event.reason)] += 1
+
+    def connection_checked_out(self, event):
+        self._add("waiting", -1)
+        self._add("in_use", 1)
+        if event.duration is not None:
+            self.checkout_wait.observe(event.duration * 1000)
+
+    def connection_checked_in(self, event):
+        self._add("in_use", -1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "open_connections": self.open_connections,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "pool_clears": self.pool_clears,
+            "checkout_failures": dict(self.checkout_failures),
+            "checkout_wait": self.checkout_wait.snapshot(),
+        }
+
+
+def _collection_label(event: monitoring.CommandStartedEvent) -> str:
+    target = event.command.get(event.command_name)
+    if event.command_name == "getMore":
+        target = event.command.get("collection")
+    if not isinstance(target, str):
+        return ""
+    return "tenant" if target.startswith(TENANT_COLLECTION_PREFIXES) else target
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """
+    Per-command latency histograms from pymongo's command monitoring events.
+
+    Latencies are also exported per collection; the collection is taken from
+    the started event and matched to its completion by request id.
+    """
+
+    def __init__(self):
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.failures: Dict[str, int] = defaultdict(int)
+        self._collections: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, command_name: str) -> LatencyHistogram:
+        histogram = self.latency.get(command_name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.latency.setdefault(command_name, LatencyHistogram())
+        return histogram
+
+    def started(self, event):
+        self._collections[(event.connection_id, event.request_id)] = _collection_label(event)
+
+    def _observe(self, event) -> None:
+        duration_ms = event.duration_micros / 1000
+        self._histogram(event.command_name).observe(duration_ms)
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        mongodb_command_duration.labels(event.command_name, collection).observe(duration_ms)
+
+    def succeeded(self, event):
+        self._observe(event)
+
+    def failed(self, event):
+        self._observe(event)
+        with self._lock:
+            self.failures[event.command_name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "commands": {name: histogram.snapshot() for name, histogram in list(self.latency.items())},
+            "failures": dict(self.failures),
+        }
+
+
+pool_monitor = PoolMonitor()
+command_monitor = CommandMonitor()
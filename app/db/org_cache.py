@@ -0,0 +1,102 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.cache import AsyncTTLCache
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import MetricsRegistry, metrics
+from app.db.indexes import ORG_COLLATION
+from app.db.invalidation import InvalidationChannel, get_invalidation_channel
+from app.db.mongodb import db
+
+logger = get_logger(__name__)
+
+
+class OrganizationCache:
+    """
+    Read-through cache for documents in `master_metadata.organizations`.
+
+    Lookups are keyed by organization name and by admin email, both matched
+    case-insensitively like the unique indexes. Writers must call
+    `invalidate` after changing a document; the configured channel forwards
+    the invalidation to the other workers. Misses read from
+    `db.get_read_database()` in a `db.read_session()`, so a reload after an
+    invalidation never caches a version older than the write behind it.
+    """
+
+    def __init__(self, max_size: int, ttl: float, channel: InvalidationChannel, enabled: bool = True):
+        self.enabled = enabled
+        self.by_name: AsyncTTLCache[Dict[str, Any]] = AsyncTTLCache(max_size=max_size, ttl=ttl)
+        self.by_email: AsyncTTLCache[Dict[str, Any]] = AsyncTTLCache(max_size=max_size, ttl=ttl)
+        self.channel = channel
+
+    async def start(self) -> None:
+        await self.channel.start(self._apply_invalidation)
+
+    async def stop(self) -> None:
+        await self.channel.stop()
+
+    async def get_by_name(self, org_name: str) -> Optional[Dict[str, Any]]:
+        """Return the organization document for org_name, or None."""
+        return await self._lookup(self.by_name, org_name.lower(), {"organization_name": org_name})
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Return the organization document administered by email, or None."""
+        return await self._lookup(self.by_email, email.lower(), {"admin_email": email})
+
+    async def _lookup(self, cache: AsyncTTLCache, key: str, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        async def load():
+            async with db.read_session() as session:
+                return await db.get_read_database()["organizations"].find_one(
+                    query, collation=ORG_COLLATION, session=session
+                )
+
+        if not self.enabled:
+            return await load()
+        org = await cache.get_or_load(key, load)
+        # Hand out a copy so callers cannot mutate the cached document.
+        return dict(org) if org is not None else None
+
+    async def invalidate(self, names: Iterable[str] = (), emails: Iterable[str] = ()) -> None:
+        """Drop entries locally and broadcast the invalidation to other workers."""
+        names, emails = list(names), list(emails)
+        await self._apply_invalidation(names, emails)
+        await self.channel.publish(names, emails)
+
+    async def _apply_invalidation(self, names: Optional[List[str]], emails: Optional[List[str]]) -> None:
+        if names is None and emails is None:
+            self.by_name.clear()
+            self.by_email.clear()
+            return
+        for name in names or []:
+            self.by_name.invalidate(name.lower())
+        for email in emails or []:
+            self.by_email.invalidate(email.lower())
+
+    def stats(self) -> Dict[str, Any]:
+        return {"by_name": self.by_name.stats(), "by_email": self.by_email.stats()}
+
+    def register_metrics(self, registry: MetricsRegistry) -> None:
+        """Export hit/miss counters of both lookups."""
+        def lookups() -> Dict[tuple, int]:
+            counts = {}
+            for index, cache in (("name", self.by_name), ("email", self.by_email)):
+                for result in ("hits", "misses", "coalesced", "evictions"):
+                    counts[(index, result)] = getattr(cache, result)
+            return counts
+
+        registry.register_callback(
+            "org_cache_lookups_total",
+            "Organization cache lookups by index and result (evictions counted alongside)",
+            lookups,
+            ("index", "result"),
+            kind="counter",
+        )
+
+
+org_cache = OrganizationCache(
+    max_size=settings.ORG_CACHE_MAX_SIZE,
+    ttl=settings.ORG_CACHE_TTL_SECONDS,
+    channel=get_invalidation_channel(settings.ORG_CACHE_INVALIDATION),
+    enabled=settings.ORG_CACHE_ENABLED,
+)
+org_cache.register_metrics(metrics)
@@ -0,0 +1,161 @@
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, IndexModel
+
+from app.core.config import settings
+
+# Recorded on every organization as `placement`, e.g.
+#   {"layout": "collection", "database": "master_metadata", "collection": "org_acme"}
+#   {"layout": "shared", "database": "master_metadata", "collection": "tenant_data", "tenant_id": "..."}
+#   {"layout": "database", "database": "tenant_3f2a...", "collection": "data"}
+Placement = Dict[str, Any]
+
+SHARED_COLLECTION = "tenant_data"
+TENANT_DATABASE_PREFIX = "tenant_"
+TENANT_DATABASE_COLLECTION = "data"
+
+
+@dataclass
+class TenantScope:
+    """A tenant's documents: the collection they live in and the filter that selects them."""
+
+    collection: AsyncIOMotorCollection
+    filter: Dict[str, Any] = field(default_factory=dict)
+
+    def query(self, query: Dict[str, Any] = None) -> Dict[str, Any]:
+        return {**(query or {}), **self.filter}
+
+    def document(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        return {**document, **self.filter}
+
+
+class TenantPlacement:
+    """
+    Where one storage layout puts a tenant's data.
+
+    `assign` computes a placement without touching the database, so it can
+    be stored with the organization's metadata before anything is created;
+    every later operation works from that stored placement.
+    """
+
+    layout = ""
+    # Whether renaming an organization leaves its data where it is
+    metadata_only_rename = True
+
+    def __init__(self, manager: Any):
+        self.manager = manager
+
+    def assign(self, org_name: str) -> Placement:
+        raise NotImplementedError
+
+    def scope(self, placement: Placement) -> TenantScope:
+        collection = self.manager.client[placement["database"]][placement["collection"]]
+        return TenantScope(collection)
+
+    async def provision(self, org_name: str, placement: Placement) -> None:
+        raise NotImplementedError
+
+    async def drop(self, placement: Placement) -> None:
+        raise NotImplementedError
+
+
+class CollectionPerTenant(TenantPlacement):
+    """`org_<name>` collections in MONGO_DB_NAME; renames move the data."""
+
+    layout = "collection"
+    metadata_only_rename = False
+
+    def assign(self, org_name: str) -> Placement:
+        return {
+            "layout": self.layout,
+            "database": settings.MONGO_DB_NAME,
+            "collection": self.manager.get_tenant_collection_name(org_name),
+        }
+
+    async def provision(self, org_name: str, placement: Placement) -> None:
+        # A pre-provisioned spare when available
+        if await self.manager.spares.claim(placement["collection"]) is None:
+            await self.manager.provision_collection(self.scope(placement).collection)
+
+    async def drop(self, placement: Placement) -> None:
+        await self.scope(placement).collection.drop()
+
+
+class SharedCollection(TenantPlacement):
+    """
+    One `tenant_data` collection for all tenants, partitioned by `tenant_id`.
+
+    The catalog does not grow with the number of tenants. Every index leads
+    with `tenant_id`, so a tenant's queries stay within its own key range.
+    """
+
+    layout = "shared"
+
+    def __init__(self, manager: Any):
+        super().__init__(manager)
+        self._prepared = False
+
+    def assign(self, org_name: str) -> Placement:
+        return {
+            "layout": self.layout,
+            "database": settings.MONGO_DB_NAME,
+            "collection": SHARED_COLLECTION,
+            "tenant_id": uuid.uuid4().hex,
+        }
+
+    def scope(self, placement: Placement) -> TenantScope:
+        return TenantScope(super().scope(placement).collection, {"tenant_id": placement["tenant_id"]})
+
+    @staticmethod
+    def indexes() -> List[IndexModel]:
+        return [
+            IndexModel([("tenant_id", ASCENDING), ("_id", ASCENDING)], name="tenant_id_1__id_1"),
+            *(
+                IndexModel([("tenant_id", ASCENDING), (name, ASCENDING)], name=f"tenant_id_1_{name}_1")
+                for name in settings.TENANT_INDEXES
+            ),
+        ]
+
+    async def provision(self, org_name: str, placement: Placement) -> None:
+        # Nothing per tenant; the shared collection is set up once per process
+        if not self._prepared:
+            collection = self.manager.client[placement["database"]][placement["collection"]]
+            await self.manager.provision_collection(collection, self.indexes())
+            self._prepared = True
+
+    async def drop(self, placement: Placement) -> None:
+        scope = self.scope(placement)
+        await scope.collection.delete_many(scope.filter)
+
+
+class DatabasePerTenant(TenantPlacement):
+    """
+    A `tenant_<id>` database per tenant holding a single `data` collection.
+
+    The database name is random rather than derived from the organization
+    name, so renames never touch it; the metadata placement is the only map
+    from organization to database.
+    """
+
+    layout = "database"
+
+    def assign(self, org_name: str) -> Placement:
+        return {
+            "layout": self.layout,
+            "database": f"{TENANT_DATABASE_PREFIX}{uuid.uuid4().hex[:24]}",
+            "collection": TENANT_DATABASE_COLLECTION,
+        }
+
+    async def provision(self, org_name: str, placement: Placement) -> None:
+        await self.manager.provision_collection(self.scope(placement).collection)
+
+    async def drop(self, placement: Placement) -> None:
+        await self.manager.client.drop_database(placement["database"])
+
+
+PLACEMENTS = {
+    strategy.layout: strategy for strategy in (CollectionPerTenant, SharedCollection, DatabasePerTenant)
+}
@@ -0,0 +1,377 @@
+import functools
+import os
+import re
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from math import ceil, floor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError
+from slowapi import Limiter
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+BUCKETS_COLLECTION = "rate_limits"
+WORKERS_COLLECTION = "rate_limit_workers"
+SCHEME_PREFIX = "counters+"
+
+
+def _as_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+@dataclass
+class _Bucket:
+    """Local view of one window's counter."""
+
+    key: str
+    limit: int
+    expiry: int
+    expire_at: float
+    count: int = 0  # Global count, admitted plus leased, as of refreshed_at
+    refreshed_at: float = 0.0
+    lease: int = 0  # Hits reserved in the global count but not yet admitted here
+    idle: bool = True  # No hits admitted from the lease since the last sync
+
+
+class MongoCounterStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Rate limit counters shared by every worker and replica through MongoDB.
+
+    Each window of each limit is one document in `rate_limits`
+    (`{_id: "<key>/<window>", count, expireAt}`), incremented with `$inc` and
+    dropped by a TTL index once the next window no longer needs it.
+
+    Registered as `counters+mongodb://` / `counters+mongodb+srv://`; the rest
+    of the URI is handed to pymongo. limits storages are synchronous, so this
+    uses its own small synchronous client, and OffloadedLimiter makes every
+    call to it on a worker thread rather than the event loop.
+
+    With `sync_interval` > 0 (sliding-window-counter only) workers lease
+    quota instead of counting every hit: one `$inc` reserves
+    `floor(remaining / live workers)` hits in the shared counter and later
+    hits are admitted locally until the lease is used up. Since leases are
+    reserved before they are used, the global limit is never exceeded. A
+    background thread returns the leases of idle workers and refreshes the
+    number of live workers every interval, so capacity is under-used by at
+    most the idle leases, for at most one interval.
+    """
+
+    STORAGE_SCHEME = [f"{SCHEME_PREFIX}mongodb", f"{SCHEME_PREFIX}mongodb+srv"]
+
+    def __init__(
+        self,
+        uri: str,
+        database_name: str = "master_metadata",
+        sync_interval: float = 0,
+        wrap_exceptions: bool = False,
+        client: Optional[Any] = None,
+        **options: Any,
+    ):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions)
+        self.client = client or MongoClient(uri[len(SCHEME_PREFIX):], **options)
+        database = self.client[database_name]
+        self.buckets = database[BUCKETS_COLLECTION]
+        self.workers = database[WORKERS_COLLECTION]
+        self.sync_interval = float(sync_interval)
+        # How long a local count may be trusted to reject a hit without a round trip
+        self.stale_after = max(1.0, self.sync_interval)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.live_workers = 1
+        self.round_trips = 0
+        self._registered = False
+        self._local: Dict[str, _Bucket] = {}
+        self._fixed_expiry: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sync_thread: Optional[threading.Thread] = None
+
+    @property
+    def base_exceptions(self):
+        return PyMongoError
+
+    @property
+    def batched(self) -> bool:
+        return self.sync_interval > 0
+
+    # Sliding window counter
+
+    @staticmethod
+    def _window_end(bucket_id: str, expiry: int) -> float:
+        return (int(bucket_id.rsplit("/", 1)[1]) + 1) * expiry
+
+    def _local_bucket(self, bucket_id: str, key: str, limit: int, expiry: int) -> _Bucket:
+        bucket = self._local.get(bucket_id)
+        if bucket is None:
+            # Kept until the following window no longer weighs it in
+            expire_at = self._window_end(bucket_id, expiry) + expiry
+            bucket = self._local[bucket_id] = _Bucket(key=key, limit=limit, expiry=expiry, expire_at=expire_at)
+        bucket.limit = limit
+        return bucket
+
+    @staticmethod
+    def _weighted(previous_count: int, current_count: int, expiry: int, now: float) -> float:
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        return previous_count * previous_ttl / expiry + current_count
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_id, current_id = self.sliding_window_keys(key, expiry, now)
+        with self._lock:
+            current = self._local_bucket(current_id, key, limit, expiry)
+            if current.lease >= amount:
+                current.lease -= amount
+                current.idle = False
+                self._ensure_sync_thread()
+                return True
+            previous = self._local.get(previous_id)
+            fresh = previous is not None and now - min(previous.refreshed_at, current.refreshed_at) < self.stale_after
+            if fresh and self._weighted(previous.count, current.count, expiry, now) + amount > limit:
+                # Already over the limit as of a recent round trip
+                return False
+        return self._reserve(key, limit, expiry, amount, now, previous_id, current_id)
+
+    def _reserve(
+        self, key: str, limit: int, expiry: int, amount: int, now: float, previous_id: str, current_id: str
+    ) -> bool:
+        """Add `amount` (or a lease, when batched) to the shared counter, giving back what is over the limit."""
+        if self.batched and not self._registered:
+            # Count the other workers before taking the first lease
+            self.live_workers = max(1, self._heartbeat(now))
+            self._registered = True
+
+        previous = self._local.get(previous_id)
+        if previous is None or now - previous.refreshed_at >= self.stale_after:
+            # The previous window only changes when leases on it are returned
+            previous_doc = self.buckets.find_one({"_id": previous_id}, {"count": 1})
+            self.round_trips += 1
+            with self._lock:
+                previous = self._local_bucket(previous_id, key, limit, expiry)
+                previous.count = previous_doc["count"] if previous_doc else 0
+                previous.refreshed_at = now
+
+        with self._lock:
+            current = self._local_bucket(current_id, key, limit, expiry)
+            block = amount
+            if self.batched:
+                remaining = limit - self._weighted(previous.count, current.count, expiry, now)
+                block = max(amount, floor(remaining / self.live_workers))
+
+        doc = self.buckets.find_one_and_update(
+            {"_id": current_id},
+            {"$inc": {"count": block}, "$setOnInsert": {"expireAt": _as_datetime(current.expire_at)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        self.round_trips += 1
+
+        with self._lock:
+            current.count = doc["count"]
+            current.refreshed_at = now
+            excess = min(block, max(0, ceil(self._weighted(previous.count, current.count, expiry, now) - limit)))
+            granted = block - excess
+            admitted = granted >= amount
+            give_back = excess if admitted else block
+            current.count -= give_back
+            if admitted:
+                current.lease += granted - amount
+                current.idle = False
+        if give_back:
+            self.buckets.update_one({"_id": current_id}, {"$inc": {"count": -give_back}})
+            self.round_trips += 1
+        return admitted
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        now = time.time()
+        previous_id, current_id = self.sliding_window_keys(key, expiry, now)
+        with self._lock:
+            previous = self._local.get(previous_id)
+            current = self._local.get(current_id)
+            if previous is not None and current is not None:
+                # Leased hits count as used here; good enough for headers
+                previous_count, current_count = previous.count, current.count
+        if previous is None or current is None:
+            counts = {
+                doc["_id"]: doc["count"]
+                for doc in self.buckets.find({"_id": {"$in": [previous_id, current_id]}}, {"count": 1})
+            }
+            previous_count, current_count = counts.get(previous_id, 0), counts.get(current_id, 0)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        bucket_ids = list(self.sliding_window_keys(key, expiry, time.time()))
+        with self._lock:
+            for bucket_id in bucket_ids:
+                self._local.pop(bucket_id, None)
+        self.buckets.delete_many({"_id": {"$in": bucket_ids}})
+
+    # Leases
+
+    def _heartbeat(self, now: float) -> int:
+        """Mark this worker live and return the number of live workers."""
+        self.workers.update_one(
+            {"_id": self.owner},
+            {"$set": {"expireAt": _as_datetime(now + max(5.0, 5 * self.sync_interval))}},
+            upsert=True,
+        )
+        self.round_trips += 2
+        return self.workers.count_documents({"expireAt": {"$gt": _as_datetime(now)}})
+
+    def _ensure_sync_thread(self) -> None:
+        # Started on first use rather than at import, so that it runs in the
+        # worker process and not in a parent that forks workers.
+        if self._sync_thread is None and not self._stop.is_set():
+            self._sync_thread = threading.Thread(target=self._sync_loop, name="rate-limit-sync", daemon=True)
+            self._sync_thread.start()
+
+    def _sync_loop(self) -> None:
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except PyMongoError as e:
+                logger.warning("Rate limit lease sync failed: %s", e)
+
+    def _release(self, releases: List[Tuple[str, int]]) -> None:
+        if releases:
+            self.buckets.bulk_write(
+                [UpdateOne({"_id": bucket_id}, {"$inc": {"count": -lease}}) for bucket_id, lease in releases],
+                ordered=False,
+            )
+            self.round_trips += 1
+
+    def sync(self, release_all: bool = False) -> None:
+        """Return idle or outdated leases and refresh the number of live workers."""
+        now = time.time()
+        releases: List[Tuple[str, int]] = []
+        with self._lock:
+            for bucket_id in [b for b, bucket in self._local.items() if bucket.expire_at <= now]:
+                del self._local[bucket_id]
+            for bucket_id, bucket in self._local.items():
+                current_id = self.sliding_window_keys(bucket.key, bucket.expiry, now)[1]
+                if bucket.lease and (release_all or bucket.idle or bucket_id != current_id):
+                    releases.append((bucket_id, bucket.lease))
+                    bucket.count -= bucket.lease
+                    bucket.lease = 0
+                bucket.idle = True
+
+        # A failed release leaves the hits counted, which only under-admits
+        self._release(releases)
+        if not release_all:
+            live_workers = self._heartbeat(now)
+            with self._lock:
+                self.live_workers = max(1, live_workers)
+
+    def close(self) -> None:
+        """Stop the sync thread and return outstanding leases."""
+        self._stop.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join()
+            self._sync_thread = None
+        try:
+            self.sync(release_all=True)
+            if self._registered:
+                self.workers.delete_one({"_id": self.owner})
+        except PyMongoError as e:
+            logger.warning("Failed to return rate limit leases: %s", e)
+
+    # Fixed window (always a round trip per hit)
+
+    def _fixed_bucket_id(self, key: str, expiry: int, now: float) -> str:
+        return f"{key}/{int(now / expiry)}"
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = time.time()
+        self._fixed_expiry[key] = expiry
+        bucket_id = self._fixed_bucket_id(key, expiry, now)
+        doc = self.buckets.find_one_and_update(
+            {"_id": bucket_id},
+            {"$inc": {"count": amount}, "$setOnInsert": {"expireAt": _as_datetime(self._window_end(bucket_id, expiry))}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        self.round_trips += 1
+        return doc["count"]
+
+    def get(self, key: str) -> int:
+        expiry = self._fixed_expiry.get(key)
+        if expiry is None:
+            return 0
+        doc = self.buckets.find_one({"_id": self._fixed_bucket_id(key, expiry, time.time())}, {"count": 1})
+        return doc["count"] if doc else 0
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        expiry = self._fixed_expiry.get(key)
+        if expiry is None:
+            return now
+        return self._window_end(self._fixed_bucket_id(key, expiry, now), expiry)
+
+    # Maintenance
+
+    def check(self) -> bool:
+        try:
+            self.client.admin.command("ping")
+            return True
+        except PyMongoError:
+            return False
+
+    def reset(self) -> Optional[int]:
+        with self._lock:
+            self._local.clear()
+        return self.buckets.delete_many({}).deleted_count
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            for bucket_id in [b for b in self._local if b.startswith(f"{key}/")]:
+                del self._local[bucket_id]
+        self.buckets.delete_many({"_id": {"$regex": f"^{re.escape(key)}/"}})
+
+
+class OffloadedLimiter(Limiter):
+    """
+    slowapi's Limiter for storages that do I/O: the limit check and the
+    X-RateLimit-* header lookup of each request run on Starlette's thread
+    pool instead of blocking the event loop (slowapi calls both inline).
+
+    Endpoints keep slowapi's signature rules: `request` and, for headers,
+    `response` parameters.
+    """
+
+    def limit(self, *args: Any, **kwargs: Any) -> Callable[[Callable], Callable]:
+        register = super().limit(*args, **kwargs)
+
+        def decorator(endpoint: Callable) -> Callable:
+            # Records the route's limits; slowapi's own wrapper is not used
+            register(endpoint)
+
+            @functools.wraps(endpoint)
+            async def limited(**params: Any) -> Any:
+                request = params["request"]
+                if self.enabled:
+                    await run_in_threadpool(self._check_request_limit, request, endpoint, False)
+                result = await endpoint(**params)
+                if self.enabled:
+                    response = result if isinstance(result, Response) else params.get("response")
+                    await run_in_threadpool(
+                        self._inject_headers, response, getattr(request.state, "view_rate_limit", None)
+                    )
+                return result
+
+            return limited
+
+        return decorator
@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import json
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+NAMESPACE_EXISTS = 48
+# Longest a refill may take before another process can start one
+REFILL_LEASE_SECONDS = 60
+
+
+class SpareCollectionPool:
+    """
+    Empty tenant collections created ahead of time.
+
+    Tenant data must live in `org_<name>`, so a spare is claimed by renaming
+    it into place. That is one metadata-only renameCollection instead of a
+    create plus one index build per tenant index, and it doubles as the
+    claim lock: when two workers race for the same spare, one rename fails
+    and that worker moves on to the next one.
+
+    Spares are named `spare_tenant_<tag>_<id>`, where the tag is a digest of
+    the tenant collection options and indexes; changing the layout retires
+    old spares instead of handing them out.
+
+    `size` is the number of spares in the database, not per process: a
+    refill holds the `tenant-spares` lease, so the workers and replicas
+    sharing the database never refill at the same time, and it drops any
+    spares beyond `size`.
+    """
+
+    PREFIX = "spare_tenant_"
+
+    def __init__(self, manager: Any, size: int):
+        self.manager = manager
+        self.size = size
+        self.claimed = 0
+        self.misses = 0
+        self._known: Deque[str] = deque()
+        self._refill_task: Optional[asyncio.Task] = None
+        self._lease = None
+
+    @property
+    def tag(self) -> str:
+        layout = {
+            "options": self.manager.tenant_collection_options(),
+            "indexes": [index.document for index in self.manager.tenant_indexes()],
+        }
+        return hashlib.sha1(json.dumps(layout, sort_keys=True, default=str).encode()).hexdigest()[:8]
+
+    async def _list_spares(self) -> List[str]:
+        database = self.manager.get_master_database()
+        return await database.list_collection_names(filter={"name": {"$regex": f"^{self.PREFIX}"}})
+
+    async def claim(self, collection_name: str) -> Optional[AsyncIOMotorCollection]:
+        """Rename a spare to collection_name, or return None if there is none to take."""
+        if self.size <= 0:
+            return None
+        database = self.manager.get_master_database()
+        try:
+            if not self._known:
+                current = f"{self.PREFIX}{self.tag}_"
+                self._known.extend(name for name in await self._list_spares() if name.startswith(current))
+
+            while self._known:
+                spare = self._known.popleft()
+                try:
+                    await database[spare].rename(collection_name)
+                except OperationFailure as e:
+                    if e.code == NAMESPACE_EXISTS:
+                        # The tenant collection is already there; keep the spare
+                        self._known.appendleft(spare)
+                        return None
+                    continue  # Claimed by another worker
+                self.claimed += 1
+                return database[collection_name]
+        except PyMongoError as e:
+            logger.warning("Could not claim a spare collection for '%s': %s", collection_name, e)
+        finally:
+            self.schedule_refill()
+
+        self.misses += 1
+        return None
+
+    def schedule_refill(self) -> None:
+        """Top the pool up in the background."""
+        if self.size > 0 and (self._refill_task is None or self._refill_task.done()):
+            self._refill_task = asyncio.create_task(self.refill())
+
+    async def refill(self) -> int:
+        """
+        Create spares until `size` exist, dropping extras and spares with an
+        outdated layout; does nothing while another process is refilling.
+        """
+        if self._lease is None:
+            from app.db.leader import LeaderLease  # app.db.leader imports the manager
+
+            self._lease = LeaderLease("tenant-spares", REFILL_LEASE_SECONDS)
+        database = self.manager.get_master_database()
+        current = f"{self.PREFIX}{self.tag}_"
+        created = 0
+        try:
+            if not await self._lease.acquire():
+                return 0
+            try:
+                names = await self._list_spares()
+                spares = [name for name in names if name.startswith(current)]
+                for extra in [name for name in names if not name.startswith(current)] + spares[self.size:]:
+                    await database[extra].drop()
+                spares = spares[:self.size]
+                for _ in range(self.size - len(spares)):
+                    name = f"{current}{uuid.uuid4().hex[:12]}"
+                    await self.manager.provision_collection(database[name])
+                    spares.append(name)
+                    created += 1
+            finally:
+                await self._lease.release()
+        except PyMongoError as e:
+            logger.warning("Refilling spare tenant collections failed: %s", e)
+            return created
+        self._known = deque(spares)
+        if created:
+            logger.info("Provisioned %s spare tenant collection(s)", created)
+        return created
+
+    async def stop(self) -> None:
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            await asyncio.gather(self._refill_task, return_exceptions=True)
+            self._refill_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": self.size, "known": len(self._known), "claimed": self.claimed, "misses": self.misses}
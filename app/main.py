@@ -1,16 +1,170 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import math
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from typing import Awaitable
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pymongo.errors import PyMongoError
 from app.db.mongodb import db
+from app.db.indexes import ensure_indexes, schema_digest, verify_query_plans
+from app.db.leader import LeaderLease
+from app.core.admission import AdmissionRejectedError
 from app.core.config import settings
+from app.core.hashing import HasherOverloadedError, password_hasher
+from app.core.logging import get_logger, setup_logging, shutdown_logging
+from app.core.metrics import METRICS_PATH, MetricsMiddleware, metrics
+from app.core.rate_limit import close_rate_limit_storage
+from app.core.request_context import RequestContextMiddleware
+from app.core.startup import StartupTimer
+from app.db.org_cache import org_cache
+from app.models.job import JobType
+from app.services.job_service import job_runner
+from app.services.migration_service import TenantMigrationService
+from app.services.org_service import OrganizationService
+from app.services.event_service import org_events
+from app.services.recovery_service import reconciler
+from app.services.summary_service import tenant_summary_feed
+
+logger = get_logger(__name__)
+
+# Shared by every worker and replica running the same index definitions
+startup_lease = LeaderLease(f"startup-{schema_digest()}", settings.STARTUP_LEADER_LEASE_SECONDS)
+STARTUP_CHECKS_POLL_SECONDS = 1.0
+
+job_runner.register(JobType.RENAME, OrganizationService.perform_rename)
+job_runner.register(JobType.DELETE, OrganizationService.perform_delete)
+
+async def check_database(timer: StartupTimer) -> None:
+    """Ensure indexes, verify the hot query plans and report interrupted migrations."""
+    if settings.DB_ENSURE_INDEXES:
+        with timer.phase("db.ensure_indexes"):
+            await ensure_indexes()
+    if settings.DB_VERIFY_QUERY_PLANS:
+        with timer.phase("db.verify_query_plans"):
+            await verify_query_plans()
+    for checkpoint in await TenantMigrationService.list_interrupted():
+        logger.warning(
+            "Interrupted migration %s (%s documents copied); it resumes when the rename is retried",
+            checkpoint["_id"],
+            checkpoint["copied"],
+        )
+
+
+async def configure_hashing(timer: StartupTimer) -> None:
+    """Apply BCRYPT_ROUNDS, or calibrate the cost to this machine."""
+    with timer.phase("hash.calibrate"):
+        if settings.BCRYPT_ROUNDS is not None:
+            password_hasher.set_rounds(settings.BCRYPT_ROUNDS)
+        else:
+            await password_hasher.calibrate(
+                settings.BCRYPT_TARGET_MS, settings.BCRYPT_MIN_ROUNDS, settings.BCRYPT_MAX_ROUNDS
+            )
+
+
+async def _keep_lease(lease: LeaderLease) -> None:
+    """Renew a lease until cancelled, so slow checks are not taken over halfway."""
+    while True:
+        await asyncio.sleep(lease.ttl_seconds / 3)
+        try:
+            if not await lease.acquire():
+                logger.warning("Lost the startup lease '%s' during the checks", lease.name)
+        except PyMongoError as e:
+            logger.warning("Could not renew the startup lease: %s", e)
+
+
+async def lead_startup_checks(lease: LeaderLease, timer: StartupTimer) -> None:
+    """Run the checks while holding the startup lease and record them done for this schema."""
+    renewal = asyncio.create_task(_keep_lease(lease))
+    try:
+        await check_database(timer)
+        await lease.finish()
+    except BaseException:
+        # Another process takes over now rather than when the lease lapses
+        try:
+            await lease.release()
+        except PyMongoError as e:
+            logger.warning("Could not release the startup lease: %s", e)
+        raise
+    finally:
+        renewal.cancel()
+
+
+async def await_startup_checks(lease: LeaderLease, timer: StartupTimer) -> None:
+    """Wait until the checks for this schema are recorded done, taking them over if their leader gives up."""
+    while not await lease.finished():
+        if await lease.acquire():
+            logger.info("Taking over the startup checks (lease '%s')", lease.name)
+            await lead_startup_checks(lease, timer)
+            return
+        await asyncio.sleep(STARTUP_CHECKS_POLL_SECONDS)
+
+
+async def _check_database_in_background(checks: Awaitable[None]) -> None:
+    try:
+        await checks
+    except Exception as e:
+        logger.error("Background database checks failed: %s", e)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    await db.connect()
+    setup_logging()
+    timer = StartupTimer(_IMPORT_STARTED, _IMPORT_FINISHED)
+    with timer.phase("db.connect"):
+        await db.connect()
+    password_hasher.start()
+    # Index checks, opening the cache's invalidation channel and bcrypt
+    # calibration are independent; DB_STARTUP_CHECKS=background serves
+    # requests before the index checks finish. With STARTUP_LEADER_LOCK only
+    # the process holding the startup lease runs the checks and reconciliation;
+    # the others wait until it has recorded them done for this schema.
+    background_checks = None
+    with timer.phase("db.checks"):
+        if not settings.STARTUP_LEADER_LOCK:
+            leader, checks = True, check_database(timer)
+        elif await startup_lease.acquire():
+            leader, checks = True, lead_startup_checks(startup_lease, timer)
+        else:
+            logger.info("Startup checks are run by another process (lease '%s')", startup_lease.name)
+            leader, checks = False, await_startup_checks(startup_lease, timer)
+        if settings.DB_STARTUP_CHECKS == "blocking":
+            await asyncio.gather(checks, org_cache.start(), configure_hashing(timer))
+        else:
+            background_checks = asyncio.create_task(_check_database_in_background(checks))
+            await asyncio.gather(org_cache.start(), configure_hashing(timer))
+    if settings.TENANT_PLACEMENT == "collection" and leader:
+        # One process tops the shared pool up; claims refill it from any worker
+        db.spares.schedule_refill()
+    if settings.JOB_RUNNER_ENABLED:
+        await job_runner.start()
+    if settings.RECONCILE_ON_STARTUP and leader:
+        reconciler.schedule()
+    if settings.TENANT_SUMMARIES_ENABLED:
+        if db.replicated:
+            tenant_summary_feed.start()
+        else:
+            logger.warning("TENANT_SUMMARIES_ENABLED needs a replica set or sharded cluster; summaries are scanned")
+    timer.report()
     yield
     # Shutdown
+    if background_checks is not None:
+        background_checks.cancel()
+        await asyncio.gather(background_checks, return_exceptions=True)
+    await reconciler.stop()
+    await org_events.stop()
+    await tenant_summary_feed.stop()
+    await job_runner.stop()
+    close_rate_limit_storage()
+    await org_cache.stop()
+    password_hasher.shutdown()
     await db.close()
+    shutdown_logging()
 
 
 tags_metadata = [
@@ -24,8 +178,6 @@ tags_metadata = [
     },
 ]
 
-from scalar_fastapi import get_scalar_api_reference
-
 app = FastAPI(
     title="Multi-tenant Org Service",
     description="""
@@ -52,14 +204,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+app.add_middleware(RequestContextMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from app.core.rate_limit import limiter
+from app.core.rate_limit import limiter, rate_limit_exceeded_handler
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+if settings.RATE_LIMIT_ENABLED:
+    from slowapi.errors import RateLimitExceeded
+
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+
+@app.exception_handler(HasherOverloadedError)
+async def hasher_overloaded_handler(request: Request, exc: HasherOverloadedError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(AdmissionRejectedError)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejectedError):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
 
 from app.api.v1.org import router as org_router
 from app.api.v1.auth import router as auth_router
@@ -67,13 +240,24 @@ from app.api.v1.auth import router as auth_router
 app.include_router(org_router, prefix="/api/v1/org", tags=["Organization"])
 app.include_router(auth_router, prefix="/api/v1/admin", tags=["Authentication"])
 
-@app.get("/docs", include_in_schema=False)
-async def scalar_html():
-    return get_scalar_api_reference(
-        openapi_url=app.openapi_url,
-        title=app.title,
-    )
+if settings.DOCS_ENABLED:
+    @app.get("/docs", include_in_schema=False)
+    async def scalar_html():
+        # Imported on first use; the docs UI is not needed to serve the API
+        from scalar_fastapi import get_scalar_api_reference
+
+        return get_scalar_api_reference(
+            openapi_url=app.openapi_url,
+            title=app.title,
+        )
+
+if settings.METRICS_ENABLED:
+    @app.get(METRICS_PATH, include_in_schema=False)
+    async def prometheus_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/", include_in_schema=False)
 async def root():
     return {"message": "Welcome to the Multi-tenant Organization Management Service"}
+
+_IMPORT_FINISHED = time.perf_counter()
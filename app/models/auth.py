@@ -11,3 +11,4 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: str | None = None
     org_name: str | None = None
+    org_id: str | None = None
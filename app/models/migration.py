@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class MigrationProgress(BaseModel):
+    source: str
+    target: str
+    strategy: str
+    copied: int = 0
+    total: int = 0
+    batches: int = 0
+    resumed: bool = False
@@ -1,5 +1,10 @@
+from datetime import datetime
+from typing import List, Literal, Optional
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 
+# Set on an organization's metadata while its delete job is pending
+ORG_STATUS_DELETING = "deleting"
+
 class OrgCreate(BaseModel):
     organization_name: str = Field(..., min_length=1, description="Name of the organization")
     email: EmailStr = Field(..., description="Admin email for the organization")
@@ -15,3 +20,53 @@ class OrgResponse(BaseModel):
     collection_name: str
     
     model_config = ConfigDict(from_attributes=True)
+
+class OrgSummary(BaseModel):
+    """An organization as listed by /org/list."""
+    organization_name: str
+    collection_name: str
+    created_at: Optional[datetime] = None
+
+class OrgPage(BaseModel):
+    """
+    One page of organizations. Pass `next_cursor` back as `cursor` for the
+    next page; it is null on the last one.
+    """
+    items: List[OrgSummary]
+    next_cursor: Optional[str] = None
+    approximate_total: Optional[int] = None
+
+class BulkCreateResult(BaseModel):
+    """One line of a bulk create response, for the NDJSON record on `line`."""
+    line: int
+    status: Literal["created", "failed"]
+    organization_name: Optional[str] = None
+    collection_name: Optional[str] = None
+    error: Optional[str] = None
+
+class TenantDataSummary(BaseModel):
+    """Size of an organization's data, as returned by /org/summary."""
+    organization_name: str
+    documents: int = 0
+    approximate_bytes: int = 0
+    last_write_at: Optional[datetime] = None
+
+OrgEventType = Literal["created", "updated", "renamed", "deleting", "deleted"]
+
+class OrgEvent(BaseModel):
+    """
+    An organization lifecycle change, the data of one /org/events message.
+    `id` is the organization's id; deleted events carry only that.
+    """
+    type: OrgEventType
+    id: str
+    organization_name: Optional[str] = None
+    collection_name: Optional[str] = None
+    at: Optional[datetime] = None
+
+class TenantImportResult(BaseModel):
+    """Outcome of /org/import. `error` is the first rejection, if any."""
+    inserted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    error: Optional[str] = None
@@ -0,0 +1,104 @@
+"""
+Production launcher: `python -m app.serve`.
+
+Runs uvicorn with one worker process per available core (WEB_CONCURRENCY
+or --workers to override) and computes, once, the settings every worker
+then shares through its environment:
+
+- MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE, HASH_POOL_SIZE and
+  HASH_MAX_PENDING are per-instance budgets, divided across the workers.
+- RATE_LIMIT_STORAGE is left as configured. With memory counters every
+  worker has its own quota, which is logged as a warning; set mongodb
+  with the batched sliding-window-counter strategy to share them.
+- The bcrypt cost is calibrated here instead of in every worker.
+
+Startup work that touches shared state (index and query plan checks,
+reconciliation) is deduplicated by the workers themselves through the
+startup lease (STARTUP_LEADER_LOCK), which also covers other replicas.
+"""
+import argparse
+import asyncio
+import math
+import os
+from typing import Dict, Optional
+
+from app.core.config import Settings, settings
+from app.core.logging import get_logger, setup_logging, shutdown_logging
+
+logger = get_logger(__name__)
+
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+
+
+def available_cores(cpu_max_path: str = CGROUP_CPU_MAX) -> int:
+    """CPUs this process may run on: its affinity mask, capped by a cgroup v2 CPU quota."""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open(cpu_max_path) as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def worker_environment(config: Settings, workers: int, cores: int) -> Dict[str, str]:
+    """Settings overrides that split one instance's budgets across `workers` processes."""
+    env = {"WEB_CONCURRENCY": str(workers)}
+    if workers > 1:
+        env["MONGO_MAX_POOL_SIZE"] = str(max(1, math.ceil(config.MONGO_MAX_POOL_SIZE / workers)))
+        env["MONGO_MIN_POOL_SIZE"] = str(config.MONGO_MIN_POOL_SIZE // workers)
+        env["HASH_POOL_SIZE"] = str(max(1, (config.HASH_POOL_SIZE or cores) // workers))
+        env["HASH_MAX_PENDING"] = str(max(1, config.HASH_MAX_PENDING // workers))
+    return env
+
+
+async def _calibrate_bcrypt() -> int:
+    from app.core.hashing import PasswordHasher
+
+    hasher = PasswordHasher(kind="thread", max_workers=1)
+    try:
+        return await hasher.calibrate(settings.BCRYPT_TARGET_MS, settings.BCRYPT_MIN_ROUNDS, settings.BCRYPT_MAX_ROUNDS)
+    finally:
+        hasher.shutdown()
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the app with one worker process per core.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8080)))
+    parser.add_argument("--workers", type=int, default=None, help="Default: WEB_CONCURRENCY, else the available cores")
+    parser.add_argument("--app", default="app.main:app", help="Import string of the ASGI app")
+    parser.add_argument("--factory", action="store_true", help="--app names a function returning the app")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    cores = available_cores()
+    workers = args.workers or settings.WEB_CONCURRENCY or cores
+    env = worker_environment(settings, workers, cores)
+    if settings.BCRYPT_ROUNDS is None:
+        env["BCRYPT_ROUNDS"] = str(asyncio.run(_calibrate_bcrypt()))
+    if workers > 1 and settings.ORG_CACHE_INVALIDATION == "local":
+        logger.warning(
+            "ORG_CACHE_INVALIDATION=local with %s workers: a worker's cache can serve changed organizations "
+            "for up to ORG_CACHE_TTL_SECONDS; use change_stream on a replica set",
+            workers,
+        )
+    if workers > 1 and settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_STORAGE == "memory":
+        logger.warning(
+            "RATE_LIMIT_STORAGE=memory with %s workers: each worker enforces the limits on its own; use "
+            "RATE_LIMIT_STORAGE=mongodb with RATE_LIMIT_STRATEGY=sliding-window-counter to share them",
+            workers,
+        )
+    os.environ.update(env)
+    logger.info("Serving on %s:%s with %s workers (%s cores)", args.host, args.port, workers, cores, extra={"env": env})
+    shutdown_logging()
+
+    import uvicorn
+
+    uvicorn.run(args.app, host=args.host, port=args.port, workers=workers, factory=args.factory)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,95 @@
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Optional
 from fastapi import HTTPException, status
-from jose import jwt
-from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.hashing import HasherOverloadedError, password_hasher
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.core.request_context import span
+from app.core.tokens import token_verifier
 from app.db.mongodb import db
+from app.db.org_cache import org_cache
 from app.models.auth import AdminLogin
+from app.models.org import ORG_STATUS_DELETING
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = get_logger(__name__)
+
+admin_logins = metrics.counter("admin_logins_total", "Admin login attempts by outcome", ("outcome",))
+password_rehashes = metrics.counter("password_rehashes_total", "Stored hashes upgraded to the current policy on login")
 
 class AuthService:
     
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """Verify a password against a hash."""
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against a hash on the hashing worker pool."""
+        with span("verify_password"):
+            return await password_hasher.verify(plain_password, hashed_password)
+
+    @staticmethod
+    async def get_password_hash(password: str) -> str:
+        """Hash a password on the hashing worker pool."""
+        with span("hash_password"):
+            return await password_hasher.hash(password)
 
     @staticmethod
-    def get_password_hash(password: str) -> str:
-        """Hash a password."""
-        return pwd_context.hash(password)
+    async def rehash_password(org: Dict[str, Any], plain_password: str) -> None:
+        """
+        Store a hash at the current cost for an admin who just logged in.
+
+        The update only applies if the stored hash is still the one that was
+        verified, so a concurrent password change wins. A full hashing queue
+        skips the rehash; the next login retries it.
+        """
+        try:
+            hashed_password = await AuthService.get_password_hash(plain_password)
+        except HasherOverloadedError:
+            return
+        with span("db.rehash_password"):
+            async with db.causal_session() as session:
+                result = await db.get_master_database()["organizations"].update_one(
+                    {"_id": org["_id"], "hashed_password": org["hashed_password"]},
+                    {"$set": {"hashed_password": hashed_password}},
+                    session=session,
+                )
+        if result.modified_count:
+            password_rehashes.inc()
+            await org_cache.invalidate(names=[org["organization_name"]], emails=[org["admin_email"]])
+            logger.info("Rehashed password of '%s' at the current cost", org["organization_name"])
 
     @staticmethod
     async def authenticate_admin(login_data: AdminLogin) -> Dict[str, Any]:
         """
         Authenticate an admin by email and password.
         Returns the organization document if successful.
+
+        Unknown emails cost a dummy verification, so they take as long as a
+        wrong password. Hashes below the current cost are upgraded.
         """
-        master_db = db.get_master_database()
-        org = await master_db["organizations"].find_one({"admin_email": login_data.email})
+        with span("db.find_org"):
+            org = await org_cache.get_by_email(login_data.email)
         
-        if not org:
+        if not org or org.get("status") == ORG_STATUS_DELETING:
+            with span("verify_password"):
+                await password_hasher.verify_dummy(login_data.password)
+            admin_logins.labels("unknown_admin").inc()
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
             
-        if not AuthService.verify_password(login_data.password, org["hashed_password"]):
+        if not await AuthService.verify_password(login_data.password, org["hashed_password"]):
+             admin_logins.labels("wrong_password").inc()
              raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
             
+        if password_hasher.needs_rehash(org["hashed_password"]):
+            await AuthService.rehash_password(org, login_data.password)
+
+        admin_logins.labels("success").inc()
         return org
 
     @staticmethod
@@ -67,5 +113,5 @@ class AuthService:
             expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        encoded_jwt = token_verifier.encode(to_encode)
         return encoded_jwt
@@ -0,0 +1,160 @@
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+from pymongo.errors import PyMongoError
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import MetricsRegistry, metrics
+from app.db.mongodb import db
+from app.models.org import ORG_STATUS_DELETING, OrgEvent
+
+logger = get_logger(__name__)
+
+# Only these fields of `organizations` leave the server
+EVENT_PIPELINE = [
+    {"$project": {
+        "operationType": 1,
+        "documentKey": 1,
+        "wallTime": 1,
+        "fullDocument.organization_name": 1,
+        "fullDocument.collection_name": 1,
+        "updateDescription.updatedFields.organization_name": 1,
+        "updateDescription.updatedFields.status": 1,
+    }},
+]
+
+# Sent instead of the missed events to a client that fell too far behind
+RESET_FRAME = "event: reset\ndata: {}\n\n"
+
+
+def to_event(change: Dict[str, Any]) -> Optional[OrgEvent]:
+    """The lifecycle event for a (projected) change to `organizations`."""
+    operation = change["operationType"]
+    updated = change.get("updateDescription", {}).get("updatedFields", {})
+    if operation == "insert":
+        event_type = "created"
+    elif operation == "delete":
+        event_type = "deleted"
+    elif updated.get("status") == ORG_STATUS_DELETING:
+        event_type = "deleting"
+    elif "organization_name" in updated:
+        event_type = "renamed"
+    elif operation in ("update", "replace"):
+        event_type = "updated"
+    else:
+        return None
+    document = change.get("fullDocument") or {}
+    return OrgEvent(
+        type=event_type,
+        id=str(change["documentKey"]["_id"]),
+        organization_name=document.get("organization_name"),
+        collection_name=document.get("collection_name"),
+        at=change.get("wallTime"),
+    )
+
+
+def frame(event_id: str, event: OrgEvent) -> str:
+    return f"id: {event_id}\nevent: {event.type}\ndata: {event.model_dump_json(exclude_none=True)}\n\n"
+
+
+class _Subscriber:
+    __slots__ = ("queue", "overflowed")
+
+    def __init__(self, size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.overflowed = False
+
+
+class OrgEventFeed:
+    """
+    Organization lifecycle events for /org/events, per process.
+
+    The first subscriber opens one change stream on `organizations` (with
+    the post-image, projected to the public fields); every event is fanned
+    out to the subscribers' queues. The last ORG_EVENTS_BUFFER events are
+    kept, so a client reconnecting with Last-Event-ID gets what it missed;
+    an id no longer in the buffer, or a client too slow to keep up, gets a
+    `reset` event and should list organizations again.
+    """
+
+    def __init__(self, buffer_size: int, keepalive_seconds: float):
+        self.keepalive_seconds = keepalive_seconds
+        self._buffer: Deque[Tuple[str, OrgEvent]] = deque(maxlen=buffer_size)
+        self._subscribers: Set[_Subscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, event_id: str, event: OrgEvent) -> None:
+        self._buffer.append((event_id, event))
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait((event_id, event))
+            except asyncio.QueueFull:
+                subscriber.overflowed = True
+                self._subscribers.discard(subscriber)
+
+    async def _watch(self) -> None:
+        resume_token = None
+        collection = db.get_master_database()["organizations"]
+        while True:
+            try:
+                async with collection.watch(
+                    EVENT_PIPELINE, full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    logger.info("Watching organization lifecycle events")
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        event = to_event(change)
+                        if event is not None:
+                            self.publish(change["_id"]["_data"], event)
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                logger.error("Organization event stream failed, retrying: %s", e)
+                await asyncio.sleep(1)
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Server-sent event frames, starting after last_event_id when given."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+        subscriber = _Subscriber(self._buffer.maxlen or 1)
+        self._subscribers.add(subscriber)
+        # Taken together with subscribing, so nothing is missed or repeated
+        ids = [event_id for event_id, _ in self._buffer]
+        missed = []
+        if last_event_id is not None:
+            if last_event_id in ids:
+                missed = list(self._buffer)[ids.index(last_event_id) + 1:]
+            else:
+                missed = None
+        try:
+            if missed is None:
+                yield RESET_FRAME
+            for event_id, event in missed or ():
+                yield frame(event_id, event)
+            while not subscriber.overflowed:
+                try:
+                    event_id, event = await asyncio.wait_for(subscriber.queue.get(), self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield frame(event_id, event)
+            yield RESET_FRAME
+        finally:
+            self._subscribers.discard(subscriber)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def register_metrics(self, registry: MetricsRegistry) -> None:
+        registry.register_callback(
+            "org_event_subscribers", "Clients connected to /org/events", lambda: len(self._subscribers)
+        )
+
+
+org_events = OrgEventFeed(settings.ORG_EVENTS_BUFFER, settings.ORG_EVENTS_KEEPALIVE_SECONDS)
+org_events.register_metrics(metrics)
@@ -0,0 +1,347 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.core.config import settings
+from app.core.logging import bind, get_logger
+from app.db.mongodb import db
+from app.models.job import JobResponse, JobStatus, JobType
+
+logger = get_logger(__name__)
+
+ProgressReporter = Callable[[Dict[str, Any]], Awaitable[None]]
+JobHandler = Callable[[Dict[str, Any], ProgressReporter], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class JobService:
+    """
+    Persistence for background jobs in `master_metadata.jobs`.
+
+    Jobs belong to the organization `_id` in `org_id`, which a later
+    organization of the same name does not share.
+
+    Only one queued or running job may exist per organization: `active_key`
+    holds the lowercased organization name while a job is active and is
+    covered by a unique sparse index. A rename also holds its target
+    collection name in `reserved_key` (unique as well) until it finishes.
+    """
+
+    COLLECTION = "jobs"
+
+    @staticmethod
+    def _jobs():
+        return db.get_master_database()[JobService.COLLECTION]
+
+    @staticmethod
+    def to_response(job: Dict[str, Any]) -> JobResponse:
+        return JobResponse(
+            job_id=job["_id"],
+            type=job["type"],
+            status=job["status"],
+            organization_name=job["organization_name"],
+            attempts=job.get("attempts", 0),
+            progress=job.get("progress"),
+            result=job.get("result"),
+            error=job.get("error"),
+            created_at=job["created_at"],
+            updated_at=job["updated_at"],
+        )
+
+    @staticmethod
+    async def enqueue(
+        job_type: JobType,
+        org_name: str,
+        payload: Dict[str, Any],
+        session: Optional[AsyncIOMotorClientSession] = None,
+        reserve: Optional[str] = None,
+    ) -> JobResponse:
+        """
+        Persist a new queued job (in session's transaction, if given) and wake the local runner.
+
+        reserve is a tenant collection name the job holds while it is active.
+        """
+        now = datetime.now(timezone.utc)
+        job = {
+            "_id": uuid.uuid4().hex,
+            "type": job_type.value,
+            "status": JobStatus.QUEUED.value,
+            "organization_name": org_name,
+            "org_id": payload.get("org_id"),
+            "active_key": org_name.lower(),
+            "payload": payload,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        if reserve is not None:
+            job["reserved_key"] = reserve
+        try:
+            await JobService._jobs().insert_one(job, session=session)
+        except DuplicateKeyError as e:
+            if "reserved_key" in (e.details or {}).get("keyPattern", {}):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="New organization name already exists"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Another operation is already in progress for this organization",
+            )
+        logger.info("Queued %s job %s for '%s'", job_type.value, job["_id"], org_name)
+        job_runner.notify()
+        return JobService.to_response(job)
+
+    @staticmethod
+    async def has_active_job(org_name: str) -> bool:
+        return await JobService._jobs().find_one({"active_key": org_name.lower()}, {"_id": 1}) is not None
+
+    @staticmethod
+    async def reserved(collection_names: List[str]) -> Set[str]:
+        """Those of collection_names held by active renames."""
+        cursor = JobService._jobs().find({"reserved_key": {"$in": collection_names}}, {"reserved_key": 1})
+        return {job["reserved_key"] async for job in cursor}
+
+    @staticmethod
+    async def get_job(job_id: str, org_id: ObjectId) -> Optional[Dict[str, Any]]:
+        """The job, if it belongs to the organization org_id."""
+        return await JobService._jobs().find_one({"_id": job_id, "org_id": org_id}, {"payload": 0})
+
+    @staticmethod
+    async def claim(job_types: List[str], owner: str) -> Optional[Dict[str, Any]]:
+        """Atomically lease the oldest runnable job of one of job_types."""
+        now = datetime.now(timezone.utc)
+        return await JobService._jobs().find_one_and_update(
+            {
+                "type": {"$in": job_types},
+                "attempts": {"$lt": settings.JOB_MAX_ATTEMPTS},
+                "$or": [
+                    {"status": JobStatus.QUEUED.value},
+                    # A running job whose lease lapsed belongs to a dead worker.
+                    {"status": JobStatus.RUNNING.value, "lease_expires_at": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": JobStatus.RUNNING.value,
+                    "owner": owner,
+                    "lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    @staticmethod
+    async def renew_lease(job_id: str, owner: str) -> bool:
+        now = datetime.now(timezone.utc)
+        result = await JobService._jobs().update_one(
+            {"_id": job_id, "owner": owner, "status": JobStatus.RUNNING.value},
+            {"$set": {"lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS), "updated_at": now}},
+        )
+        return result.modified_count == 1
+
+    @staticmethod
+    async def report_progress(job_id: str, owner: str, progress: Dict[str, Any]) -> None:
+        await JobService._jobs().update_one(
+            {"_id": job_id, "owner": owner},
+            {"$set": {"progress": progress, "updated_at": datetime.now(timezone.utc)}},
+        )
+
+    @staticmethod
+    async def finish(job_id: str, owner: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        """Mark a job succeeded (no error) or failed, releasing its organization."""
+        now = datetime.now(timezone.utc)
+        await JobService._jobs().update_one(
+            {"_id": job_id, "owner": owner},
+            {
+                "$set": {
+                    "status": (JobStatus.FAILED if error else JobStatus.SUCCEEDED).value,
+                    "result": result,
+                    "error": error,
+                    "finished_at": now,
+                    "updated_at": now,
+                },
+                # Payloads may carry password hashes; do not keep them around.
+                "$unset": {"active_key": "", "reserved_key": "", "lease_expires_at": "", "payload": ""},
+            },
+        )
+
+    @staticmethod
+    async def release(job_id: str, owner: str, error: str) -> None:
+        """Put a failed attempt back in the queue for another try."""
+        await JobService._jobs().update_one(
+            {"_id": job_id, "owner": owner},
+            {
+                "$set": {"status": JobStatus.QUEUED.value, "error": error, "updated_at": datetime.now(timezone.utc)},
+                "$unset": {"owner": "", "lease_expires_at": ""},
+            },
+        )
+
+    @staticmethod
+    async def fail_abandoned() -> int:
+        """Fail jobs whose worker died on their last allowed attempt."""
+        now = datetime.now(timezone.utc)
+        result = await JobService._jobs().update_many(
+            {
+                "status": JobStatus.RUNNING.value,
+                "lease_expires_at": {"$lt": now},
+                "attempts": {"$gte": settings.JOB_MAX_ATTEMPTS},
+            },
+            {
+                "$set": {
+                    "status": JobStatus.FAILED.value,
+                    "error": "Worker lease expired on the final attempt",
+                    "finished_at": now,
+                    "updated_at": now,
+                },
+                "$unset": {"active_key": "", "reserved_key": "", "lease_expires_at": "", "payload": ""},
+            },
+        )
+        return result.modified_count
+
+
+class JobRunner:
+    """
+    Claims and executes jobs in the background of each worker process.
+
+    Jobs are leased rather than locked: the runner renews the lease while a
+    handler runs, and a job whose lease lapses (crashed worker) is picked up
+    again by any runner. JOB_CONCURRENCY caps how many jobs of each type one
+    process runs at once, so a burst of renames cannot saturate MongoDB.
+    """
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._running: Dict[str, int] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def register(self, job_type: JobType, handler: JobHandler) -> None:
+        self._handlers[job_type.value] = handler
+        self._running.setdefault(job_type.value, 0)
+
+    def notify(self) -> None:
+        """Poll immediately instead of waiting for the next interval."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._poll_loop())
+        logger.info("Job runner %s started", self.owner)
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._loop_task, *self._tasks) if t is not None]
+        for task in tasks:
+            task.cancel()
+        # Cancelled jobs keep their lease until it expires, then another
+        # worker picks them up.
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+        self._wakeup = None
+
+    def _free_types(self) -> List[str]:
+        return [
+            job_type for job_type in self._handlers
+            if self._running[job_type] < settings.JOB_CONCURRENCY.get(job_type, 1)
+        ]
+
+    async def _poll_loop(self) -> None:
+        while True:
+            claimed = False
+            try:
+                free_types = self._free_types()
+                if free_types:
+                    job = await JobService.claim(free_types, self.owner)
+                    if job:
+                        claimed = True
+                        self._spawn(job)
+                    else:
+                        await JobService.fail_abandoned()
+            except PyMongoError as e:
+                logger.error("Job runner poll failed: %s", e)
+
+            if not claimed:
+                # asyncio.timeout rather than wait_for: on 3.11, wait_for can
+                # swallow a cancel that races the timeout and stop() hangs.
+                try:
+                    async with asyncio.timeout(settings.JOB_POLL_INTERVAL_SECONDS):
+                        await self._wakeup.wait()
+                except TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    def _spawn(self, job: Dict[str, Any]) -> None:
+        self._running[job["type"]] += 1
+        task = asyncio.create_task(self._execute(job))
+        self._tasks.add(task)
+
+        def done(t: asyncio.Task) -> None:
+            self._tasks.discard(t)
+            self._running[job["type"]] -= 1
+            self.notify()
+
+        task.add_done_callback(done)
+
+    async def _heartbeat(self, job_id: str, work: asyncio.Task) -> None:
+        """Renew the job's lease while work runs; cancel work once the lease is lost."""
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+            try:
+                renewed = await JobService.renew_lease(job_id, self.owner)
+            except PyMongoError as e:
+                logger.warning("Failed to renew lease for job %s: %s", job_id, e)
+                continue
+            if not renewed:
+                # Another runner may already be running it
+                logger.warning("Lost the lease on job %s; stopping it", job_id)
+                work.cancel()
+                return
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        job_id = job["_id"]
+        handler = self._handlers[job["type"]]
+        # Runs in its own task, so this only tags this job's records
+        bind(job_id=str(job_id), org=job["organization_name"])
+        logger.info("Running %s job %s for '%s' (attempt %s)", job["type"], job_id, job["organization_name"], job["attempts"])
+
+        async def report(progress: Dict[str, Any]) -> None:
+            await JobService.report_progress(job_id, self.owner, progress)
+
+        work = asyncio.create_task(handler(job, report))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, work))
+        try:
+            result = await work
+        except asyncio.CancelledError:
+            if heartbeat.done() and not heartbeat.cancelled():
+                return  # The lease was lost; the job is no longer ours to finish
+            raise
+        except Exception as e:
+            error = str(e.detail) if isinstance(e, HTTPException) else f"{type(e).__name__}: {e}"
+            logger.exception("Job %s failed on attempt %s", job_id, job["attempts"])
+            # HTTPExceptions are validation failures; retrying will not help.
+            if isinstance(e, HTTPException) or job["attempts"] >= settings.JOB_MAX_ATTEMPTS:
+                await JobService.finish(job_id, self.owner, error=error)
+            else:
+                await JobService.release(job_id, self.owner, error)
+        else:
+            await JobService.finish(job_id, self.owner, result=result)
+            logger.info("Job %s succeeded", job_id)
+        finally:
+            heartbeat.cancel()
+            work.cancel()
+
+
+job_runner = JobRunner()
@@ -0,0 +1,228 @@
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.indexes import DUPLICATE_KEY_ERROR
+from app.db.mongodb import db
+from app.models.migration import MigrationProgress
+
+logger = get_logger(__name__)
+
+ProgressCallback = Callable[[MigrationProgress], Awaitable[None]]
+
+
+class MigrationConflictError(Exception):
+    """The target collection exists but was not created by this migration."""
+
+
+class TenantMigrationService:
+    """
+    Moves a tenant's documents from one collection to another.
+
+    Strategies, in the order `auto` tries them:
+    - rename: server-side renameCollection; nothing is copied.
+    - out: server-side `$out` aggregation; documents never reach the app.
+    - copy: streams documents through the app in `_id` order, MIGRATION_BATCH_SIZE
+      at a time, so memory stays bounded regardless of tenant size. A checkpoint
+      in `migration_checkpoints` is written after every batch; retrying an
+      interrupted migration resumes after the last copied `_id`.
+
+    Every migration records a checkpoint before it creates the target, and
+    refuses to start when the target already exists without one: `$out` and
+    the copy would write into another tenant's collection, and `rollback`
+    only drops targets its checkpoint says this migration created.
+    """
+
+    CHECKPOINTS = "migration_checkpoints"
+
+    @staticmethod
+    def _checkpoints():
+        return db.get_master_database()[TenantMigrationService.CHECKPOINTS]
+
+    @staticmethod
+    def _checkpoint_id(source: AsyncIOMotorCollection, target: AsyncIOMotorCollection) -> str:
+        return f"{source.full_name}->{target.full_name}"
+
+    @staticmethod
+    async def migrate(
+        source: AsyncIOMotorCollection,
+        target: AsyncIOMotorCollection,
+        on_progress: Optional[ProgressCallback] = None,
+        strategy: Optional[str] = None,
+    ) -> MigrationProgress:
+        """Move all documents from source to target. The source is left in place until `finalize`."""
+        strategy = strategy or settings.MIGRATION_STRATEGY
+        checkpoints = TenantMigrationService._checkpoints()
+        checkpoint_id = TenantMigrationService._checkpoint_id(source, target)
+        checkpoint = await checkpoints.find_one({"_id": checkpoint_id})
+
+        if checkpoint is None:
+            if await TenantMigrationService._exists(target):
+                raise MigrationConflictError(f"'{target.full_name}' already exists")
+            now = datetime.now(timezone.utc)
+            checkpoint = {
+                "_id": checkpoint_id,
+                "source": source.full_name,
+                "target": target.full_name,
+                "copied": 0,
+                "started_at": now,
+                "updated_at": now,
+            }
+            await checkpoints.insert_one(checkpoint)
+        elif not await TenantMigrationService._exists(source) and await TenantMigrationService._exists(target):
+            # An earlier attempt already renamed the collection server-side
+            logger.info("'%s' was already moved to '%s'", source.name, target.name)
+            return MigrationProgress(source=source.full_name, target=target.full_name, strategy="rename")
+
+        # Once a streaming copy has written a batch, the target holds part of
+        # the data; only resuming that copy is safe.
+        if "last_id" not in checkpoint:
+            if strategy in ("auto", "rename") and source.database.name == target.database.name:
+                progress = await TenantMigrationService._try_server_side(
+                    "rename", source, target, strategy == "rename"
+                )
+                if progress:
+                    return progress
+            if strategy in ("auto", "out"):
+                progress = await TenantMigrationService._try_server_side(
+                    "out", source, target, strategy == "out"
+                )
+                if progress:
+                    return progress
+
+        return await TenantMigrationService._copy(source, target, checkpoint_id, checkpoint, on_progress)
+
+    @staticmethod
+    async def _exists(collection: AsyncIOMotorCollection) -> bool:
+        names = await collection.database.list_collection_names(filter={"name": collection.name})
+        return collection.name in names
+
+    @staticmethod
+    async def _try_server_side(
+        strategy: str,
+        source: AsyncIOMotorCollection,
+        target: AsyncIOMotorCollection,
+        required: bool,
+    ) -> Optional[MigrationProgress]:
+        total = await source.estimated_document_count()
+        try:
+            if strategy == "rename":
+                if await TenantMigrationService._exists(target):
+                    # Left empty by an earlier attempt of this migration
+                    await target.drop()
+                await source.rename(target.name)
+            else:
+                # $out into an existing collection keeps its options and indexes
+                await db.provision_collection(target)
+                await source.aggregate([{"$match": {}}, {"$out": target.name}]).to_list(length=None)
+        except OperationFailure as e:
+            if required:
+                raise
+            logger.warning("Server-side %s of '%s' not available, falling back: %s", strategy, source.name, e)
+            return None
+
+        logger.info("Migrated '%s' -> '%s' server-side via %s (%s documents)", source.name, target.name, strategy, total)
+        return MigrationProgress(
+            source=source.full_name, target=target.full_name, strategy=strategy, copied=total, total=total
+        )
+
+    @staticmethod
+    async def _copy(
+        source: AsyncIOMotorCollection,
+        target: AsyncIOMotorCollection,
+        checkpoint_id: str,
+        checkpoint: Dict[str, Any],
+        on_progress: Optional[ProgressCallback],
+    ) -> MigrationProgress:
+        batch_size = settings.MIGRATION_BATCH_SIZE
+        checkpoints = TenantMigrationService._checkpoints()
+        progress = MigrationProgress(
+            source=source.full_name,
+            target=target.full_name,
+            strategy="copy",
+            copied=checkpoint["copied"],
+            total=await source.estimated_document_count(),
+            resumed="last_id" in checkpoint,
+        )
+
+        # Create the target up front with the tenant options, also when the source is empty
+        await db.provision_collection(target)
+
+        query: Dict[str, Any] = {}
+        if "last_id" in checkpoint:
+            query = {"_id": {"$gt": checkpoint["last_id"]}}
+            logger.info("Resuming migration '%s' after %s documents", checkpoint_id, progress.copied)
+
+        async def flush(batch: List[Dict[str, Any]]) -> None:
+            await TenantMigrationService._insert_batch(target, batch)
+            progress.copied += len(batch)
+            progress.batches += 1
+            await checkpoints.update_one(
+                {"_id": checkpoint_id},
+                {"$set": {
+                    "last_id": batch[-1]["_id"],
+                    "copied": progress.copied,
+                    "updated_at": datetime.now(timezone.utc),
+                }},
+            )
+            logger.debug("Migration '%s': %s/%s documents copied", checkpoint_id, progress.copied, progress.total)
+            if on_progress:
+                await on_progress(progress)
+
+        batch: List[Dict[str, Any]] = []
+        async for doc in source.find(query).sort("_id", 1).batch_size(batch_size):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+
+        logger.info("Copied %s documents '%s' -> '%s' in %s batches", progress.copied, source.name, target.name, progress.batches)
+        return progress
+
+    @staticmethod
+    async def _insert_batch(target: AsyncIOMotorCollection, batch: List[Dict[str, Any]]) -> None:
+        try:
+            await target.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # After a crash the last batch may have been written without its
+            # checkpoint; those documents are already in place.
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+
+    @staticmethod
+    async def finalize(
+        progress: MigrationProgress, source: AsyncIOMotorCollection, target: AsyncIOMotorCollection
+    ) -> None:
+        """Drop the source once metadata points at the target."""
+        if progress.strategy != "rename":
+            await source.drop()
+        await TenantMigrationService._checkpoints().delete_one(
+            {"_id": TenantMigrationService._checkpoint_id(source, target)}
+        )
+
+    @staticmethod
+    async def rollback(
+        progress: MigrationProgress, source: AsyncIOMotorCollection, target: AsyncIOMotorCollection
+    ) -> None:
+        """Undo a migration whose metadata update failed."""
+        checkpoints = TenantMigrationService._checkpoints()
+        checkpoint_id = TenantMigrationService._checkpoint_id(source, target)
+        if progress.strategy == "rename":
+            await target.rename(source.name)
+        elif await checkpoints.find_one({"_id": checkpoint_id}) is not None:
+            await target.drop()
+        else:
+            logger.warning("Not dropping '%s': it was not created by this migration", target.full_name)
+        await checkpoints.delete_one({"_id": checkpoint_id})
+
+    @staticmethod
+    async def list_interrupted() -> List[Dict[str, Any]]:
+        """Checkpoints of migrations that never completed."""
+        return await TenantMigrationService._checkpoints().find({}, {"last_id": 0}).to_list(length=None)
@@ -1,12 +1,41 @@
+import base64
+import binascii
+import json
+from typing import Any, AsyncIterator, Dict, Literal, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
 from fastapi import HTTPException, status
+from pymongo.errors import DuplicateKeyError
+from app.db.indexes import ORG_COLLATION
 from app.db.mongodb import db
-from app.models.org import OrgCreate, OrgUpdate, OrgResponse
+from app.db.org_cache import org_cache
+from app.models.job import JobResponse, JobType
+from app.models.migration import MigrationProgress
+from app.models.org import ORG_STATUS_DELETING, OrgCreate, OrgUpdate, OrgResponse
 from app.services.auth_service import AuthService
+from app.services.job_service import JobService, ProgressReporter
+from app.services.migration_service import MigrationConflictError, TenantMigrationService
+from app.services.recovery_service import IntentService
 from datetime import datetime, timezone
-from app.core.logging import get_logger
+from app.core.config import settings
+from app.core.logging import bind, get_logger
+from app.core.metrics import metrics
+from app.core.request_context import span
 
 logger = get_logger(__name__)
 
+ListOrder = Literal["name", "created_at"]
+
+# Listings read only these fields; hashed_password never leaves the database
+LIST_PROJECTION = {"organization_name": 1, "collection_name": 1, "created_at": 1}
+
+# Sorts after every other character under ORG_COLLATION, closing prefix ranges
+_PREFIX_END = "\uffff"
+
+organization_operations = metrics.counter(
+    "organization_operations_total", "Organization changes accepted, by operation", ("operation",)
+)
+
 class OrganizationService:
     
     @staticmethod
@@ -15,159 +44,362 @@ class OrganizationService:
         Creates a new organization.
         
         Steps:
-        1. Check if org name exists in Master DB.
-        2. Hash password.
-        3. Create metadata in Master DB.
-        4. Initialize dynamic collection with dummy doc.
+        1. Hash password.
+        2. Create metadata in Master DB (unique indexes reject duplicates),
+           together with a create intent (see IntentService).
+        3. Create the tenant's storage for the configured placement (TENANT_PLACEMENT).
+        4. Resolve the intent.
         """
-        logger.info(f"Creating organization: {data.organization_name}")
+        bind(org=data.organization_name)
+        logger.info("Creating organization: %s", data.organization_name)
         master_db = db.get_master_database()
         organizations_collection = master_db["organizations"]
         
-        # 1. Check for duplicate organization name
-        existing_org = await organizations_collection.find_one({"organization_name": data.organization_name})
-        if existing_org:
-            logger.warning(f"Organization creation failed: '{data.organization_name}' already exists.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Organization with this name already exists"
-            )
-            
-        # 2. Hash the admin password
-        hashed_password = AuthService.get_password_hash(data.password)
+        # 1. Hash the admin password
+        hashed_password = await AuthService.get_password_hash(data.password)
         
-        # 3. Create metadata document
+        # 2. Create metadata document
         collection_name = db.get_tenant_collection_name(data.organization_name)
+        placement = db.tenant_placement().assign(data.organization_name)
         new_org_doc = {
+            "_id": ObjectId(),
             "organization_name": data.organization_name,
             "admin_email": data.email,
             "hashed_password": hashed_password,
             "collection_name": collection_name,
+            "placement": placement,
             "created_at": datetime.now(timezone.utc)
         }
         
-        result = await organizations_collection.insert_one(new_org_doc)
+        async def insert(session) -> None:
+            await IntentService.record(new_org_doc, session)
+            await organizations_collection.insert_one(new_org_doc, session=session)
+
+        try:
+            with span("db.insert_org"):
+                await db.in_transaction(insert)
+        except DuplicateKeyError as e:
+            # Without a transaction the intent is already stored
+            await IntentService.resolve(new_org_doc["_id"])
+            detail = OrganizationService._duplicate_detail(e.details)
+            logger.warning("Organization creation failed for '%s': %s", data.organization_name, detail)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+        # Checked after the insert: a rename reserving the name afterwards
+        # sees this organization instead (perform_rename)
+        with span("db.find_job"):
+            reserved = await JobService.reserved([collection_name])
+        if reserved:
+            await organizations_collection.delete_one({"_id": new_org_doc["_id"]})
+            await IntentService.resolve(new_org_doc["_id"])
+            await org_cache.invalidate(names=[data.organization_name], emails=[data.email])
+            logger.warning("Organization creation failed for '%s': name held by a pending rename", data.organization_name)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Organization with this name already exists")
+        await org_cache.invalidate(names=[data.organization_name], emails=[data.email])
         
-        # 4. Programmatically insert a dummy document to initialize the collection
-        tenant_collection = db.get_tenant_collection(data.organization_name)
-        await tenant_collection.insert_one({
-            "type": "init_dummy_doc", 
-            "message": "Collection initialized", 
-            "created_at": datetime.now(timezone.utc)
-        })
+        # 3. Create the tenant's storage (a pre-provisioned spare collection when available)
+        with span("db.provision_tenant"):
+            await db.provision_tenant(data.organization_name, placement)
+        await IntentService.resolve(new_org_doc["_id"])
         
-        logger.info(f"Organization '{data.organization_name}' created successfully with collection '{collection_name}'")
+        logger.info("Organization '%s' created successfully with collection '%s'", data.organization_name, collection_name)
+        organization_operations.labels("create").inc()
         
         return OrgResponse(
             organization_name=data.organization_name,
             collection_name=collection_name
         )
 
+    @staticmethod
+    def _duplicate_detail(details: Optional[dict]) -> str:
+        """Map a unique index violation on `organizations` to an API message."""
+        key_pattern = (details or {}).get("keyPattern", {})
+        if "admin_email" in key_pattern:
+            return "Admin email is already registered"
+        return "Organization with this name already exists"
+
+    @staticmethod
+    async def _update_metadata(current_org: dict, fields: dict) -> None:
+        """Apply fields to an organization's metadata document."""
+        org_collection = db.get_master_database()["organizations"]
+        try:
+            with span("db.update_org"):
+                async with db.causal_session() as session:
+                    await org_collection.update_one({"_id": current_org["_id"]}, {"$set": fields}, session=session)
+        except DuplicateKeyError as e:
+            detail = OrganizationService._duplicate_detail(e.details)
+            logger.warning("Update of '%s' rejected: %s", current_org["organization_name"], detail)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
     @staticmethod
     async def get_organization(org_name: str) -> dict:
-        master_db = db.get_master_database()
-        org = await master_db["organizations"].find_one({"organization_name": org_name})
-        if not org:
+        with span("db.find_org"):
+            org = await org_cache.get_by_name(org_name)
+        if not org or org.get("status") == ORG_STATUS_DELETING:
             raise HTTPException(status_code=404, detail="Organization not found")
         return org
 
     @staticmethod
-    async def delete_organization(org_name: str):
-        logger.info(f"Deleting organization: {org_name}")
+    def encode_cursor(org: Dict[str, Any], order: ListOrder) -> str:
+        """Opaque cursor resuming a listing after org."""
+        if order == "name":
+            key = [org["organization_name"]]
+        else:
+            key = [org["created_at"].isoformat(), str(org["_id"])]
+        raw = json.dumps([order, key], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str, order: ListOrder) -> Dict[str, Any]:
+        """The keyset filter for a cursor from encode_cursor."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            cursor_order, key = json.loads(raw)
+            if cursor_order != order:
+                raise ValueError(f"cursor is for order '{cursor_order}'")
+            if order == "name":
+                return {"organization_name": {"$gt": key[0]}}
+            created_at, org_id = datetime.fromisoformat(key[0]), ObjectId(key[1])
+        except (binascii.Error, InvalidId, TypeError, ValueError, IndexError) as e:
+            logger.info("Rejected cursor for order '%s': %s", order, e)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        return {"$or": [{"created_at": {"$gt": created_at}}, {"created_at": created_at, "_id": {"$gt": org_id}}]}
+
+    @staticmethod
+    async def list_organizations(
+        limit: int,
+        cursor: Optional[str] = None,
+        prefix: Optional[str] = None,
+        order: ListOrder = "name",
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Organizations in `order`, after `cursor`, whose names start with `prefix`.
+
+        Keyset pagination: each page is an index range scan starting after
+        the last key of the previous one, so deep pages cost the same as the
+        first. Names compare case-insensitively (ORG_COLLATION), and a prefix
+        is a range on the name index. Documents are projected to
+        LIST_PROJECTION and yielded as Motor fetches them in batches of
+        ORG_LIST_BATCH_SIZE; organizations being deleted are skipped.
+        Listings read from secondaries where MONGO_STALE_READ_PREFERENCE allows.
+        """
+        query: Dict[str, Any] = {"status": {"$ne": ORG_STATUS_DELETING}}
+        if prefix:
+            query["organization_name"] = {"$gte": prefix, "$lt": prefix + _PREFIX_END}
+        if cursor:
+            after = OrganizationService.decode_cursor(cursor, order)
+            if "organization_name" in after and "organization_name" in query:
+                query["organization_name"].update(after["organization_name"])
+            else:
+                query.update(after)
+        sort = [("organization_name", 1)] if order == "name" else [("created_at", 1), ("_id", 1)]
+
+        org_collection = db.get_read_database()["organizations"]
+        async with db.read_session() as session:
+            results = (
+                org_collection.find(query, LIST_PROJECTION, collation=ORG_COLLATION, session=session)
+                .sort(sort)
+                .limit(limit)
+                .batch_size(min(limit, settings.ORG_LIST_BATCH_SIZE))
+            )
+            async for org in results:
+                yield org
+
+    @staticmethod
+    async def approximate_total() -> int:
+        """Organization count from collection metadata; includes ones being deleted."""
+        with span("db.count_orgs"):
+            return await db.get_master_database()["organizations"].estimated_document_count()
+
+    @staticmethod
+    async def delete_organization(org_name: str) -> JobResponse:
+        """
+        Deletes an organization.
+
+        The metadata is marked as deleting (so the org disappears from reads
+        and its name stays reserved) and a background job drops the tenant
+        collection and then removes the metadata. Both writes share a
+        transaction where available; otherwise the job goes first, and the
+        reconciler re-queues deletes whose job is gone.
+        """
+        logger.info("Deleting organization: %s", org_name)
         master_db = db.get_master_database()
         org_collection = master_db["organizations"]
         
         # Verify existence
-        org = await org_collection.find_one({"organization_name": org_name})
+        with span("db.find_org"):
+            org = await org_collection.find_one({"organization_name": org_name}, collation=ORG_COLLATION)
         if not org:
-             logger.warning(f"Delete failed: Organization '{org_name}' not found")
+             logger.warning("Delete failed: Organization '%s' not found", org_name)
              raise HTTPException(status_code=404, detail="Organization not found")
 
-        # Delete from Master DB
-        await org_collection.delete_one({"organization_name": org_name})
-        
-        # Drop the dynamic collection
-        # We need to get the collection object then drop it.
-        # Motor/Pymongo expects dropping via the database object usually or collection.drop()
-        tenant_collection = db.get_tenant_collection(org_name)
-        await tenant_collection.drop()
-        logger.info(f"Organization '{org_name}' and its collection deleted.")
+        async def mark_deleting(session) -> JobResponse:
+            with span("db.enqueue_job"):
+                job = await JobService.enqueue(JobType.DELETE, org["organization_name"], {"org_id": org["_id"]}, session)
+            # Hide it from reads right away
+            with span("db.update_org"):
+                await org_collection.update_one(
+                    {"_id": org["_id"]}, {"$set": {"status": ORG_STATUS_DELETING}}, session=session
+                )
+            return job
+
+        job = await db.in_transaction(mark_deleting)
+        await org_cache.invalidate(names=[org_name], emails=[org["admin_email"]])
+        organization_operations.labels("delete").inc()
+        return job
 
     @staticmethod
-    async def update_organization(old_name: str, data: OrgUpdate) -> OrgResponse:
+    async def perform_delete(job: dict, report: ProgressReporter) -> dict:
+        """Job handler: drop the tenant's data, then remove the metadata."""
+        org_collection = db.get_master_database()["organizations"]
+        org = await org_collection.find_one({"_id": job["payload"]["org_id"]})
+        if org:
+            await db.drop_tenant(org)
+            async with db.causal_session() as session:
+                await org_collection.delete_one({"_id": org["_id"]}, session=session)
+            await org_cache.invalidate(names=[org["organization_name"]], emails=[org["admin_email"]])
+        logger.info("Organization '%s' and its collection deleted.", job["organization_name"])
+        return {"organization_name": job["organization_name"]}
+
+    @staticmethod
+    async def update_organization(old_name: str, data: OrgUpdate) -> OrgResponse | JobResponse:
+        """
+        Updates an organization's name, admin email and password.
+
+        Changes that leave the tenant's data in place are applied immediately:
+        email and password changes, renames that keep the collection name, and
+        every rename under the shared and database placements. A rename that
+        needs a new `org_<name>` collection is queued as a background job and
+        its JobResponse is returned instead.
+        """
         master_db = db.get_master_database()
         org_collection = master_db["organizations"]
         
-        current_org = await org_collection.find_one({"organization_name": old_name})
+        with span("db.find_org"):
+            current_org = await org_collection.find_one(
+                {"organization_name": old_name, "status": {"$ne": ORG_STATUS_DELETING}},
+                collation=ORG_COLLATION,
+            )
         if not current_org:
             raise HTTPException(status_code=404, detail="Organization not found")
             
         new_name = data.organization_name
         new_email = data.email
         new_password = data.password # Should be hashed if changed
+        new_collection_name = db.get_tenant_collection_name(new_name)
+        hashed_password = await AuthService.get_password_hash(new_password)
         
-        # If name changes, we have a migration scenario
-        if new_name != old_name:
-            logger.info(f"Migrating organization data from '{old_name}' to '{new_name}'")
-            # a. Check if new name exists
-            if await org_collection.find_one({"organization_name": new_name}):
-                logger.error(f"Migration failed: Target name '{new_name}' already exists")
+        # If the collection name changes, we have a migration scenario.
+        # Renames that only change case or punctuation keep the same collection.
+        placement = db.placement_of(current_org)
+        moves_data = not db.tenant_placement(placement["layout"]).metadata_only_rename
+        if new_collection_name != current_org["collection_name"] and moves_data:
+            # Check if new name exists. Names that collide case-insensitively
+            # also share a collection name, so one indexed lookup covers both.
+            with span("db.find_org"):
+                taken = await org_collection.find_one({"collection_name": new_collection_name})
+            if taken:
+                logger.error("Migration failed: Target name '%s' already exists", new_name)
                 raise HTTPException(status_code=400, detail="New organization name already exists")
-            
-            # b. Create NEW collection (dummy insert)
-            new_collection_name = db.get_tenant_collection_name(new_name)
-            new_tenant_collection = db.get_tenant_collection(new_name)
-            
-            # c. Migration: Fetch all docs from OLD and insert to NEW
-            old_tenant_collection = db.get_tenant_collection(old_name)
-            
-            # Use async iteration to copy documents
-            # Note: insert_many might be better for bulk, but let's do simple loop for safety unless large dataset
-            # For assignment, this is fine.
-            docs_to_move = []
-            async for doc in old_tenant_collection.find({}):
-                docs_to_move.append(doc)
-            
-            if docs_to_move:
-                await new_tenant_collection.insert_many(docs_to_move)
-            else:
-                 # Ensure collection is created even if empty (unlikely due to init doc)
-                 await new_tenant_collection.insert_one({"type": "init_dummy_doc_migrated"})
 
-            # d. Update Master DB metadata
-            hashed_password = AuthService.get_password_hash(new_password)
-            
-            await org_collection.update_one(
-                {"organization_name": old_name},
-                {"$set": {
-                    "organization_name": new_name,
-                    "admin_email": new_email,
+            with span("db.enqueue_job"):
+                job = await JobService.enqueue(JobType.RENAME, current_org["organization_name"], {
+                    "org_id": current_org["_id"],
+                    "old_name": current_org["organization_name"],
+                    "new_name": new_name,
+                    "new_email": new_email,
                     "hashed_password": hashed_password,
-                    "collection_name": new_collection_name
-                }}
-            )
-            
-            # e. Drop OLD collection
-            await old_tenant_collection.drop()
-            
-            logger.info(f"Migration complete: '{old_name}' -> '{new_name}'")
-            
-            return OrgResponse(
-                organization_name=new_name,
-                collection_name=new_collection_name
+                }, reserve=new_collection_name)
+            organization_operations.labels("rename").inc()
+            return job
+
+        # Metadata only. collection_name stays the tenant's unique name key,
+        # so a rename onto a taken name is still rejected by its index.
+        await OrganizationService._update_metadata(current_org, {
+            "organization_name": new_name,
+            "admin_email": new_email,
+            "hashed_password": hashed_password,
+            "collection_name": new_collection_name,
+        })
+        await org_cache.invalidate(
+            names=[old_name, new_name],
+            emails=[current_org["admin_email"], new_email],
+        )
+        organization_operations.labels("update").inc()
+        return OrgResponse(
+            organization_name=new_name,
+            collection_name=new_collection_name
+        )
+
+    @staticmethod
+    async def perform_rename(job: dict, report: ProgressReporter) -> dict:
+        """
+        Job handler: migrate the tenant collection, then repoint the metadata.
+
+        Safe to re-run after a crash: the migration resumes from its
+        checkpoint, and a metadata update that already happened is detected.
+        """
+        payload = job["payload"]
+        old_name, new_name, new_email = payload["old_name"], payload["new_name"], payload["new_email"]
+        new_collection_name = db.get_tenant_collection_name(new_name)
+        org_collection = db.get_master_database()["organizations"]
+
+        current_org = await org_collection.find_one({"_id": payload["org_id"]})
+        if not current_org:
+            raise HTTPException(status_code=404, detail="Organization not found")
+
+        old_tenant_collection = db.get_tenant_collection(old_name)
+        new_tenant_collection = db.get_tenant_collection(new_name)
+
+        if current_org["collection_name"] != new_collection_name:
+            # The job has held the name since it was queued; this catches a
+            # create that inserted before the reservation and checked before it
+            taken = await org_collection.find_one(
+                {"collection_name": new_collection_name, "_id": {"$ne": current_org["_id"]}}, {"_id": 1}
             )
-        
-        else:
-            # Just simple update of fields (email, password)
-            hashed_password = AuthService.get_password_hash(new_password)
-            await org_collection.update_one(
-                {"organization_name": old_name},
-                {"$set": {
+            if taken:
+                raise HTTPException(status_code=400, detail="New organization name already exists")
+            logger.info("Migrating organization data from '%s' to '%s'", old_name, new_name)
+
+            # a. Migration: move all docs from OLD to NEW (server-side where
+            # possible, otherwise a batched, checkpointed streaming copy)
+            async def on_progress(progress: MigrationProgress) -> None:
+                await report(progress.model_dump())
+
+            try:
+                migration = await TenantMigrationService.migrate(
+                    old_tenant_collection, new_tenant_collection, on_progress
+                )
+            except MigrationConflictError as e:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Cannot migrate: {e}")
+            await report(migration.model_dump())
+
+            # b. Update Master DB metadata
+            try:
+                await OrganizationService._update_metadata(current_org, {
+                    "organization_name": new_name,
                     "admin_email": new_email,
-                    "hashed_password": hashed_password
-                }}
+                    "hashed_password": payload["hashed_password"],
+                    "collection_name": new_collection_name,
+                    "placement": db.tenant_placement("collection").assign(new_name),
+                })
+            except HTTPException:
+                # Metadata still points at the old collection; undo the move.
+                await TenantMigrationService.rollback(migration, old_tenant_collection, new_tenant_collection)
+                raise
+            await org_cache.invalidate(
+                names=[old_name, new_name],
+                emails=[current_org["admin_email"], new_email],
             )
-            return OrgResponse(
-                organization_name=old_name,
-                collection_name=current_org["collection_name"]
+        else:
+            # Metadata was updated by an earlier attempt that died before cleanup
+            migration = MigrationProgress(
+                source=old_tenant_collection.full_name,
+                target=new_tenant_collection.full_name,
+                strategy="copy",
             )
+
+        # c. Drop OLD collection
+        await TenantMigrationService.finalize(migration, old_tenant_collection, new_tenant_collection)
+        
+        logger.info("Migration complete: '%s' -> '%s'", old_name, new_name)
+        return {"organization_name": new_name, "collection_name": new_collection_name}
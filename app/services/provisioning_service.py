@@ -0,0 +1,214 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Set, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.logging import get_logger
+from app.db.indexes import DUPLICATE_KEY_ERROR
+from app.db.mongodb import db
+from app.db.org_cache import org_cache
+from app.models.org import BulkCreateResult, OrgCreate
+from app.services.job_service import JobService
+from app.services.org_service import OrganizationService
+from app.services.recovery_service import IntentService
+
+logger = get_logger(__name__)
+
+Record = Tuple[int, OrgCreate]
+
+
+class BulkProvisioningService:
+    """
+    Creates organizations from an NDJSON stream of `OrgCreate` records.
+
+    The stream is validated up front (bad lines and duplicates within the
+    import fail individually), then provisioned in batches of
+    BULK_CREATE_BATCH_SIZE: passwords are hashed in parallel on the hashing
+    pool, metadata is written with one unordered `insert_many` so that a
+    unique index violation only fails its own record, and tenant
+    collections are initialized concurrently. Results are yielded per batch,
+    in line order within a batch.
+
+    A transaction would undo a whole batch on the first duplicate, so bulk
+    creates always write their intents (IntentService) ahead of the
+    metadata.
+    """
+
+    @staticmethod
+    def _validation_message(error: ValidationError) -> str:
+        return "; ".join(
+            f"{'.'.join(map(str, e['loc'])) or 'record'}: {e['msg']}" for e in error.errors()
+        )
+
+    @staticmethod
+    def _line_too_long(line_number: int) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Line {line_number} is longer than {settings.BULK_CREATE_MAX_LINE_BYTES} bytes",
+        )
+
+    @staticmethod
+    async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+        """Numbered lines; one over BULK_CREATE_MAX_LINE_BYTES fails the request rather than being buffered."""
+        max_bytes = settings.BULK_CREATE_MAX_LINE_BYTES
+        buffer = b""
+        line_number = 0
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                if len(line) > max_bytes:
+                    raise BulkProvisioningService._line_too_long(line_number)
+                yield line_number, line
+            if len(buffer) > max_bytes:
+                raise BulkProvisioningService._line_too_long(line_number + 1)
+        if buffer:
+            yield line_number + 1, buffer
+
+    @staticmethod
+    async def parse(chunks: AsyncIterator[bytes]) -> Tuple[List[Record], List[BulkCreateResult]]:
+        """Split an NDJSON body into valid records and per-line failures."""
+        records: List[Record] = []
+        failures: List[BulkCreateResult] = []
+        seen: Dict[str, Set[str]] = {"name": set(), "email": set(), "collection": set()}
+
+        async for line_number, line in BulkProvisioningService._lines(chunks):
+            if not line.strip():
+                continue
+            if len(records) + len(failures) >= settings.BULK_CREATE_MAX_RECORDS:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"At most {settings.BULK_CREATE_MAX_RECORDS} records per request",
+                )
+            try:
+                record = OrgCreate.model_validate(json.loads(line))
+            except ValueError as e:
+                error = (
+                    BulkProvisioningService._validation_message(e)
+                    if isinstance(e, ValidationError) else f"Invalid JSON: {e}"
+                )
+                failures.append(BulkCreateResult(line=line_number, status="failed", error=error))
+                continue
+
+            # Same case-insensitive rules as the unique indexes
+            keys = {
+                "name": record.organization_name.lower(),
+                "email": record.email.lower(),
+                "collection": db.get_tenant_collection_name(record.organization_name),
+            }
+            duplicate = next((field for field, key in keys.items() if key in seen[field]), None)
+            if duplicate:
+                failures.append(BulkCreateResult(
+                    line=line_number,
+                    status="failed",
+                    organization_name=record.organization_name,
+                    error=f"Duplicate {duplicate} earlier in this import",
+                ))
+                continue
+            for field, key in keys.items():
+                seen[field].add(key)
+            records.append((line_number, record))
+
+        return records, failures
+
+    @staticmethod
+    async def provision(records: List[Record]) -> AsyncIterator[BulkCreateResult]:
+        """Create the organizations, yielding a result for every record."""
+        batch_size = settings.BULK_CREATE_BATCH_SIZE
+        created = 0
+        for start in range(0, len(records), batch_size):
+            results = await BulkProvisioningService._provision_batch(records[start:start + batch_size])
+            created += sum(result.status == "created" for result in results)
+            for result in results:
+                yield result
+        logger.info("Bulk provisioning created %s of %s organizations", created, len(records))
+
+    @staticmethod
+    async def _provision_batch(batch: List[Record]) -> List[BulkCreateResult]:
+        organizations = db.get_master_database()["organizations"]
+        failed: Dict[int, str] = {}
+
+        hashes = await password_hasher.hash_many([record.password for _, record in batch])
+        placement = db.tenant_placement()
+        now = datetime.now(timezone.utc)
+        docs = [
+            {
+                "_id": ObjectId(),
+                "organization_name": record.organization_name,
+                "admin_email": record.email,
+                "hashed_password": hashed_password,
+                "collection_name": db.get_tenant_collection_name(record.organization_name),
+                "placement": placement.assign(record.organization_name),
+                "created_at": now,
+            }
+            for (_, record), hashed_password in zip(batch, hashes)
+        ]
+
+        try:
+            await IntentService.record_many(docs)
+            await organizations.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = (
+                    OrganizationService._duplicate_detail(error)
+                    if error.get("code") == DUPLICATE_KEY_ERROR else error.get("errmsg", "Write failed")
+                )
+        except PyMongoError as e:
+            logger.error("Bulk insert of %s organizations failed: %s", len(docs), e)
+            failed = {index: "Failed to store organization" for index in range(len(docs))}
+
+        inserted = [index for index in range(len(docs)) if index not in failed]
+        # As in create_organization: names held by pending renames are given back
+        reserved = await JobService.reserved([docs[index]["collection_name"] for index in inserted])
+        if reserved:
+            taken = [index for index in inserted if docs[index]["collection_name"] in reserved]
+            await organizations.delete_many({"_id": {"$in": [docs[index]["_id"] for index in taken]}})
+            for index in taken:
+                failed[index] = "Organization with this name already exists"
+            inserted = [index for index in inserted if index not in failed]
+        # Records whose storage may be half created keep their intent for the reconciler
+        unfinished: Set[int] = set()
+        semaphore = asyncio.Semaphore(settings.BULK_CREATE_CONCURRENCY)
+
+        async def init_collection(index: int) -> None:
+            async with semaphore:
+                try:
+                    await db.provision_tenant(docs[index]["organization_name"], docs[index]["placement"])
+                except PyMongoError as e:
+                    logger.error("Failed to initialize collection for '%s': %s", docs[index]["organization_name"], e)
+                    failed[index] = "Failed to initialize tenant collection"
+                    unfinished.add(index)
+                    await organizations.delete_one({"_id": docs[index]["_id"]})
+
+        await asyncio.gather(*(init_collection(index) for index in inserted))
+        await IntentService.resolve(*(doc["_id"] for index, doc in enumerate(docs) if index not in unfinished))
+        if inserted:
+            await org_cache.invalidate(
+                names=[docs[index]["organization_name"] for index in inserted],
+                emails=[docs[index]["admin_email"] for index in inserted],
+            )
+
+        return [
+            BulkCreateResult(
+                line=line_number,
+                status="failed",
+                organization_name=record.organization_name,
+                error=failed[index],
+            )
+            if index in failed
+            else BulkCreateResult(
+                line=line_number,
+                status="created",
+                organization_name=record.organization_name,
+                collection_name=docs[index]["collection_name"],
+            )
+            for index, (line_number, record) in enumerate(batch)
+        ]
@@ -0,0 +1,196 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo.errors import PyMongoError
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.mongodb import db
+from app.db.placement import TENANT_DATABASE_PREFIX
+from app.models.job import JobStatus, JobType
+from app.models.org import ORG_STATUS_DELETING
+from app.services.job_service import JobService
+from app.services.migration_service import TenantMigrationService
+
+logger = get_logger(__name__)
+
+
+class IntentService:
+    """
+    Write-ahead records for organization creates in `master_metadata.intents`.
+
+    Tenant storage is created with DDL (create, rename), which cannot be
+    part of a transaction. So every create records an intent carrying the
+    organization's `_id` and placement before any storage exists, and
+    resolves it once the storage is ready. The intent is written in the same
+    transaction as the metadata where the deployment supports transactions,
+    and just before it otherwise. An intent that outlives INTENT_GRACE_SECONDS
+    belongs to a create that crashed; the reconciler finishes or undoes it.
+    """
+
+    COLLECTION = "intents"
+
+    @staticmethod
+    def _intents():
+        return db.get_master_database()[IntentService.COLLECTION]
+
+    @staticmethod
+    def _intent(org: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "_id": org["_id"],
+            "op": "create",
+            "organization_name": org["organization_name"],
+            "placement": org["placement"],
+            "created_at": datetime.now(timezone.utc),
+        }
+
+    @staticmethod
+    async def record(org: Dict[str, Any], session: Optional[AsyncIOMotorClientSession] = None) -> None:
+        await IntentService._intents().insert_one(IntentService._intent(org), session=session)
+
+    @staticmethod
+    async def record_many(orgs: List[Dict[str, Any]]) -> None:
+        await IntentService._intents().insert_many([IntentService._intent(org) for org in orgs])
+
+    @staticmethod
+    async def resolve(*org_ids: Any) -> None:
+        await IntentService._intents().delete_many({"_id": {"$in": list(org_ids)}})
+
+    @staticmethod
+    async def stale(limit: int) -> List[Dict[str, Any]]:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.INTENT_GRACE_SECONDS)
+        return await IntentService._intents().find({"created_at": {"$lt": cutoff}}).to_list(length=limit)
+
+
+def _batches(items: List[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Reconciler:
+    """
+    Repairs what interrupted creates, deletes and renames leave behind.
+
+    Runs once in the background at startup, RECONCILE_BATCH_SIZE items per
+    query so the work stays index-bound however many tenants exist:
+
+    1. Stale create intents: storage is provisioned if the metadata made it
+       in, and dropped if it did not.
+    2. Organizations stuck in `deleting` with no active job (its attempts
+       ran out) get a new delete job.
+    3. Tenant collections and databases that no organization, intent,
+       active rename job or migration checkpoint refers to are dropped.
+       Documents in the shared collection are only cleaned up through
+       intents and delete jobs; finding orphans there would mean scanning
+       every tenant_id.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_logged())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run_logged(self) -> None:
+        try:
+            repaired = await self.run()
+        except PyMongoError as e:
+            logger.error("Reconciliation failed: %s", e)
+            return
+        if any(repaired.values()):
+            logger.warning("Reconciliation repaired: %s", repaired)
+        else:
+            logger.info("Reconciliation found nothing to repair")
+
+    async def run(self) -> Dict[str, int]:
+        return {
+            "intents": await self.resolve_intents(),
+            "deletes": await self.requeue_deletes(),
+            "orphans": await self.drop_orphans(),
+        }
+
+    async def resolve_intents(self) -> int:
+        organizations = db.get_master_database()["organizations"]
+        resolved = 0
+        while intents := await IntentService.stale(settings.RECONCILE_BATCH_SIZE):
+            ids = [intent["_id"] for intent in intents]
+            existing = {
+                org["_id"] async for org in organizations.find({"_id": {"$in": ids}}, {"_id": 1})
+            }
+            for intent in intents:
+                if intent["_id"] in existing:
+                    await db.provision_tenant(intent["organization_name"], intent["placement"])
+                    logger.warning("Finished provisioning interrupted create of '%s'", intent["organization_name"])
+                else:
+                    await db.drop_tenant({"placement": intent["placement"]})
+                    logger.warning("Rolled back interrupted create of '%s'", intent["organization_name"])
+            await IntentService.resolve(*ids)
+            resolved += len(ids)
+        return resolved
+
+    async def requeue_deletes(self) -> int:
+        organizations = db.get_master_database()["organizations"]
+        jobs = db.get_master_database()[JobService.COLLECTION]
+        requeued = 0
+        cursor = organizations.find({"status": ORG_STATUS_DELETING}, {"organization_name": 1})
+        while batch := await cursor.to_list(length=settings.RECONCILE_BATCH_SIZE):
+            keys = [org["organization_name"].lower() for org in batch]
+            active = {job["active_key"] async for job in jobs.find({"active_key": {"$in": keys}}, {"active_key": 1})}
+            for org in batch:
+                if org["organization_name"].lower() not in active:
+                    await JobService.enqueue(JobType.DELETE, org["organization_name"], {"org_id": org["_id"]})
+                    requeued += 1
+        return requeued
+
+    async def _referenced_elsewhere(self) -> Set[str]:
+        """Collection and database names that in-flight work may still create or use."""
+        names: Set[str] = set()
+        async for intent in IntentService._intents().find({}, {"placement": 1}):
+            names.update((intent["placement"]["collection"], intent["placement"]["database"]))
+        active = {"status": {"$in": [JobStatus.QUEUED.value, JobStatus.RUNNING.value]}, "type": JobType.RENAME.value}
+        async for job in db.get_master_database()[JobService.COLLECTION].find(active, {"payload": 1}):
+            names.add(db.get_tenant_collection_name(job["payload"]["new_name"]))
+        for checkpoint in await TenantMigrationService.list_interrupted():
+            # "<db>.<collection>-><db>.<collection>"
+            names.update(side.split(".", 1)[1] for side in checkpoint["_id"].split("->"))
+        return names
+
+    async def drop_orphans(self) -> int:
+        master_db = db.get_master_database()
+        organizations = master_db["organizations"]
+        collections = await master_db.list_collection_names(filter={"name": {"$regex": "^org_"}})
+        databases = [
+            name for name in await db.client.list_database_names() if name.startswith(TENANT_DATABASE_PREFIX)
+        ]
+        # Read after listing: anything created since then is either still
+        # covered by its intent or job, or already in the metadata below.
+        protected = await self._referenced_elsewhere()
+
+        dropped = 0
+        for field, names, drop in (
+            ("collection_name", collections, lambda name: master_db[name].drop()),
+            ("placement.database", databases, db.client.drop_database),
+        ):
+            for batch in _batches([name for name in names if name not in protected], settings.RECONCILE_BATCH_SIZE):
+                known = {
+                    org["collection_name"] if field == "collection_name" else org["placement"]["database"]
+                    async for org in organizations.find({field: {"$in": batch}}, {field: 1})
+                }
+                for name in batch:
+                    if name not in known:
+                        await drop(name)
+                        logger.warning("Dropped orphaned tenant storage '%s'", name)
+                        dropped += 1
+        return dropped
+
+
+reconciler = Reconciler()
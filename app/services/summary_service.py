@@ -0,0 +1,308 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.db.leader import LeaderLease
+from app.db.mongodb import db
+from app.db.placement import SHARED_COLLECTION, TENANT_DATABASE_PREFIX
+from app.models.org import TenantDataSummary
+
+logger = get_logger(__name__)
+
+SUMMARIES_COLLECTION = "tenant_summaries"
+# Resume tokens of change stream consumers, by lease name
+FEEDS_COLLECTION = "change_feeds"
+CHANGE_STREAM_HISTORY_LOST = 286
+
+summary_changes = metrics.counter(
+    "tenant_summary_changes_total", "Tenant data changes seen by the summary feed, by outcome", ("outcome",)
+)
+
+
+def _summaries():
+    return db.get_master_database()[SUMMARIES_COLLECTION]
+
+
+class TenantSummaryService:
+    """
+    Per-tenant document count, approximate BSON size and last write, kept
+    in `master_metadata.tenant_summaries` (one document per organization,
+    keyed by its `_id`) by TenantSummaryFeed.
+
+    Reading a summary is a single lookup by `_id`. A tenant without one
+    (created before summaries were enabled, or after the feed lost its
+    place in the oplog) is scanned once and the result stored.
+    """
+
+    @staticmethod
+    async def compute(org: Dict[str, Any]) -> Dict[str, Any]:
+        """Count and size an organization's documents by scanning them."""
+        scope = db.tenant_scope(org)
+        totals = await scope.collection.aggregate([
+            {"$match": scope.query()},
+            {"$group": {"_id": None, "documents": {"$sum": 1}, "approximate_bytes": {"$sum": {"$bsonSize": "$$ROOT"}}}},
+        ]).to_list(length=1)
+        if not totals:
+            return {"documents": 0, "approximate_bytes": 0}
+        return {"documents": totals[0]["documents"], "approximate_bytes": totals[0]["approximate_bytes"]}
+
+    @staticmethod
+    async def rebuild(org: Dict[str, Any]) -> Dict[str, Any]:
+        summary = await TenantSummaryService.compute(org)
+        await _summaries().update_one({"_id": org["_id"]}, {"$set": summary}, upsert=True)
+        logger.info("Rebuilt data summary of '%s': %s", org["organization_name"], summary)
+        return summary
+
+    @staticmethod
+    async def get(org: Dict[str, Any]) -> TenantDataSummary:
+        """The organization's summary; scanned on every call when no feed maintains them."""
+        if not (settings.TENANT_SUMMARIES_ENABLED and db.replicated):
+            summary = await TenantSummaryService.compute(org)
+        else:
+            summary = await _summaries().find_one({"_id": org["_id"]}, {"_id": 0})
+            if summary is None:
+                summary = await TenantSummaryService.rebuild(org)
+        return TenantDataSummary(organization_name=org["organization_name"], **summary)
+
+
+def _flush_update(delta: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Pipeline update applying one batch of a tenant's changes to its summary, up to `delta["token"]`."""
+    # Deletes without a pre-image take away an average document
+    average = {"$cond": [{"$gt": ["$documents", 0]}, {"$divide": ["$approximate_bytes", "$documents"]}, 0]}
+    approximate_bytes = {"$subtract": [{"$add": ["$approximate_bytes", delta["bytes"]]}, {"$multiply": [delta["unsized_deletes"], average]}]}
+    return [{"$set": {
+        "documents": {"$max": [0, {"$add": ["$documents", delta["documents"]]}]},
+        "approximate_bytes": {"$max": [0, {"$toLong": approximate_bytes}]},
+        "last_write_at": {"$max": ["$last_write_at", delta["last_write_at"]]},
+        "applied_through": delta["token"],
+    }}]
+
+
+class TenantSummaryFeed:
+    """
+    Maintains tenant summaries from one change stream over every tenant's
+    storage: `org_*` collections, the shared `tenant_data` collection and
+    `tenant_*` databases, plus `organizations` for creates and deletes.
+
+    Only the process holding the `tenant-summaries` lease consumes the
+    stream; the others retry the lease in case it lapses. The server sends
+    sizes (`$bsonSize`) rather than documents. Changes are aggregated per
+    tenant, up to TENANT_SUMMARY_BATCH_SIZE at a time, and each tenant's
+    summary is then updated once. The update also records the resume token
+    of the last change it folds in (`applied_through`) and only matches a
+    summary that has not seen it, so changes replayed after a restart or a
+    lease handover are skipped rather than counted twice. The saved resume
+    token only decides where a restart continues.
+
+    Inserts are sized exactly. Updates and deletes are sized from pre-images
+    when TENANT_SUMMARY_PRE_IMAGES records them; otherwise updates leave the
+    size alone and a delete subtracts the tenant's average document. In the
+    shared layout, updates and deletes without a pre-image carry no
+    tenant_id and are only counted as unattributed.
+    """
+
+    def __init__(self, lease_seconds: float):
+        self.lease = LeaderLease("tenant-summaries", lease_seconds)
+        self._task: Optional[asyncio.Task] = None
+        # Tenant storage namespace / shared tenant_id -> organization _id (None: no organization)
+        self._namespaces: Dict[Tuple[str, str], Optional[ObjectId]] = {}
+        self._tenant_ids: Dict[str, Optional[ObjectId]] = {}
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await self.lease.release()
+        except PyMongoError as e:
+            logger.warning("Could not release the tenant summary lease: %s", e)
+
+    @staticmethod
+    def pipeline() -> List[Dict[str, Any]]:
+        master = settings.MONGO_DB_NAME
+        return [
+            {"$match": {
+                "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+                "$or": [
+                    {"ns.db": master, "ns.coll": {"$in": ["organizations", SHARED_COLLECTION]}},
+                    {"ns.db": master, "ns.coll": {"$regex": "^org_"}},
+                    {"ns.db": {"$regex": f"^{TENANT_DATABASE_PREFIX}"}},
+                ],
+            }},
+            {"$project": {
+                "operationType": 1,
+                "ns": 1,
+                "documentKey": 1,
+                "wallTime": 1,
+                "size": {"$bsonSize": "$fullDocument"},
+                "before_size": {"$bsonSize": "$fullDocumentBeforeChange"},
+                "tenant_id": {"$ifNull": [
+                    "$fullDocument.tenant_id",
+                    {"$ifNull": ["$fullDocumentBeforeChange.tenant_id", "$documentKey.tenant_id"]},
+                ]},
+            }},
+        ]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await self.lease.acquire():
+                    logger.info("Maintaining tenant summaries (lease '%s')", self.lease.name)
+                    await self._consume()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code != CHANGE_STREAM_HISTORY_LOST:
+                    logger.error("Tenant summary feed failed, retrying: %s", e)
+                else:
+                    await self._reset()
+            except PyMongoError as e:
+                logger.error("Tenant summary feed failed, retrying: %s", e)
+            await asyncio.sleep(self.lease.ttl_seconds / 3)
+
+    async def _reset(self) -> None:
+        """The saved position fell off the oplog: forget it and every summary, which are rebuilt on read."""
+        logger.warning("Tenant summary feed lost its place in the oplog; summaries will be rebuilt on read")
+        master = db.get_master_database()
+        await master[FEEDS_COLLECTION].delete_one({"_id": self.lease.name})
+        await _summaries().delete_many({})
+
+    async def _consume(self) -> None:
+        """Apply changes until the lease is lost."""
+        feeds = db.get_master_database()[FEEDS_COLLECTION]
+        saved = await feeds.find_one({"_id": self.lease.name})
+        options: Dict[str, Any] = {}
+        if settings.TENANT_SUMMARY_PRE_IMAGES:
+            options = {"full_document": "whenAvailable", "full_document_before_change": "whenAvailable"}
+        renew_every = self.lease.ttl_seconds / 3
+        renew_at = time.monotonic() + renew_every
+        async with db.client.watch(
+            self.pipeline(), resume_after=saved and saved["token"], max_await_time_ms=1000, **options
+        ) as stream:
+            while True:
+                batch, started = [], time.monotonic()
+                while len(batch) < settings.TENANT_SUMMARY_BATCH_SIZE and time.monotonic() - started < 1:
+                    change = await stream.try_next()
+                    if change is None:
+                        break
+                    batch.append(change)
+                renew = time.monotonic() >= renew_at
+                if renew:
+                    # Before applying, so a process that lost the lease stops writing
+                    if not await self.lease.acquire():
+                        logger.info("Lost the tenant summary lease to another process")
+                        return
+                    renew_at = time.monotonic() + renew_every
+                if batch:
+                    await self.apply(batch)
+                # Saved while idle too, so a quiet feed does not fall off the oplog
+                if (batch or renew) and stream.resume_token is not None:
+                    await feeds.update_one(
+                        {"_id": self.lease.name},
+                        {"$set": {"token": stream.resume_token, "updated_at": datetime.now(timezone.utc)}},
+                        upsert=True,
+                    )
+
+    async def _org_for(self, change: Dict[str, Any]) -> Optional[ObjectId]:
+        """The organization whose storage a change is in."""
+        organizations = db.get_master_database()["organizations"]
+        database, collection = change["ns"]["db"], change["ns"]["coll"]
+        if database == settings.MONGO_DB_NAME and collection == SHARED_COLLECTION:
+            tenant_id = change.get("tenant_id")
+            if tenant_id is None:
+                return None
+            if tenant_id not in self._tenant_ids:
+                org = await organizations.find_one({"placement.tenant_id": tenant_id}, {"_id": 1})
+                self._tenant_ids[tenant_id] = org and org["_id"]
+            return self._tenant_ids[tenant_id]
+        key = (database, collection)
+        if key not in self._namespaces:
+            if database == settings.MONGO_DB_NAME:
+                query = {"collection_name": collection}
+            else:
+                query = {"placement.database": database}
+            org = await organizations.find_one(query, {"_id": 1, "placement.layout": 1, "collection_name": 1})
+            if org and database == settings.MONGO_DB_NAME and db.placement_of(org)["layout"] != "collection":
+                org = None  # Its collection name is reserved, but its data lives elsewhere
+            self._namespaces[key] = org and org["_id"]
+        return self._namespaces[key]
+
+    async def _lifecycle(self, change: Dict[str, Any]) -> None:
+        # Names, placements and tenants changed: look namespaces up again
+        self._namespaces.clear()
+        self._tenant_ids.clear()
+        org_id = change["documentKey"]["_id"]
+        if change["operationType"] == "insert":
+            # New tenants start empty (spare collections are too)
+            await _summaries().update_one(
+                {"_id": org_id}, {"$setOnInsert": {"documents": 0, "approximate_bytes": 0}}, upsert=True
+            )
+        elif change["operationType"] == "delete":
+            await _summaries().delete_one({"_id": org_id})
+
+    async def apply(self, changes: List[Dict[str, Any]]) -> None:
+        """Fold a batch of (projected) changes into the summaries, skipping any already applied."""
+        attributed: List[Tuple[ObjectId, Dict[str, Any]]] = []
+        for change in changes:
+            if change["ns"] == {"db": settings.MONGO_DB_NAME, "coll": "organizations"}:
+                await self._lifecycle(change)
+                continue
+            org_id = await self._org_for(change)
+            if org_id is None:
+                summary_changes.labels("unattributed").inc()
+                continue
+            attributed.append((org_id, change))
+        # Resume tokens of one stream sort in stream order
+        applied = {
+            summary["_id"]: summary.get("applied_through", "")
+            async for summary in _summaries().find(
+                {"_id": {"$in": list({org_id for org_id, _ in attributed})}}, {"applied_through": 1}
+            )
+        }
+        deltas: Dict[ObjectId, Dict[str, Any]] = {}
+        for org_id, change in attributed:
+            token = change["_id"]["_data"]
+            if token <= applied.get(org_id, ""):
+                summary_changes.labels("replayed").inc()
+                continue
+            delta = deltas.setdefault(
+                org_id, {"documents": 0, "bytes": 0, "unsized_deletes": 0, "last_write_at": None, "token": token}
+            )
+            delta["token"] = token
+            operation, size, before_size = change["operationType"], change.get("size"), change.get("before_size")
+            if operation == "insert":
+                delta["documents"] += 1
+                delta["bytes"] += size or 0
+            elif operation == "delete":
+                delta["documents"] -= 1
+                if before_size is None:
+                    delta["unsized_deletes"] += 1
+                else:
+                    delta["bytes"] -= before_size
+            elif size is not None and before_size is not None:
+                delta["bytes"] += size - before_size
+            written_at = change.get("wallTime") or datetime.now(timezone.utc)
+            delta["last_write_at"] = max(delta["last_write_at"] or written_at, written_at)
+            summary_changes.labels("applied").inc()
+        # Only tenants with a summary are updated; the others get one built on first read
+        await asyncio.gather(*(
+            _summaries().update_one(
+                {"_id": org_id, "applied_through": {"$not": {"$gte": delta["token"]}}}, _flush_update(delta)
+            )
+            for org_id, delta in deltas.items()
+        ))
+
+
+tenant_summary_feed = TenantSummaryFeed(settings.TENANT_SUMMARY_LEASE_SECONDS)
@@ -0,0 +1,243 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Set, Tuple
+
+import bson
+import zstandard
+from bson import json_util
+from fastapi import HTTPException, status
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.indexes import DUPLICATE_KEY_ERROR
+from app.db.mongodb import db
+from app.db.placement import TenantScope
+from app.models.org import TenantImportResult
+from app.services.job_service import JobService
+
+logger = get_logger(__name__)
+
+TransferFormat = Literal["bson", "ndjson"]
+
+# Extended JSON that round-trips every BSON type (int64, Decimal128, dates)
+NDJSON_OPTIONS = json_util.CANONICAL_JSON_OPTIONS
+MAX_DOCUMENT_BYTES = 16 * 1024 * 1024
+# A parsed document and the size it had in the import
+Parsed = Tuple[Dict[str, Any], int]
+
+# zstd expands data at most ~32000x, so decompressing the body this many
+# bytes at a time never produces more than ~32 MB at once.
+DECOMPRESS_STEP = 1024
+
+
+def _invalid(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Another operation is already in progress for this organization",
+    )
+
+
+def _encode_bson(document: Dict[str, Any]) -> bytes:
+    return bson.encode(document)
+
+
+def _encode_ndjson(document: Dict[str, Any]) -> bytes:
+    return json_util.dumps(document, json_options=NDJSON_OPTIONS).encode() + b"\n"
+
+
+def _split_bson(buffer: bytearray) -> Tuple[List[Parsed], int]:
+    """Decode the complete BSON documents at the start of buffer; returns them and the bytes used."""
+    sizes, end = [], 0
+    while len(buffer) - end >= 4:
+        size = int.from_bytes(buffer[end:end + 4], "little")
+        if not 5 <= size <= MAX_DOCUMENT_BYTES:
+            raise _invalid("Invalid BSON document length")
+        if len(buffer) - end < size:
+            break
+        sizes.append(size)
+        end += size
+    try:
+        return list(zip(bson.decode_all(bytes(buffer[:end])), sizes)), end
+    except bson.errors.InvalidBSON as e:
+        raise _invalid(f"Invalid BSON document: {e}")
+
+
+def _split_lines(buffer: bytearray) -> Tuple[List[Parsed], int]:
+    """Parse the complete extended JSON lines at the start of buffer; returns them and the bytes used."""
+    documents, end = [], 0
+    while (newline := buffer.find(b"\n", end)) != -1:
+        line, end = buffer[end:newline], newline + 1
+        if line.strip():
+            documents.append((_parse_line(line), len(line)))
+    if len(buffer) - end > MAX_DOCUMENT_BYTES:
+        raise _invalid("Line longer than the largest document")
+    return documents, end
+
+
+def _parse_line(line: bytes) -> Dict[str, Any]:
+    try:
+        document = json_util.loads(line, json_options=NDJSON_OPTIONS)
+    except ValueError as e:
+        raise _invalid(f"Invalid JSON: {e}")
+    if not isinstance(document, dict):
+        raise _invalid("Every line must be a JSON object")
+    return document
+
+
+class TenantTransferService:
+    """
+    Streams one tenant's documents out of and back into its storage, zstd-compressed.
+
+    An export is one zstd frame of either concatenated BSON documents (like
+    mongodump's .bson files) or canonical extended JSON lines. Documents are
+    read TENANT_EXPORT_BATCH_SIZE at a time and each batch is compressed
+    before the next is read, so memory stays flat however large the tenant.
+    An export is not a snapshot; writes made during it may or may not be in it.
+
+    An import decompresses the body as it arrives and writes it with
+    unordered insert_many batches, at most TENANT_IMPORT_PARALLELISM in
+    flight; the body is not read further while they all are. Documents whose
+    `_id` already exists are skipped and counted, so an interrupted import
+    can simply be rerun. Both follow the organization's placement: in the
+    shared layout the tenant_id field is left out of exports and set on import,
+    and an `_id` taken by another tenant's document is counted as rejected.
+    An import stops before its next batch once a rename or delete job is
+    queued for the organization.
+    """
+
+    @staticmethod
+    async def export(org: Dict[str, Any], fmt: TransferFormat) -> AsyncIterator[bytes]:
+        scope = db.tenant_scope(org)
+        projection = {field: 0 for field in scope.filter} or None
+        encode: Callable[[Dict[str, Any]], bytes] = _encode_bson if fmt == "bson" else _encode_ndjson
+        compressor = zstandard.ZstdCompressor(level=settings.TENANT_EXPORT_ZSTD_LEVEL).compressobj()
+        batch_size = settings.TENANT_EXPORT_BATCH_SIZE
+        cursor = scope.collection.find(scope.query(), projection).batch_size(batch_size)
+        exported = 0
+        try:
+            while batch := await cursor.to_list(length=batch_size):
+                exported += len(batch)
+                chunk = compressor.compress(b"".join(map(encode, batch)))
+                if chunk:
+                    yield chunk
+            yield compressor.flush()
+            logger.info("Exported %s documents of '%s'", exported, org["organization_name"])
+        finally:
+            await cursor.close()
+
+    @staticmethod
+    async def _decompress(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        try:
+            async for chunk in chunks:
+                for start in range(0, len(chunk), DECOMPRESS_STEP):
+                    data = decompressor.decompress(chunk[start:start + DECOMPRESS_STEP])
+                    if data:
+                        yield data
+        except zstandard.ZstdError as e:
+            raise _invalid(f"Invalid zstd data: {e}")
+        if not decompressor.eof:
+            raise _invalid("Truncated zstd data")
+
+    @staticmethod
+    async def _documents(chunks: AsyncIterator[bytes], fmt: TransferFormat) -> AsyncIterator[List[Parsed]]:
+        split = _split_bson if fmt == "bson" else _split_lines
+        buffer = bytearray()
+        async for data in TenantTransferService._decompress(chunks):
+            buffer += data
+            documents, used = split(buffer)
+            del buffer[:used]
+            if documents:
+                yield documents
+        if fmt == "ndjson" and buffer.strip():
+            yield [(_parse_line(bytes(buffer)), len(buffer))]
+        elif fmt == "bson" and buffer:
+            raise _invalid("Truncated BSON document")
+
+    @staticmethod
+    async def _insert(scope: TenantScope, batch: List[Dict[str, Any]]) -> TenantImportResult:
+        try:
+            result = await scope.collection.insert_many(batch, ordered=False)
+            return TenantImportResult(inserted=len(result.inserted_ids))
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            duplicates = [error for error in errors if error.get("code") == DUPLICATE_KEY_ERROR]
+            rejected = [error for error in errors if error.get("code") != DUPLICATE_KEY_ERROR]
+            error = rejected[0].get("errmsg") if rejected else None
+            if scope.filter and duplicates:
+                # The shared collection's _id index spans every tenant
+                ids = [duplicate["op"]["_id"] for duplicate in duplicates]
+                cursor = scope.collection.find(scope.query({"_id": {"$in": ids}}), {"_id": 1})
+                owned = [document["_id"] async for document in cursor]
+                foreign = [duplicate for duplicate in duplicates if duplicate["op"]["_id"] not in owned]
+                if foreign:
+                    duplicates = [duplicate for duplicate in duplicates if duplicate["op"]["_id"] in owned]
+                    rejected += foreign
+                    error = error or f"_id {foreign[0]['op']['_id']} belongs to another organization's document"
+            return TenantImportResult(
+                inserted=e.details.get("nInserted", 0),
+                duplicates=len(duplicates),
+                rejected=len(rejected),
+                error=error,
+            )
+
+    @staticmethod
+    async def import_documents(
+        org: Dict[str, Any], fmt: TransferFormat, chunks: AsyncIterator[bytes]
+    ) -> TenantImportResult:
+        """Insert an export's documents into org's storage."""
+        if await JobService.has_active_job(org["organization_name"]):
+            # A rename may be moving the collection the documents would go to
+            raise _busy()
+        scope = db.tenant_scope(org)
+        total = TenantImportResult()
+        pending: Set[asyncio.Task] = set()
+
+        def collect(tasks: Set[asyncio.Task]) -> None:
+            for task in tasks:
+                result = task.result()
+                total.inserted += result.inserted
+                total.duplicates += result.duplicates
+                total.rejected += result.rejected
+                total.error = total.error or result.error
+
+        async def submit(batch: List[Dict[str, Any]]) -> None:
+            nonlocal pending
+            # A rename or delete queued since the import started
+            if await JobService.has_active_job(org["organization_name"]):
+                raise _busy()
+            if len(pending) >= settings.TENANT_IMPORT_PARALLELISM:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+            pending.add(asyncio.create_task(TenantTransferService._insert(scope, batch)))
+
+        batch: List[Dict[str, Any]] = []
+        batch_bytes = 0
+        try:
+            async for documents in TenantTransferService._documents(chunks, fmt):
+                for document, size in documents:
+                    batch.append(scope.document(document))
+                    batch_bytes += size
+                    if len(batch) >= settings.TENANT_IMPORT_BATCH_SIZE or batch_bytes >= settings.TENANT_IMPORT_BATCH_BYTES:
+                        await submit(batch)
+                        batch, batch_bytes = [], 0
+            if batch:
+                await submit(batch)
+        except HTTPException as e:
+            # Batches already sent still land; say how far the import got
+            if pending:
+                collect((await asyncio.wait(pending))[0])
+            e.detail = f"{e.detail} ({total.inserted} documents were imported before it)"
+            raise
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+        if pending:
+            collect((await asyncio.wait(pending))[0])
+        logger.info("Imported into '%s': %s", org["organization_name"], total.model_dump(exclude_none=True))
+        return total
@@ -0,0 +1,257 @@
+"""
+End-to-end API load test with saved baselines.
+
+Runs the whole app in-process (lifespan included: indexes, job runner,
+hashing pool) and drives each endpoint in turn with a fixed number of
+concurrent clients:
+
+    create -> login -> get -> rename -> delete
+
+For every scenario it records p50/p95/p99 latency, requests per second and
+process memory. MongoDB is an in-memory stand-in (mongomock-motor) unless
+--mongo-url points at a real server, which is what absolute numbers should
+be judged on.
+
+    python -m benchmarks.bench_api --requests 200 --concurrency 16
+    python -m benchmarks.bench_api --save-baseline      # record the current numbers
+    python -m benchmarks.bench_api                      # exits 1 on a regression
+
+A run regresses when a scenario's p95 rises, or its throughput drops, by
+more than --tolerance against the baseline recorded with the same
+settings. bcrypt runs at --bcrypt-rounds (4 by default) so the numbers
+track the request path rather than the hash cost; bench_hashing covers
+that.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+import httpx
+
+from app.core.config import settings
+from app.core.rate_limit import limiter
+from app.db import mongodb
+from app.db.mongodb import db
+from app.main import app
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "bench_api.json"
+PASSWORD = "strongpassword123"
+COMPARED = ("requests", "concurrency", "bcrypt_rounds", "backend")
+
+Operation = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def rss_mb() -> float:
+    """Current resident set size, or the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+async def run_scenario(client: httpx.AsyncClient, operation: Operation, expected: int, args) -> Dict[str, Any]:
+    """Closed loop: `concurrency` clients issue `requests` operations between them."""
+    indexes = iter(range(args.requests))
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    async def worker() -> None:
+        for index in indexes:
+            started = time.perf_counter()
+            response = await operation(client, index)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != expected:
+                errors.append(f"{response.status_code} {response.text[:200]}")
+            # The in-memory stand-in never suspends; yield like a network round trip would
+            await asyncio.sleep(0)
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "rss_mb": rss_mb(),
+        "rss_growth_mb": rss_mb() - rss_before,
+    }
+
+
+async def wait_for_jobs(timeout: float = 120.0) -> None:
+    """Let queued renames/deletes finish before the next scenario."""
+    jobs = db.get_master_database()["jobs"]
+    deadline = time.monotonic() + timeout
+    while await jobs.count_documents({"status": {"$in": ["queued", "running"]}}):
+        if time.monotonic() > deadline:
+            raise SystemExit("Background jobs did not finish in time")
+        await asyncio.sleep(0.05)
+
+
+async def benchmark(args) -> Dict[str, Dict[str, Any]]:
+    run = uuid.uuid4().hex[:6]
+    name = lambda i, suffix="": f"bench{run}{suffix}{i}"
+    tokens: Dict[int, str] = {}
+
+    async def create(client, i):
+        return await client.post("/api/v1/org/create", json={
+            "organization_name": name(i), "email": f"admin{i}@{name(i)}.com", "password": PASSWORD,
+        })
+
+    async def login(client, i):
+        response = await client.post("/api/v1/admin/login", json={"email": f"admin{i}@{name(i)}.com", "password": PASSWORD})
+        if response.status_code == 200:
+            tokens[i] = response.json()["access_token"]
+        return response
+
+    async def get(client, i):
+        return await client.get("/api/v1/org/get", params={"organization_name": name(i)})
+
+    async def rename(client, i):
+        return await client.put(
+            "/api/v1/org/update",
+            json={"organization_name": name(i, "r"), "email": f"admin{i}@{name(i)}.com", "password": PASSWORD},
+            headers={"Authorization": f"Bearer {tokens[i]}"},
+        )
+
+    async def delete(client, i):
+        return await client.delete(
+            "/api/v1/org/delete",
+            params={"organization_name": name(i, "r")},
+            headers={"Authorization": f"Bearer {tokens[i]}"},
+        )
+
+    results: Dict[str, Dict[str, Any]] = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            results["create"] = await run_scenario(client, create, 201, args)
+            results["login"] = await run_scenario(client, login, 200, args)
+            results["get"] = await run_scenario(client, get, 200, args)
+            results["rename"] = await run_scenario(client, rename, 202, args)
+            await wait_for_jobs()
+
+            # Tokens name the organization, so delete needs fresh ones after the rename
+            for i in range(args.requests):
+                response = await client.post(
+                    "/api/v1/admin/login", json={"email": f"admin{i}@{name(i)}.com", "password": PASSWORD}
+                )
+                tokens[i] = response.json()["access_token"]
+            results["delete"] = await run_scenario(client, delete, 202, args)
+            await wait_for_jobs()
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    regressions = []
+    for scenario, current in results.items():
+        previous = baseline["scenarios"].get(scenario)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{scenario}: p95 {current['p95_ms']:.2f}ms > baseline {previous['p95_ms']:.2f}ms")
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{scenario}: {current['rps']:.1f} req/s < baseline {previous['rps']:.1f} req/s")
+    return regressions
+
+
+def configure(args) -> Dict[str, Any]:
+    limiter.enabled = False
+    settings.LOG_LEVEL = "WARNING"
+    settings.JOB_POLL_INTERVAL_SECONDS = 0.05
+    settings.BCRYPT_ROUNDS = args.bcrypt_rounds
+    if args.mongo_url:
+        settings.MONGO_URL = args.mongo_url
+        settings.MONGO_DB_NAME = f"bench_{uuid.uuid4().hex[:8]}"
+        backend = "mongod"
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+
+        db.client_factory = AsyncMongoMockClient
+        settings.DB_VERIFY_QUERY_PLANS = False  # mongomock has no explain
+        backend = "mongomock"
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "bcrypt_rounds": args.bcrypt_rounds,
+        "backend": backend,
+        "python": sys.version.split()[0],
+    }
+
+
+def main(args) -> int:
+    config = configure(args)
+    results = asyncio.run(benchmark(args))
+    if args.mongo_url:
+        async def drop_database():
+            client = mongodb.AsyncIOMotorClient(args.mongo_url)
+            await client.drop_database(settings.MONGO_DB_NAME)
+            client.close()
+        asyncio.run(drop_database())
+
+    print(f"{config['backend']}, {args.requests} requests per scenario, {args.concurrency} concurrent clients, "
+          f"bcrypt rounds {args.bcrypt_rounds}")
+    print(f"{'scenario':<9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rss MB':>9}{'errors':>8}")
+    for scenario, r in results.items():
+        print(f"{scenario:<9}{r['rps']:>9.1f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+              f"{r['rss_mb']:>9.1f}{r['errors']:>8}")
+
+    failed = [f"{scenario}: {r['errors']} errors, e.g. {r['first_error']}" for scenario, r in results.items() if r["errors"]]
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        if failed:
+            print("\n".join(["Not saving a baseline from a run with errors:", *failed]))
+            return 1
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({"config": config, "scenarios": results}, indent=2) + "\n")
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        mismatched = [key for key in COMPARED if baseline["config"].get(key) != config[key]]
+        if mismatched:
+            print(f"Baseline {baseline_path} was recorded with different {', '.join(mismatched)}; not compared")
+        else:
+            failed += compare(results, baseline, args.tolerance)
+    else:
+        print(f"No baseline at {baseline_path}; run with --save-baseline to record one")
+
+    if failed:
+        print("\n".join(["FAILED:", *failed]))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="Operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--mongo-url", default=None, help="Use a real MongoDB (a throwaway database is created)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative regression")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,113 @@
+"""
+Small tenants' latency while a large tenant runs heavy operations.
+
+Runs the app in-process (see bench_api). One large tenant holding --docs
+documents keeps --heavy-clients exports in flight, while --small tenants
+each list their organizations in a closed loop. This runs once with the
+tenant scheduler off and once on, and reports the small tenants' p50/p99
+latency alongside how many of the large tenant's exports completed and
+were turned away (429 over its rate, 503 shed):
+
+    python -m benchmarks.bench_fairness
+    python -m benchmarks.bench_fairness --heavy-clients 64 --docs 5000 --rate 1000
+
+--rate overrides TENANT_RATE_PER_SECOND. Raise it to see fair queueing and
+shedding alone, without the token bucket turning the large tenant away.
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+import httpx
+
+from app.core.admission import tenant_scheduler
+from app.db.mongodb import db
+from app.main import app
+from benchmarks.bench_api import PASSWORD, configure, percentile
+
+
+async def tenant(client: httpx.AsyncClient, name: str) -> Dict[str, str]:
+    credentials = {"email": f"admin@{name}.com", "password": PASSWORD}
+    response = await client.post("/api/v1/org/create", json={"organization_name": name, **credentials})
+    response.raise_for_status()
+    token = (await client.post("/api/v1/admin/login", json=credentials)).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def run(client: httpx.AsyncClient, heavy: str, heavy_auth, small: Dict[str, dict], args) -> dict:
+    deadline = time.perf_counter() + args.seconds
+    latencies: List[float] = []
+    heavy_outcomes: Counter = Counter()
+
+    async def exporter():
+        while time.perf_counter() < deadline:
+            response = await client.get("/api/v1/org/export", params={"organization_name": heavy}, headers=heavy_auth)
+            heavy_outcomes[response.status_code] += 1
+            if response.status_code != 200:
+                await asyncio.sleep(0.01)  # A client honouring Retry-After would wait longer
+
+    async def lister(headers):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get("/api/v1/org/list", params={"limit": 10}, headers=headers)
+            if response.status_code == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(args.think_ms / 1000)
+
+    await asyncio.gather(
+        *(exporter() for _ in range(args.heavy_clients)), *(lister(headers) for headers in small.values())
+    )
+    return {
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "small": len(latencies),
+        "exports": heavy_outcomes[200],
+        "429": heavy_outcomes[429],
+        "503": heavy_outcomes[503],
+    }
+
+
+async def benchmark(args) -> None:
+    run_id = uuid.uuid4().hex[:6]
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            heavy = f"heavy{run_id}"
+            heavy_auth = await tenant(client, heavy)
+            org = await db.get_master_database()["organizations"].find_one({"organization_name": heavy})
+            collection = db.tenant_scope(org).collection
+            await collection.insert_many([{"n": i, "payload": "x" * 200} for i in range(args.docs)])
+            small = {name: await tenant(client, name) for name in (f"small{run_id}{i}" for i in range(args.small))}
+
+            print(f"{'scheduler':<11}{'small p50':>10}{'small p99':>10}{'small reqs':>11}"
+                  f"{'exports':>9}{'429':>6}{'503':>6}")
+            for enabled in (False, True):
+                tenant_scheduler.enabled = enabled
+                r = await run(client, heavy, heavy_auth, small, args)
+                print(f"{'on' if enabled else 'off':<11}{r['p50']:>10.1f}{r['p99']:>10.1f}{r['small']:>11}"
+                      f"{r['exports']:>9}{r['429']:>6}{r['503']:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--heavy-clients", type=int, default=32)
+    parser.add_argument("--docs", type=int, default=2000, help="Documents in the large tenant")
+    parser.add_argument("--small", type=int, default=8, help="Number of small tenants")
+    parser.add_argument("--think-ms", type=float, default=20, help="Pause between a small tenant's requests")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rate", type=float, default=None, help="Override TENANT_RATE_PER_SECOND")
+    parser.add_argument("--mongo-url", default=None, help="Use a real MongoDB (a throwaway database is created)")
+    args = parser.parse_args()
+    args.requests, args.concurrency, args.bcrypt_rounds = 0, args.heavy_clients, 4
+    configure(args)
+    if args.rate:
+        tenant_scheduler.rate = args.rate
+        tenant_scheduler.burst = max(tenant_scheduler.burst, args.rate)
+    asyncio.run(benchmark(args))
@@ -0,0 +1,107 @@
+"""
+Login contention benchmark.
+
+Measures the latency of GET /api/v1/org/get while admin logins run
+concurrently, once with bcrypt running inline on the event loop (the old
+behaviour) and once with the hashing worker pool.
+
+The app runs in-process against an in-memory MongoDB (mongomock-motor):
+
+    python -m benchmarks.bench_hashing --logins 4 --gets 300
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+from app.core.hashing import password_hasher
+from app.core.rate_limit import limiter
+from app.db.mongodb import db
+from app.main import app
+
+ORG = {"organization_name": "benchorg", "email": "admin@benchorg.com", "password": "strongpassword123"}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(client: httpx.AsyncClient, logins: int, gets: int, interval: float) -> list:
+    stop = asyncio.Event()
+
+    async def login_loop():
+        while not stop.is_set():
+            response = await client.post("/api/v1/admin/login", json={"email": ORG["email"], "password": ORG["password"]})
+            assert response.status_code == 200, response.text
+            # The in-memory Mongo stand-in never suspends, so yield explicitly
+            # the way a real network round trip would.
+            await asyncio.sleep(0)
+
+    login_tasks = [asyncio.create_task(login_loop()) for _ in range(logins)]
+    await asyncio.sleep(0.05)
+
+    # Open-loop arrivals: each GET is measured from the moment it was due to
+    # be sent, so time spent waiting for a blocked event loop is counted.
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    async def timed_get(due: float) -> float:
+        await asyncio.sleep(max(0.0, due - loop.time()))
+        response = await client.get("/api/v1/org/get", params={"organization_name": ORG["organization_name"]})
+        assert response.status_code == 200, response.text
+        return (loop.time() - due) * 1000
+
+    latencies = await asyncio.gather(*(timed_get(start + i * interval) for i in range(gets)))
+
+    stop.set()
+    await asyncio.gather(*login_tasks)
+    return latencies
+
+
+async def main(args):
+    limiter.enabled = False
+    db.client = AsyncMongoMockClient()
+    password_hasher.start()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/api/v1/org/create", json=ORG)
+        assert response.status_code == 201, response.text
+
+        pooled_run = password_hasher._run
+
+        async def inline_run(fn, *fn_args):
+            return fn(*fn_args)
+
+        results = {}
+        for label, runner in (("inline", inline_run), ("pool", pooled_run)):
+            password_hasher._run = runner
+            results[label] = await run_scenario(client, args.logins, args.gets, args.interval_ms / 1000)
+        password_hasher._run = pooled_run
+
+    password_hasher.shutdown()
+
+    print(f"/api/v1/org/get latency with {args.logins} concurrent login loops ({args.gets} requests)")
+    print(f"{'mode':<8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for label, samples in results.items():
+        print(
+            f"{label:<8}{percentile(samples, 50):>10.2f}{percentile(samples, 95):>10.2f}"
+            f"{percentile(samples, 99):>10.2f}{max(samples):>10.2f}"
+        )
+    print(f"hasher stats: {password_hasher.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=4, help="Concurrent login loops")
+    parser.add_argument("--gets", type=int, default=300, help="Number of /org/get requests to time")
+    parser.add_argument("--interval-ms", type=float, default=10.0, help="Gap between /org/get arrivals")
+    asyncio.run(main(parser.parse_args()))
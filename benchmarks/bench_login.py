@@ -0,0 +1,68 @@
+"""
+Login throughput per core at each bcrypt cost.
+
+Runs the app in-process (see bench_api) and, for every cost in --rounds,
+creates an organization hashed at that cost and issues --logins sequential
+logins. CPU time is process time over all threads, so the hashing pool is
+included; logins/s/core is its inverse. Unknown-email logins are timed too:
+they pay for a dummy verification and should cost the same.
+
+    python -m benchmarks.bench_login
+    python -m benchmarks.bench_login --rounds 10,11,12 --logins 50
+
+The first row is the cost calibrated for BCRYPT_TARGET_MS on this machine,
+which is what the service picks at startup unless BCRYPT_ROUNDS is set.
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+import httpx
+
+from app.core.hashing import password_hasher
+from app.main import app
+from benchmarks.bench_api import PASSWORD, configure
+
+
+async def cpu_per_login(request, count: int) -> float:
+    cpu = time.process_time()
+    for _ in range(count):
+        await request()
+    return (time.process_time() - cpu) / count
+
+
+async def benchmark(args) -> None:
+    async with app.router.lifespan_context(app):
+        calibrated = password_hasher.rounds  # BCRYPT_ROUNDS is unset, so startup calibrated
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            print(f"{'rounds':<12}{'ms/login':>10}{'logins/s/core':>15}{'unknown ms':>12}")
+            for rounds in [calibrated, *args.rounds]:
+                password_hasher.set_rounds(rounds)
+                name = f"bench{uuid.uuid4().hex[:6]}"
+                credentials = {"email": f"admin@{name}.com", "password": PASSWORD}
+                response = await client.post("/api/v1/org/create", json={"organization_name": name, **credentials})
+                response.raise_for_status()
+                unknown = {"email": f"nobody@{name}.com", "password": PASSWORD}
+
+                await client.post("/api/v1/admin/login", json=unknown)  # Hash the dummy
+                known_s = await cpu_per_login(lambda: client.post("/api/v1/admin/login", json=credentials), args.logins)
+                unknown_s = await cpu_per_login(lambda: client.post("/api/v1/admin/login", json=unknown), args.logins)
+                label = f"{rounds} (calib.)" if rounds == calibrated and rounds not in args.rounds else str(rounds)
+                print(f"{label:<12}{known_s * 1000:>10.1f}{1 / known_s:>15.1f}{unknown_s * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=lambda value: [int(r) for r in value.split(",")], default=[10, 12])
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--mongo-url", default=None, help="Use a real MongoDB (a throwaway database is created)")
+    args = parser.parse_args()
+    args.requests, args.concurrency, args.bcrypt_rounds = args.logins, 1, None
+    configure(args)
+    asyncio.run(benchmark(args))
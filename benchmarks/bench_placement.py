@@ -0,0 +1,126 @@
+"""
+Tenant placement layouts as the number of tenants grows.
+
+For each tenant count and layout (TENANT_PLACEMENT: collection, shared,
+database) this provisions that many tenants in a fresh database, seeds each
+with a few documents and then measures:
+
+    provision  average time to create one tenant's storage
+    find       p50/p95 of reading one tenant's documents
+    catalog    listing collections and databases, which grows with the catalog
+    rename     moving one tenant's data on rename (0 where it is metadata only)
+
+    python -m benchmarks.bench_placement --tenants 100,1000,5000
+    python -m benchmarks.bench_placement --mongo-url mongodb://localhost:27017 --tenants 1000,10000
+
+The in-memory stand-in (mongomock-motor) has no storage engine, so it only
+shows the shape of the code path; the per-collection file and cache costs
+that motivate the shared and database layouts show up against a real server.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from typing import Any, Dict, List
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from app.core.config import settings
+from app.db import mongodb
+from app.db.mongodb import DatabaseManager
+from app.db.placement import PLACEMENTS, TENANT_DATABASE_PREFIX
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def build_client(mongo_url):
+    if mongo_url:
+        return mongodb.AsyncIOMotorClient(mongo_url)
+    from mongomock_motor import AsyncMongoMockClient
+
+    return AsyncMongoMockClient()
+
+
+async def measure(client, layout: str, tenants: int, args) -> Dict[str, Any]:
+    settings.MONGO_DB_NAME = f"bench_placement_{uuid.uuid4().hex[:8]}"
+    manager = DatabaseManager()
+    manager.client = client
+    strategy = manager.tenant_placement(layout)
+    placements = [strategy.assign(f"tenant{i}") for i in range(tenants)]
+
+    started = time.perf_counter()
+    for i, placement in enumerate(placements):
+        await manager.provision_tenant(f"tenant{i}", placement)
+    provision_ms = (time.perf_counter() - started) * 1000 / tenants
+
+    for placement in placements:
+        scope = strategy.scope(placement)
+        await scope.collection.insert_many([scope.document({"n": n}) for n in range(args.docs)])
+
+    find_ms = []
+    for _ in range(args.reads):
+        scope = strategy.scope(random.choice(placements))
+        started = time.perf_counter()
+        await scope.collection.find(scope.query()).to_list(None)
+        find_ms.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await client[settings.MONGO_DB_NAME].list_collection_names()
+    await client.list_database_names()
+    catalog_ms = (time.perf_counter() - started) * 1000
+
+    rename_ms = 0.0
+    if not strategy.metadata_only_rename:
+        collection = strategy.scope(placements[0]).collection
+        started = time.perf_counter()
+        await collection.rename(f"{collection.name}_renamed")
+        rename_ms = (time.perf_counter() - started) * 1000
+
+    await client.drop_database(settings.MONGO_DB_NAME)
+    if layout == "database":
+        for placement in placements:
+            await client.drop_database(placement["database"])
+    return {
+        "provision_ms": provision_ms,
+        "find_p50_ms": percentile(find_ms, 50),
+        "find_p95_ms": percentile(find_ms, 95),
+        "catalog_ms": catalog_ms,
+        "rename_ms": rename_ms,
+    }
+
+
+async def benchmark(args) -> None:
+    client = build_client(args.mongo_url)
+    layouts = args.layouts.split(",")
+    print(f"{'mongod' if args.mongo_url else 'mongomock'}, {args.docs} documents per tenant")
+    print(f"{'tenants':>8} {'layout':<11}{'provision ms':>13}{'find p50':>10}{'find p95':>10}"
+          f"{'catalog ms':>12}{'rename ms':>11}")
+    try:
+        for tenants in (int(count) for count in args.tenants.split(",")):
+            for layout in layouts:
+                r = await measure(client, layout, tenants, args)
+                print(f"{tenants:>8} {layout:<11}{r['provision_ms']:>13.3f}{r['find_p50_ms']:>10.3f}"
+                      f"{r['find_p95_ms']:>10.3f}{r['catalog_ms']:>12.2f}{r['rename_ms']:>11.2f}")
+    finally:
+        # Leftovers from an interrupted database-per-tenant run
+        for name in await client.list_database_names():
+            if name.startswith(TENANT_DATABASE_PREFIX) or name.startswith("bench_placement_"):
+                await client.drop_database(name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", default="100,1000", help="Comma-separated tenant counts")
+    parser.add_argument("--layouts", default=",".join(PLACEMENTS), help="Comma-separated layouts")
+    parser.add_argument("--docs", type=int, default=10, help="Documents seeded per tenant")
+    parser.add_argument("--reads", type=int, default=500, help="Tenant reads timed per run")
+    parser.add_argument("--mongo-url", default=None, help="Use a real MongoDB (throwaway databases are created)")
+    settings.TENANT_SPARE_POOL_SIZE = 0  # Time cold provisioning
+    asyncio.run(benchmark(parser.parse_args()))
@@ -0,0 +1,117 @@
+"""
+Distributed rate limit load test.
+
+Simulates several workers (threads, each with its own MongoCounterStorage,
+as separate uvicorn workers or replicas would have) hammering one key with
+random arrivals, then checks the global limit held:
+
+    python -m benchmarks.bench_rate_limit --workers 4 --limit 500 --requests 2000
+
+Stated error bound: admitted hits never exceed the limit. With batching
+(--sync-interval > 0) some capacity can go unused while idle workers hold
+leases; that shortfall is reported. Runs against an in-memory MongoDB
+(mongomock) unless --mongo-url points at a real server, which is what
+latencies should be judged on.
+"""
+import argparse
+import os
+import random
+import threading
+import time
+import uuid
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from pymongo import MongoClient
+
+from app.db.rate_limits import MongoCounterStorage
+
+
+def build_client(mongo_url):
+    if mongo_url:
+        return lambda: MongoClient(mongo_url)
+    import mongomock
+
+    from app.db.indexes import RATE_LIMIT_INDEXES
+
+    # mongomock's bulk_write predates pymongo 4.9's UpdateOne
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        for request in requests:
+            self.update_one(request._filter, request._doc, upsert=request._upsert)
+
+    mongomock.collection.Collection.bulk_write = bulk_write
+    shared = mongomock.MongoClient()
+    shared["master_metadata"]["rate_limits"].create_indexes(RATE_LIMIT_INDEXES)
+    return lambda: shared
+
+
+def run(args, sync_interval: float) -> dict:
+    new_client = build_client(args.mongo_url)
+    workers = [
+        MongoCounterStorage("counters+mongodb://", sync_interval=sync_interval, client=new_client())
+        for _ in range(args.workers)
+    ]
+    key = f"bench/{uuid.uuid4().hex}"
+    admitted = [0] * args.workers
+    latencies = [[] for _ in range(args.workers)]
+
+    def worker_loop(index: int) -> None:
+        rng = random.Random(index)
+        storage = workers[index]
+        for _ in range(args.requests // args.workers):
+            started = time.perf_counter()
+            if storage.acquire_sliding_window_entry(key, args.limit, args.window):
+                admitted[index] += 1
+            latencies[index].append(time.perf_counter() - started)
+            time.sleep(rng.expovariate(args.rate / args.workers))
+
+    threads = [threading.Thread(target=worker_loop, args=(i,)) for i in range(args.workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    for storage in workers:
+        storage.close()
+
+    samples = sorted(s for per_worker in latencies for s in per_worker)
+    return {
+        "admitted": sum(admitted),
+        "round_trips": sum(storage.round_trips for storage in workers),
+        "hits": len(samples),
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[int(len(samples) * 0.99)] * 1e6,
+        "elapsed_s": elapsed,
+    }
+
+
+def main(args):
+    print(
+        f"{args.workers} workers, {args.requests} requests at ~{args.rate}/s "
+        f"against a limit of {args.limit} per {args.window}s"
+    )
+    for label, interval in (("write-through", 0.0), (f"batched ({args.sync_interval}s)", args.sync_interval)):
+        result = run(args, interval)
+        held = result["admitted"] <= args.limit
+        print(
+            f"{label:<22} admitted {result['admitted']:>6} / {args.limit} "
+            f"({'OK' if held else 'OVER LIMIT'}, {args.limit - result['admitted']} unused), "
+            f"{result['round_trips'] / max(1, result['admitted']):.3f} round trips per admitted hit, "
+            f"p50 {result['p50_us']:.0f}us p99 {result['p99_us']:.0f}us"
+        )
+        if not held:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--window", type=int, default=3600)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=2000.0, help="Aggregate arrivals per second")
+    parser.add_argument("--sync-interval", type=float, default=0.1)
+    parser.add_argument("--mongo-url", default=None)
+    main(parser.parse_args())
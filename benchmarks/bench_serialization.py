@@ -0,0 +1,94 @@
+"""
+CPU per request on the hot read and login paths.
+
+Runs the app in-process (see bench_api) and issues --requests sequential
+calls to each endpoint, reporting process CPU time (all threads, so the
+bcrypt pool is included for login) and wall time per request:
+
+    python -m benchmarks.bench_serialization --requests 2000
+
+/org/get is served from the organization cache after the first call, so
+its CPU is mostly routing, middleware and serialization. The response step
+is also timed on its own, before and after: FastAPI validating a returned
+model against response_model and dumping it, versus ModelResponse.
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+import httpx
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from starlette.responses import Response
+
+from app.core.responses import ModelResponse
+from app.main import app
+from app.models.auth import Token
+from app.models.org import OrgResponse
+from benchmarks.bench_api import PASSWORD, configure
+
+
+async def measure(client: httpx.AsyncClient, request, count: int):
+    await request()  # Warm caches
+    cpu, wall = time.process_time(), time.perf_counter()
+    for _ in range(count):
+        response = await request()
+        if response.status_code != 200:
+            raise SystemExit(f"{response.status_code} {response.text[:200]}")
+    return (time.process_time() - cpu) / count * 1e6, (time.perf_counter() - wall) / count * 1e6
+
+
+async def measure_response(model, count: int):
+    """Microseconds to turn a validated model into a response, per path."""
+    field = create_model_field(name="response", type_=type(model), mode="serialization")
+    started = time.process_time()
+    for _ in range(count):
+        body = await serialize_response(field=field, response_content=model, dump_json=True)
+        Response(body, media_type="application/json")
+    response_model_us = (time.process_time() - started) / count * 1e6
+    started = time.process_time()
+    for _ in range(count):
+        ModelResponse(model)
+    return response_model_us, (time.process_time() - started) / count * 1e6
+
+
+async def benchmark(args) -> None:
+    name = f"bench{uuid.uuid4().hex[:6]}"
+    credentials = {"email": f"admin@{name}.com", "password": PASSWORD}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post("/api/v1/org/create", json={"organization_name": name, **credentials})
+            response.raise_for_status()
+            scenarios = {
+                "GET /org/get": lambda: client.get("/api/v1/org/get", params={"organization_name": name}),
+                "POST /admin/login": lambda: client.post("/api/v1/admin/login", json=credentials),
+            }
+            print(f"{'endpoint':<20}{'cpu us/req':>12}{'wall us/req':>13}")
+            for label, request in scenarios.items():
+                cpu_us, wall_us = await measure(client, request, args.requests)
+                print(f"{label:<20}{cpu_us:>12.1f}{wall_us:>13.1f}")
+
+    print(f"\n{'response step':<20}{'response_model us':>19}{'ModelResponse us':>18}")
+    for model in (
+        OrgResponse(organization_name=name, collection_name=f"org_{name}"),
+        Token(access_token="x" * 160, token_type="bearer"),
+    ):
+        before, after = await measure_response(model, args.requests * 10)
+        print(f"{type(model).__name__:<20}{before:>19.2f}{after:>18.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--mongo-url", default=None, help="Use a real MongoDB (a throwaway database is created)")
+    args = parser.parse_args()
+    args.concurrency = 1
+    configure(args)
+    asyncio.run(benchmark(args))
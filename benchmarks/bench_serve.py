@@ -0,0 +1,138 @@
+"""
+Throughput of `python -m app.serve` from 1 to N worker processes.
+
+For each worker count in --workers this starts the launcher on a local
+port, drives it from --clients load generator processes for --seconds, and
+reports requests per second and the speedup over the first row:
+
+    python -m benchmarks.bench_serve --workers 1,2,4
+    python -m benchmarks.bench_serve --workers 1,2,4,8 --mongo-url mongodb://localhost:27017
+
+The request is GET /org/get for an organization that does not exist:
+routing, middleware, a metadata lookup and a 404, with rate limiting off.
+Without --mongo-url every worker gets its own in-memory database
+(mongomock-motor), so the lookup is Python CPU in the worker and the
+numbers show how the serving path itself scales across cores. The load
+generators share the machine with the server; leave them cores of their
+own (--clients) or the curve flattens early.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+PATH = "/api/v1/org/get?organization_name=bench-missing"
+
+
+def mock_app():
+    """App factory for workers without a MongoDB: each gets its own in-memory database."""
+    from mongomock_motor import AsyncMongoMockClient
+
+    from app.db.mongodb import db
+    from app.main import app
+
+    db.client_factory = AsyncMongoMockClient
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def drive(url: str, concurrency: int, seconds: float) -> int:
+    import httpx
+
+    completed = 0
+    deadline = time.perf_counter() + seconds
+    async with httpx.AsyncClient(base_url=url, limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def worker():
+            nonlocal completed
+            while time.perf_counter() < deadline:
+                response = await client.get(PATH)
+                if response.status_code == 404:
+                    completed += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return completed
+
+
+def client_process(url: str, concurrency: int, seconds: float, results) -> None:
+    results.put(asyncio.run(drive(url, concurrency, seconds)))
+
+
+def wait_until_ready(url: str, timeout: float = 60) -> None:
+    import httpx
+
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url + PATH).status_code == 404:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Server at {url} did not start within {timeout}s")
+
+
+def measure(workers: int, args) -> float:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "MONGO_URL": args.mongo_url or "mongodb://localhost:27017",
+        "MONGO_DB_NAME": f"bench_serve_{uuid.uuid4().hex[:8]}",
+        "SECRET_KEY": "benchmark-secret",
+        "RATE_LIMIT_ENABLED": "false",
+        "RATE_LIMIT_STORAGE": "memory" if not args.mongo_url else os.environ.get("RATE_LIMIT_STORAGE", "memory"),
+        "LOG_LEVEL": "WARNING",
+        "BCRYPT_ROUNDS": "4",
+    }
+    command = [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+    if not args.mongo_url:
+        env["DB_VERIFY_QUERY_PLANS"] = "false"  # mongomock has no explain
+        command += ["--app", "benchmarks.bench_serve:mock_app", "--factory"]
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(url)
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client_process, args=(url, args.concurrency, args.seconds, results))
+            for _ in range(args.clients)
+        ]
+        for client in clients:
+            client.start()
+        completed = sum(results.get() for _ in clients)
+        for client in clients:
+            client.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return completed / args.seconds
+
+
+def main(args) -> None:
+    print(f"{'mongod' if args.mongo_url else 'mongomock'}, {os.cpu_count()} CPUs, {args.clients} client processes")
+    print(f"{'workers':>8}{'req/s':>10}{'speedup':>9}")
+    first = None
+    for workers in (int(count) for count in args.workers.split(",")):
+        rps = measure(workers, args)
+        first = first or rps
+        print(f"{workers:>8}{rps:>10.0f}{rps / first:>8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--clients", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--concurrency", type=int, default=32, help="In-flight requests per client process")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--mongo-url", default=None, help="Use a real MongoDB (a throwaway database per run)")
+    main(parser.parse_args())
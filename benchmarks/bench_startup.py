@@ -0,0 +1,83 @@
+"""
+Cold start profile: how long importing the app takes, and where it goes.
+
+Imports app.main in fresh interpreters with `python -X importtime` and
+reports the fastest run's total, the slowest modules by their own import
+time, and the cumulative time per top-level package:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --top 30 --runs 5
+    python -m benchmarks.bench_startup --budget-ms 1500   # exits 1 over budget
+
+Run it where the service runs (e.g. inside the container image) for
+numbers that match production cold starts. The lifespan phases after the
+import (connect, index checks) are logged by the app itself as
+"Startup finished in ... ms".
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# (module, self us, cumulative us, depth)
+Entry = Tuple[str, int, int, int]
+
+
+def import_profile(module: str) -> List[Entry]:
+    env = {"MONGO_URL": "mongodb://localhost:27017", "SECRET_KEY": "benchmark-secret", **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+
+def total_ms(entries: List[Entry], module: str) -> float:
+    return next(cumulative for name, _, cumulative, _ in entries if name == module) / 1000
+
+
+def by_package(entries: List[Entry]) -> Dict[str, float]:
+    packages: Dict[str, float] = defaultdict(float)
+    for name, self_us, _, _ in entries:
+        packages[name.split(".")[0]] += self_us / 1000
+    return packages
+
+
+def main(args) -> int:
+    runs = [import_profile(args.module) for _ in range(args.runs)]
+    entries = min(runs, key=lambda run: total_ms(run, args.module))
+    total = total_ms(entries, args.module)
+    print(f"import {args.module}: {total:.1f} ms (fastest of {args.runs}, {len(entries)} modules)")
+
+    print(f"\n{'self ms':>9}{'cumul ms':>10}  module")
+    for name, self_us, cumulative_us, _ in sorted(entries, key=lambda e: e[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>9.1f}{cumulative_us / 1000:>10.1f}  {name}")
+
+    print(f"\n{'ms':>9}  package")
+    for package, ms in sorted(by_package(entries).items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{ms:>9.1f}  {package}")
+
+    if args.budget_ms and total > args.budget_ms:
+        print(f"\nFAILED: {total:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    sys.exit(main(parser.parse_args()))
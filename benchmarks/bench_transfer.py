@@ -0,0 +1,104 @@
+"""
+Tenant export/import throughput and memory as the tenant grows.
+
+For each size in --docs this seeds one tenant, exports it, and imports the
+export into a second tenant. It reports MB/s of uncompressed BSON, the
+compression ratio, and the peak Python memory (tracemalloc) above what was
+allocated before each step:
+
+    python -m benchmarks.bench_transfer --docs 10000,100000
+    python -m benchmarks.bench_transfer --format ndjson --mongo-url mongodb://localhost:27017
+
+The streaming overhead should stay the same as --docs grows. mongomock-motor
+keeps the whole database in Python memory and copies query results up
+front, so use --mongo-url for memory numbers; without it the import peak
+includes the stored documents themselves.
+"""
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+import uuid
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+import bson
+
+from app.core.config import settings
+from app.db import mongodb
+from app.db.mongodb import db
+from app.services.transfer_service import TenantTransferService
+
+CHUNK = 64 * 1024  # Roughly what a request body arrives in
+
+
+def document(i: int) -> dict:
+    return {"n": i, "name": f"user {i}", "email": f"user{i}@example.com", "tags": ["a", "b", "c"], "score": i * 0.5}
+
+
+async def body(data: bytes):
+    for start in range(0, len(data), CHUNK):
+        yield data[start:start + CHUNK]
+
+
+async def measure(count: int, fmt: str):
+    source = {"organization_name": f"src{count}", "collection_name": f"org_src{count}"}
+    target = {"organization_name": f"dst{count}", "collection_name": f"org_dst{count}"}
+    for i in range(0, count, 10_000):
+        await db.tenant_scope(source).collection.insert_many([document(n) for n in range(i, min(count, i + 10_000))])
+    raw_mb = count * len(bson.encode({"_id": bson.ObjectId(), **document(count)})) / 1e6
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    exported = b"".join([chunk async for chunk in TenantTransferService.export(source, fmt)])
+    export_s = time.perf_counter() - started
+    export_peak = tracemalloc.get_traced_memory()[1] - baseline - len(exported)
+
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    result = await TenantTransferService.import_documents(target, fmt, body(exported))
+    import_s = time.perf_counter() - started
+    import_peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    assert result.inserted == count, result
+    return {
+        "export_mb_s": raw_mb / export_s,
+        "import_mb_s": raw_mb / import_s,
+        "ratio": raw_mb * 1e6 / len(exported),
+        "export_peak_mb": export_peak / 1e6,
+        "import_peak_mb": import_peak / 1e6,
+    }
+
+
+async def benchmark(args) -> None:
+    print(f"{'mongod' if args.mongo_url else 'mongomock'}, format {args.format}")
+    print(f"{'docs':>8}{'export MB/s':>13}{'import MB/s':>13}{'ratio':>7}{'export peak MB':>16}{'import peak MB':>16}")
+    try:
+        for count in (int(docs) for docs in args.docs.split(",")):
+            r = await measure(count, args.format)
+            print(f"{count:>8}{r['export_mb_s']:>13.1f}{r['import_mb_s']:>13.1f}{r['ratio']:>7.1f}"
+                  f"{r['export_peak_mb']:>16.1f}{r['import_peak_mb']:>16.1f}")
+    finally:
+        await db.client.drop_database(settings.MONGO_DB_NAME)
+        db.client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", default="10000,50000", help="Comma-separated tenant sizes")
+    parser.add_argument("--format", choices=["bson", "ndjson"], default="bson")
+    parser.add_argument("--mongo-url", default=None, help="Use a real MongoDB (a throwaway database is created)")
+    args = parser.parse_args()
+    settings.MONGO_DB_NAME = f"bench_transfer_{uuid.uuid4().hex[:8]}"
+    if args.mongo_url:
+        db.client = mongodb.AsyncIOMotorClient(args.mongo_url)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+
+        db.client = AsyncMongoMockClient()
+    asyncio.run(benchmark(args))
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import TenantOverloadedError, TenantRateLimitedError, TenantScheduler
+
+
+def _scheduler(**overrides):
+    options = dict(capacity=1, tenant_concurrency=1, rate=1000, burst=1000, target_wait_ms=1000, max_queue=100)
+    return TenantScheduler(**{**options, **overrides})
+
+
+async def _run(scheduler, org, order, hold=0.01, cost=1.0):
+    async with scheduler.slot(org, cost):
+        order.append(org)
+        await asyncio.sleep(hold)
+
+
+async def test_small_tenant_is_not_queued_behind_a_large_one():
+    scheduler = _scheduler()
+    order = []
+
+    heavy = [asyncio.create_task(_run(scheduler, "big", order, cost=10)) for _ in range(10)]
+    await asyncio.sleep(0)
+    small = asyncio.create_task(_run(scheduler, "small", order))
+    await asyncio.gather(*heavy, small)
+
+    # The first big request was running; the small one goes next
+    assert order.index("small") == 1
+
+
+async def test_each_tenant_is_capped_at_its_concurrency():
+    scheduler = _scheduler(capacity=10, tenant_concurrency=2)
+    peak = {"big": 0, "other": 0}
+
+    async def run(org):
+        async with scheduler.slot(org):
+            peak[org] = max(peak[org], scheduler._tenants[org].running)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(run("big") for _ in range(6)), *(run("other") for _ in range(2)))
+    assert peak == {"big": 2, "other": 2}
+    assert scheduler.stats()["running"] == 0
+
+
+async def test_token_bucket_limits_each_tenant_separately():
+    scheduler = _scheduler(capacity=10, tenant_concurrency=10, rate=1, burst=2)
+
+    for _ in range(2):
+        async with scheduler.slot("acme"):
+            pass
+    with pytest.raises(TenantRateLimitedError) as error:
+        await scheduler.acquire("Acme")
+    async with scheduler.slot("globex"):
+        pass
+
+    assert error.value.status_code == 429
+    assert 0 < error.value.retry_after <= 1
+
+
+async def test_slow_queue_sheds_only_tenants_already_waiting():
+    scheduler = _scheduler(target_wait_ms=10)
+    scheduler.queue_delay_ms = 50
+
+    running = asyncio.create_task(_run(scheduler, "big", [], hold=0.05))
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(_run(scheduler, "big", []))
+    await asyncio.sleep(0)
+    with pytest.raises(TenantOverloadedError) as error:
+        await scheduler.acquire("big")
+    small = asyncio.create_task(_run(scheduler, "small", []))
+    await asyncio.gather(running, queued, small)
+
+    assert error.value.status_code == 503 and error.value.retry_after >= 1
+    assert scheduler.stats()["shed"] == 1
+    assert scheduler.stats()["admitted"] == 3
+
+
+async def test_cancelled_waiters_give_up_their_place():
+    scheduler = _scheduler()
+
+    running = asyncio.create_task(_run(scheduler, "acme", [], hold=0.02))
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(_run(scheduler, "acme", []))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    await asyncio.gather(running, waiting, return_exceptions=True)
+
+    assert scheduler.stats()["running"] == 0 and scheduler.stats()["waiting"] == 0
+
+
+async def test_rate_limits_on_protected_routes_are_per_organization(client):
+    from app.core.admission import tenant_scheduler
+
+    remaining = []
+    for name in ("fairone", "fairtwo"):
+        credentials = {"email": f"admin@{name}.com", "password": "strongpassword123"}
+        await client.post("/api/v1/org/create", json={"organization_name": name, **credentials})
+        token = (await client.post("/api/v1/admin/login", json=credentials)).json()["access_token"]
+        response = await client.get(
+            "/api/v1/org/export",
+            params={"organization_name": name},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 200
+        remaining.append(response.headers["X-RateLimit-Remaining"])
+
+    # Both organizations call from the same address but have their own limit
+    assert remaining[0] == remaining[1]
+    assert tenant_scheduler.stats()["running"] == 0
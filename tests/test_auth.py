@@ -1,47 +1,62 @@
-def test_create_org(test_app):
-    # Depending on whether the DB is mocked or real, this might fail if DB is not running.
-    # Assuming the strategy is integration test with a running DB (lifespan in main.py handles connection).
-    # Since we are using TestClient(app), the lifespan events (startup) will run.
-    
-    # We need a unique org name to avoid collision if running multiple times on real DB
-    import uuid
-    org_name = f"testorg{uuid.uuid4().hex[:8]}"
-    
+async def test_create_org(client):
     payload = {
-        "organization_name": org_name,
-        "email": f"admin@{org_name}.com",
+        "organization_name": "testorg",
+        "email": "admin@testorg.com",
         "password": "strongpassword123"
     }
-    
-    response = test_app.post("/api/v1/org/create", json=payload)
+
+    response = await client.post("/api/v1/org/create", json=payload)
     assert response.status_code == 201, response.text
     data = response.json()
-    assert data["organization_name"] == org_name
+    assert data["organization_name"] == "testorg"
     assert "collection_name" in data
 
-def test_admin_login(test_app):
-    # We need to create an org first to login, or assume one exists.
-    # Ideally tests should be isolated.
-    # Let's create one first.
-    import uuid
-    org_name = f"testorglogin{uuid.uuid4().hex[:8]}"
-    email = f"admin@{org_name}.com"
+async def test_admin_login(client):
+    email = "admin@testorglogin.com"
     password = "strongpassword123"
-    
-    test_app.post("/api/v1/org/create", json={
-        "organization_name": org_name,
+
+    await client.post("/api/v1/org/create", json={
+        "organization_name": "testorglogin",
         "email": email,
         "password": password
     })
-    
-    # Now try to login
+
     login_payload = {
         "email": email,
         "password": password
     }
-    
-    response = test_app.post("/api/v1/admin/login", json=login_payload)
+
+    response = await client.post("/api/v1/admin/login", json=login_payload)
     assert response.status_code == 200
     data = response.json()
     assert "access_token" in data
     assert data["token_type"] == "bearer"
+    assert response.headers["X-RateLimit-Limit"] == "5"
+
+
+async def test_login_upgrades_weaker_hashes(memory_db, monkeypatch):
+    from app.core.hashing import PasswordHasher
+    from app.db.mongodb import db
+    from app.models.auth import AdminLogin
+    from app.services import auth_service
+    from app.services.auth_service import AuthService
+
+    hasher = PasswordHasher(kind="thread", max_workers=1)
+    monkeypatch.setattr(auth_service, "password_hasher", hasher)
+    login = AdminLogin(email="admin@rehash.com", password="strongpassword123")
+
+    try:
+        hasher.set_rounds(4)
+        organizations = db.get_master_database()["organizations"]
+        await organizations.insert_one({
+            "organization_name": "rehash",
+            "admin_email": login.email,
+            "hashed_password": await hasher.hash(login.password),
+        })
+        hasher.set_rounds(5)
+        await AuthService.authenticate_admin(login)
+        upgraded = (await organizations.find_one({"organization_name": "rehash"}))["hashed_password"]
+    finally:
+        hasher.shutdown()
+    assert upgraded.split("$")[2] == "05"
+    assert not hasher.needs_rehash(upgraded)
@@ -0,0 +1,84 @@
+import asyncio
+
+from app.core.cache import AsyncTTLCache
+
+
+async def test_concurrent_misses_share_one_load():
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"organization_name": "acme"}
+
+    results = await asyncio.gather(*(cache.get_or_load("acme", loader) for _ in range(10)))
+
+    assert len(calls) == 1
+    assert all(r == {"organization_name": "acme"} for r in results)
+    assert cache.stats()["coalesced"] == 9
+
+
+async def test_cancelled_caller_does_not_fail_coalesced_waiters():
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+    release = asyncio.Event()
+
+    async def loader():
+        await release.wait()
+        return "acme"
+
+    leader = asyncio.create_task(cache.get_or_load("acme", loader))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_load("acme", loader))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await waiter == "acme"
+    assert leader.cancelled()
+    assert cache.get("acme") == "acme"
+
+
+def test_entries_expire_and_evict_least_recently_used():
+    cache = AsyncTTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    expired = AsyncTTLCache(max_size=2, ttl=0)
+    expired.set("a", 1)
+    assert expired.get("a") is None
+
+
+async def test_invalidation_during_load_is_not_overwritten():
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        return "stale"
+
+    load = asyncio.create_task(cache.get_or_load("acme", loader))
+    await asyncio.sleep(0)
+    cache.invalidate("acme")
+
+    assert await load == "stale"
+    assert cache.get("acme") is None
+
+
+async def test_missing_values_are_not_cached():
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return None
+
+    await cache.get_or_load("ghost", loader)
+    await cache.get_or_load("ghost", loader)
+
+    assert len(calls) == 2
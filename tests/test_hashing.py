@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.core.hashing import HasherOverloadedError, PasswordHasher
+
+
+async def test_hash_and_verify_on_pool():
+    hasher = PasswordHasher(kind="thread", max_workers=2, max_pending=4)
+
+    try:
+        hashed = await hasher.hash("strongpassword123")
+        assert await hasher.verify("strongpassword123", hashed)
+        assert not await hasher.verify("wrongpassword", hashed)
+    finally:
+        hasher.shutdown()
+
+    stats = hasher.stats()
+    assert stats["completed"] == 3
+    assert stats["in_flight"] == 0
+    assert stats["queue_depth"] == 0
+
+
+async def test_hasher_sheds_load_when_queue_is_full():
+    hasher = PasswordHasher(kind="thread", max_workers=1, max_pending=1)
+
+    try:
+        results = await asyncio.gather(
+            *(hasher.hash("strongpassword123") for _ in range(4)),
+            return_exceptions=True,
+        )
+    finally:
+        hasher.shutdown()
+
+    rejected = [r for r in results if isinstance(r, HasherOverloadedError)]
+    assert len(rejected) == 2
+    assert hasher.stats()["rejected"] == 2
+
+
+def test_unknown_pool_kind_is_rejected():
+    with pytest.raises(ValueError):
+        PasswordHasher(kind="fiber")
+
+
+async def test_hash_many_is_not_shed():
+    hasher = PasswordHasher(kind="thread", max_workers=1, max_pending=1)
+    passwords = [f"strongpassword{i}" for i in range(4)]
+
+    try:
+        hashes = await hasher.hash_many(passwords)
+        assert [await hasher.verify(p, h) for p, h in zip(passwords, hashes)] == [True] * 4
+    finally:
+        hasher.shutdown()
+    assert hasher.stats()["rejected"] == 0
+
+
+async def test_calibration_stays_within_bounds_and_sets_the_policy():
+    hasher = PasswordHasher(kind="thread", max_workers=1)
+
+    try:
+        fast = await hasher.calibrate(target_ms=0.001, min_rounds=5, max_rounds=6)
+        assert fast == hasher.rounds == 5
+        slow = await hasher.calibrate(target_ms=60_000, min_rounds=5, max_rounds=6)
+        assert slow == hasher.rounds == 6
+        hashed = await hasher.hash("strongpassword123")
+    finally:
+        hasher.shutdown()
+    assert hashed.split("$")[2] == "06"
+
+
+async def test_only_weaker_hashes_need_a_rehash():
+    hasher = PasswordHasher(kind="thread", max_workers=1)
+
+    try:
+        hasher.set_rounds(4)
+        weak = await hasher.hash("strongpassword123")
+        hasher.set_rounds(6)
+        strong = await hasher.hash("strongpassword123")
+        hasher.set_rounds(5)
+    finally:
+        hasher.shutdown()
+    assert hasher.needs_rehash(weak)
+    assert not hasher.needs_rehash(strong)
+
+
+async def test_dummy_verification_costs_a_verification_and_fails():
+    hasher = PasswordHasher(kind="thread", max_workers=1)
+    hasher.set_rounds(4)
+
+    try:
+        assert await hasher.verify_dummy("strongpassword123") is False
+    finally:
+        hasher.shutdown()
+    # One hash for the dummy itself, one verification against it
+    assert hasher.stats()["completed"] == 2
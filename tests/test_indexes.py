@@ -0,0 +1,14 @@
+from app.db.indexes import _plan_stages
+
+
+def test_plan_stages_finds_index_scans_in_nested_plans():
+    classic = {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+    assert _plan_stages(classic) == {"LIMIT", "FETCH", "IXSCAN"}
+
+    sbe = {"queryPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}, "slotBasedPlan": {"slots": "..."}}
+    assert "IXSCAN" in _plan_stages(sbe)
+
+
+def test_plan_stages_reports_collection_scans():
+    plan = {"stage": "SUBPLAN", "inputStages": [{"stage": "COLLSCAN"}, {"stage": "IXSCAN"}]}
+    assert "COLLSCAN" in _plan_stages(plan)
@@ -0,0 +1,122 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.db.indexes import JOB_INDEXES
+from app.db.mongodb import db
+from app.models.job import JobStatus, JobType
+from app.services.job_service import JobRunner, JobService
+
+
+@pytest.fixture
+async def mock_db(memory_db, monkeypatch):
+    await db.get_master_database()["jobs"].create_indexes(JOB_INDEXES)
+    yield db
+
+
+async def test_only_one_active_job_per_organization(mock_db):
+    await JobService.enqueue(JobType.RENAME, "Acme", {})
+    with pytest.raises(HTTPException) as exc:
+        await JobService.enqueue(JobType.DELETE, "acme", {})
+    assert exc.value.status_code == 409
+
+    job = await JobService.claim(["rename"], "worker-1")
+    await JobService.finish(job["_id"], "worker-1", result={})
+    # Finished jobs release the organization
+    await JobService.enqueue(JobType.DELETE, "Acme", {})
+
+
+async def test_expired_lease_is_reclaimed_by_another_worker(mock_db):
+    queued = await JobService.enqueue(JobType.DELETE, "Acme", {})
+    first = await JobService.claim(["delete"], "worker-1")
+    assert first["_id"] == queued.job_id
+    assert await JobService.claim(["delete"], "worker-2") is None
+
+    await db.get_master_database()["jobs"].update_one(
+        {"_id": first["_id"]},
+        {"$set": {"lease_expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}},
+    )
+    second = await JobService.claim(["delete"], "worker-2")
+    assert second["owner"] == "worker-2"
+    assert second["attempts"] == 2
+
+
+async def test_runner_caps_concurrency_per_job_type(mock_db, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_CONCURRENCY", {"rename": 1, "delete": 2})
+    monkeypatch.setattr(settings, "JOB_POLL_INTERVAL_SECONDS", 0.01)
+    running = {"rename": 0, "delete": 0}
+    peak = {"rename": 0, "delete": 0}
+    jobs = db.get_master_database()["jobs"]
+
+    async def handler(job, report):
+        running[job["type"]] += 1
+        peak[job["type"]] = max(peak[job["type"]], running[job["type"]])
+        await asyncio.sleep(0.02)
+        running[job["type"]] -= 1
+        return {}
+
+    runner = JobRunner()
+    runner.register(JobType.RENAME, handler)
+    runner.register(JobType.DELETE, handler)
+    for i in range(3):
+        await JobService.enqueue(JobType.RENAME, f"rename{i}", {})
+        await JobService.enqueue(JobType.DELETE, f"delete{i}", {})
+    await runner.start()
+    for _ in range(200):
+        if await jobs.count_documents({"status": JobStatus.SUCCEEDED.value}) == 6:
+            break
+        await asyncio.sleep(0.01)
+    await runner.stop()
+
+    assert await jobs.count_documents({"status": JobStatus.SUCCEEDED.value}) == 6
+    assert peak == {"rename": 1, "delete": 2}
+
+
+async def test_runner_stops_a_job_whose_lease_was_lost(mock_db, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 0.03)
+    started, stopped = asyncio.Event(), asyncio.Event()
+
+    async def handler(job, report):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        finally:
+            stopped.set()
+
+    runner = JobRunner()
+    runner.register(JobType.RENAME, handler)
+    await JobService.enqueue(JobType.RENAME, "Acme", {})
+    job = await JobService.claim(["rename"], runner.owner)
+    execution = asyncio.create_task(runner._execute(job))
+    await started.wait()
+    # Another runner took the job over
+    await db.get_master_database()["jobs"].update_one({"_id": job["_id"]}, {"$set": {"owner": "worker-2"}})
+
+    await asyncio.wait_for(stopped.wait(), 1)
+    await execution
+    stored = await db.get_master_database()["jobs"].find_one({"_id": job["_id"]})
+    assert stored["status"] == JobStatus.RUNNING.value and stored["owner"] == "worker-2"
+
+
+async def test_jobs_are_not_visible_to_a_later_organization_of_the_same_name(client):
+    first = {"email": "admin@acme.com", "password": "strongpassword123"}
+    await client.post("/api/v1/org/create", json={"organization_name": "acme", **first})
+    token = (await client.post("/api/v1/admin/login", json=first)).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    job = (await client.delete("/api/v1/org/delete", params={"organization_name": "acme"}, headers=headers)).json()
+    for _ in range(100):
+        response = await client.get(f"/api/v1/org/jobs/{job['job_id']}", headers=headers)
+        if response.json()["status"] == JobStatus.SUCCEEDED.value:
+            break
+        await asyncio.sleep(0.05)
+    # The deleted organization's admin can still poll its job to the end
+    assert response.json()["status"] == JobStatus.SUCCEEDED.value
+
+    second = {"email": "owner@acme.com", "password": "strongpassword123"}
+    await client.post("/api/v1/org/create", json={"organization_name": "Acme", **second})
+    token = (await client.post("/api/v1/admin/login", json=second)).json()["access_token"]
+    response = await client.get(f"/api/v1/org/jobs/{job['job_id']}", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 404
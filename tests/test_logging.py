@@ -0,0 +1,98 @@
+import json
+import logging
+import queue
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.logging import ContextFilter, JsonFormatter, NonBlockingQueueHandler, log_context
+from app.core.request_context import RequestContextMiddleware, span
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.addFilter(ContextFilter())
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def capture(monkeypatch):
+    """
+    Capture a logger's INFO and above, whether or not setup_logging has run
+    in this process: the level is set here and nothing propagates to root.
+    """
+    monkeypatch.setattr(settings, "LOG_SAMPLE_RATE", 1.0)
+    attached = []
+
+    def attach(name):
+        logger, handler = logging.getLogger(name), CaptureHandler()
+        attached.append((logger, handler, logger.level))
+        monkeypatch.setattr(logger, "propagate", False)
+        monkeypatch.setattr(logger, "disabled", False)
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        return logger, handler
+
+    yield attach
+    for logger, handler, level in attached:
+        logger.removeHandler(handler)
+        logger.setLevel(level)
+
+
+def test_unsampled_requests_keep_only_warnings(capture):
+    logger, handler = capture("tests.sampling")
+    token = log_context.set({"request_id": "abc", "route": "GET /x", "sampled": False})
+    try:
+        logger.info("dropped %s", "lazily")
+        logger.warning("kept for %s", "acme", extra={"status": 503})
+    finally:
+        log_context.reset(token)
+
+    assert [record.levelno for record in handler.records] == [logging.WARNING]
+    entry = json.loads(JsonFormatter().format(handler.records[0]))
+    assert entry["msg"] == "kept for acme"
+    assert entry["request_id"] == "abc" and entry["route"] == "GET /x" and entry["status"] == 503
+    assert "sampled" not in entry
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    first = logging.makeLogRecord({"msg": "one %s", "args": ("arg",)})
+    handler.handle(first)
+    handler.handle(logging.makeLogRecord({"msg": "two"}))
+
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait() is first
+    assert first.args == ("arg",)  # Left for the listener thread to format
+
+
+def test_middleware_logs_route_template_and_spans(capture):
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        with span("db.find"):
+            pass
+        with span("db.find"):
+            pass
+        return {"item_id": item_id}
+
+    _, handler = capture("app.access")
+    with TestClient(app) as client:
+        echoed = client.get("/items/1", headers={"X-Request-ID": "req-1"})
+        generated = client.get("/items/2")
+
+    assert echoed.headers["X-Request-ID"] == "req-1"
+    assert len(generated.headers["X-Request-ID"]) == 32
+    entry = json.loads(JsonFormatter().format(handler.records[0]))
+    assert entry["request_id"] == "req-1"
+    assert entry["route"] == "GET /items/{item_id}"
+    assert entry["status"] == 200
+    assert list(entry["spans"]) == ["db.find"]
@@ -0,0 +1,34 @@
+from app.core.metrics import MetricsRegistry
+
+
+def test_render_counters_histograms_and_callbacks():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(1, 10))
+    registry.register_callback("queue_depth", "Queued calls", lambda: {("a\"b",): 3}, ("pool",))
+
+    requests.labels("/x").inc()
+    requests.labels("/x").inc(2)
+    for value_ms in (0.5, 5, 50):
+        latency.observe(value_ms)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/x"} 3' in lines
+    assert 'latency_seconds_bucket{le="0.001"} 1' in lines
+    assert 'latency_seconds_bucket{le="0.01"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_count 3" in lines
+    assert 'queue_depth{pool="a\\"b"} 3' in lines
+    assert registry.counter("requests_total", "Requests", ("route",)) is requests
+
+
+async def test_metrics_endpoint_reports_requests_by_route(client):
+    await client.get("/")
+    await client.get("/no-such-page")
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in response.text
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in response.text
+    assert 'route="/metrics"' not in response.text
@@ -0,0 +1,101 @@
+import pytest
+
+from app.core.config import settings
+from app.db.mongodb import db
+from app.models.migration import MigrationProgress
+from app.services.migration_service import MigrationConflictError, TenantMigrationService
+
+
+@pytest.fixture
+def mock_db(memory_db, monkeypatch):
+    monkeypatch.setattr(settings, "MIGRATION_BATCH_SIZE", 10)
+    yield db
+
+
+async def _seed(collection, count):
+    await collection.insert_many([{"_id": i, "value": i} for i in range(count)])
+
+
+async def test_copy_streams_in_batches_and_reports_progress(mock_db):
+    source = db.get_tenant_collection("source")
+    target = db.get_tenant_collection("target")
+    reports = []
+
+    async def on_progress(progress):
+        reports.append(progress.copied)
+
+    await _seed(source, 25)
+    progress = await TenantMigrationService.migrate(source, target, on_progress, strategy="copy")
+    await TenantMigrationService.finalize(progress, source, target)
+
+    assert progress.strategy == "copy"
+    assert progress.batches == 3
+    assert reports == [10, 20, 25]
+    assert await target.count_documents({}) == 25
+    assert "org_source" not in await db.get_master_database().list_collection_names()
+    assert await TenantMigrationService.list_interrupted() == []
+
+
+async def test_interrupted_copy_resumes_from_checkpoint(mock_db):
+    source = db.get_tenant_collection("source")
+    target = db.get_tenant_collection("target")
+
+    async def crash_after_first_batch(progress):
+        raise RuntimeError("worker died")
+
+    await _seed(source, 25)
+    with pytest.raises(RuntimeError):
+        await TenantMigrationService.migrate(source, target, crash_after_first_batch, strategy="copy")
+    assert len(await TenantMigrationService.list_interrupted()) == 1
+
+    # Even with the fast paths allowed, the checkpoint forces a resumed copy.
+    progress = await TenantMigrationService.migrate(source, target, strategy="auto")
+
+    assert progress.resumed
+    assert progress.strategy == "copy"
+    assert progress.copied == 25
+    assert progress.batches == 2
+    assert await target.count_documents({}) == 25
+
+
+async def test_rename_fast_path_moves_collection_server_side(mock_db):
+    source = db.get_tenant_collection("source")
+    target = db.get_tenant_collection("target")
+
+    await _seed(source, 5)
+    progress = await TenantMigrationService.migrate(source, target, strategy="auto")
+    await TenantMigrationService.finalize(progress, source, target)
+
+    assert progress.strategy == "rename"
+    assert await target.count_documents({}) == 5
+    assert await source.count_documents({}) == 0
+
+
+async def test_empty_tenant_migrates_without_placeholder_documents(mock_db):
+    source = db.get_tenant_collection("empty")
+    target = db.get_tenant_collection("empty_renamed")
+
+    await db.provision_collection(source)
+    progress = await TenantMigrationService.migrate(source, target, strategy="copy")
+    await TenantMigrationService.finalize(progress, source, target)
+
+    names = await db.get_master_database().list_collection_names()
+    assert "org_empty_renamed" in names and "org_empty" not in names
+    assert await target.count_documents({}) == 0
+
+
+async def test_migration_refuses_a_target_it_did_not_create(mock_db):
+    source = db.get_tenant_collection("source")
+    target = db.get_tenant_collection("taken")
+    await _seed(source, 3)
+    await target.insert_one({"_id": "other", "owner": "another tenant"})
+
+    for strategy in ("auto", "out", "copy"):
+        with pytest.raises(MigrationConflictError):
+            await TenantMigrationService.migrate(source, target, strategy=strategy)
+    progress = MigrationProgress(source=source.full_name, target=target.full_name, strategy="out")
+    await TenantMigrationService.rollback(progress, source, target)
+
+    assert await target.find().to_list(length=None) == [{"_id": "other", "owner": "another tenant"}]
+    assert await source.count_documents({}) == 3
+    assert await TenantMigrationService.list_interrupted() == []
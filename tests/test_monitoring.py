@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from pymongo import monitoring
+
+from app.core.metrics import metrics
+from app.db.monitoring import CommandMonitor, LatencyHistogram, PoolMonitor, mongodb_command_duration, pool_monitor
+
+ADDRESS = ("localhost", 27017)
+
+
+def test_histogram_buckets_and_percentiles():
+    histogram = LatencyHistogram(buckets=(1, 10, 100))
+    for value in (0.5, 5, 5, 50, 500):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"1": 1, "10": 2, "100": 1, "+Inf": 1}
+    assert snapshot["count"] == 5
+    assert histogram.percentile(50) == 10
+    assert histogram.percentile(99) == float("inf")
+
+
+def test_pool_monitor_tracks_in_use_and_checkout_wait():
+    monitor = PoolMonitor()
+    monitor.connection_created(monitoring.ConnectionCreatedEvent(ADDRESS, 1))
+    monitor.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(ADDRESS))
+    assert monitor.waiting == 1
+    monitor.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 1, 0.004))
+    stats = monitor.stats()
+    assert stats["in_use"] == 1 and stats["waiting"] == 0 and stats["open_connections"] == 1
+    assert stats["checkout_wait"]["count"] == 1
+
+    monitor.connection_checked_in(monitoring.ConnectionCheckedInEvent(ADDRESS, 1))
+    assert monitor.stats()["in_use"] == 0
+
+
+def test_pool_clears_are_counted_and_exported():
+    def exported():
+        line = next(line for line in metrics.render().splitlines() if line.startswith("mongodb_pool_clears_total "))
+        return float(line.split()[1])
+
+    before = exported()
+    pool_monitor.pool_cleared(monitoring.PoolClearedEvent(ADDRESS))
+
+    assert pool_monitor.stats()["pool_clears"] >= 1
+    assert exported() == before + 1
+
+
+def test_command_monitor_records_latency_per_command():
+    monitor = CommandMonitor()
+    event = monitoring.CommandSucceededEvent(
+        duration=timedelta(milliseconds=2.5), reply={"ok": 1}, command_name="find", request_id=1,
+        connection_id=ADDRESS, operation_id=1,
+    )
+    monitor.succeeded(event)
+    stats = monitor.stats()["commands"]["find"]
+    assert stats["count"] == 1
+    assert stats["avg_ms"] == 2.5
+
+
+def test_command_monitor_labels_latency_by_collection():
+    monitor = CommandMonitor()
+    for request_id, collection in enumerate(("organizations", "org_acme", "org_globex"), start=10):
+        monitor.started(monitoring.CommandStartedEvent(
+            {"find": collection, "filter": {}}, "master_metadata", request_id, ADDRESS, 1,
+        ))
+        monitor.succeeded(monitoring.CommandSucceededEvent(
+            duration=timedelta(milliseconds=1), reply={"ok": 1}, command_name="find", request_id=request_id,
+            connection_id=ADDRESS, operation_id=1,
+        ))
+    assert mongodb_command_duration.labels("find", "organizations").count >= 1
+    assert mongodb_command_duration.labels("find", "tenant").count >= 2
+    assert not monitor._collections
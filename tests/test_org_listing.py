@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.db.mongodb import db
+from app.models.org import ORG_STATUS_DELETING
+from app.services.org_service import OrganizationService
+
+
+@pytest.fixture
+def mock_db(memory_db, monkeypatch):
+    monkeypatch.setattr(settings, "ORG_LIST_BATCH_SIZE", 2)
+    yield db
+
+
+async def _seed(names):
+    created = datetime(2024, 1, 1)
+    await db.get_master_database()["organizations"].insert_many([
+        {
+            "organization_name": name,
+            "collection_name": f"org_{name}",
+            "hashed_password": "secret",
+            # Two organizations per timestamp, so pages must break ties on _id
+            "created_at": created + timedelta(seconds=index // 2),
+        }
+        for index, name in enumerate(names)
+    ])
+
+
+async def _pages(limit, order="name", prefix=None):
+    pages, cursor = [], None
+    while True:
+        orgs = [org async for org in OrganizationService.list_organizations(limit + 1, cursor, prefix, order)]
+        pages.append(orgs[:limit])
+        if len(orgs) <= limit:
+            return pages
+        cursor = OrganizationService.encode_cursor(orgs[limit - 1], order)
+
+
+async def test_keyset_pages_cover_every_organization_once(mock_db):
+    names = ["delta", "alpha", "echo", "charlie", "bravo"]
+
+    await _seed(names)
+    by_name, by_creation = await _pages(2), await _pages(2, order="created_at")
+
+    assert [[org["organization_name"] for org in page] for page in by_name] == [
+        ["alpha", "bravo"], ["charlie", "delta"], ["echo"],
+    ]
+    assert [org["organization_name"] for page in by_creation for org in page] == names
+    assert all("hashed_password" not in org for page in by_name for org in page)
+
+
+async def test_prefix_search_and_deleting_organizations(mock_db):
+    await _seed(["acme", "acme-labs", "acorn", "beta"])
+    await db.get_master_database()["organizations"].update_one(
+        {"organization_name": "acorn"}, {"$set": {"status": ORG_STATUS_DELETING}}
+    )
+
+    pages = await _pages(1, prefix="ac")
+    assert [org["organization_name"] for page in pages for org in page] == ["acme", "acme-labs"]
+
+
+def test_cursor_must_match_order():
+    cursor = OrganizationService.encode_cursor({"organization_name": "acme"}, "name")
+    assert OrganizationService.decode_cursor(cursor, "name") == {"organization_name": {"$gt": "acme"}}
+    for bad in (cursor, "not-a-cursor"):
+        with pytest.raises(HTTPException) as excinfo:
+            OrganizationService.decode_cursor(bad, "created_at")
+        assert excinfo.value.status_code == 400
+
+
+async def test_listing_is_operator_only(client, monkeypatch):
+    monkeypatch.setattr(settings, "OPERATOR_API_KEY", "operator-secret")
+    credentials = {"email": "admin@acme.com", "password": "strongpassword123"}
+    await client.post("/api/v1/org/create", json={"organization_name": "acme", **credentials})
+    token = (await client.post("/api/v1/admin/login", json=credentials)).json()["access_token"]
+
+    # A tenant admin must not see every other tenant
+    response = await client.get("/api/v1/org/list", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+    response = await client.get("/api/v1/org/list", headers={"X-Operator-Key": "operator-secret"})
+    assert response.status_code == 200
+    assert [org["organization_name"] for org in response.json()["items"]] == ["acme"]
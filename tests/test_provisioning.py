@@ -0,0 +1,97 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.db.indexes import ORGANIZATION_INDEXES
+from app.db.mongodb import db
+from app.services.provisioning_service import BulkProvisioningService
+
+
+@pytest.fixture
+async def mock_db(memory_db, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_CREATE_BATCH_SIZE", 2)
+
+    async def fake_hash_many(passwords):
+        return [f"hashed:{password}" for password in passwords]
+
+    monkeypatch.setattr(password_hasher, "hash_many", fake_hash_many)
+    await db.get_master_database()["organizations"].create_indexes(ORGANIZATION_INDEXES)
+    yield db
+
+
+async def chunked(body: bytes, size: int = 7):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def ndjson(*records) -> bytes:
+    return b"\n".join(r if isinstance(r, bytes) else json.dumps(r).encode() for r in records) + b"\n"
+
+
+def org(name, email=None):
+    return {"organization_name": name, "email": email or f"admin@{name}.com", "password": "strongpassword123"}
+
+
+async def test_bulk_create_reports_every_record(mock_db):
+    body = ndjson(
+        org("alpha"),
+        b"{not json",
+        org("beta", "not-an-email"),
+        org("ALPHA", "other@alpha.com"),
+        org("gamma"),
+        b"",
+        org("existing"),
+    )
+
+    await db.get_master_database()["organizations"].insert_one(
+        {"organization_name": "existing", "admin_email": "x@existing.com", "collection_name": "org_existing"}
+    )
+    records, failures = await BulkProvisioningService.parse(chunked(body))
+    results = [r async for r in BulkProvisioningService.provision(records)]
+
+    assert [(f.line, f.error.split(":")[0]) for f in failures] == [
+        (2, "Invalid JSON"),
+        (3, "email"),
+        (4, "Duplicate name earlier in this import"),
+    ]
+    assert [(r.line, r.status) for r in results] == [(1, "created"), (5, "created"), (7, "failed")]
+    assert results[2].error == "Organization with this name already exists"
+
+    tenant_names = await db.get_master_database().list_collection_names()
+    assert {"org_alpha", "org_gamma"} <= set(tenant_names)
+    assert await db.get_master_database()["organizations"].count_documents({}) == 3
+
+
+async def test_bulk_create_rejects_oversized_imports(mock_db, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_CREATE_MAX_RECORDS", 2)
+    with pytest.raises(HTTPException) as exc:
+        await BulkProvisioningService.parse(chunked(ndjson(org("a"), org("b"), org("c"))))
+    assert exc.value.status_code == 413
+
+
+async def test_bulk_create_caps_line_length(mock_db, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_CREATE_MAX_LINE_BYTES", 100)
+    unterminated = json.dumps(org("a")).encode() + b" " * 200
+    with pytest.raises(HTTPException) as exc:
+        await BulkProvisioningService.parse(chunked(ndjson(org("b")) + unterminated))
+    assert exc.value.status_code == 400 and exc.value.detail.startswith("Line 2 ")
+
+
+async def test_bulk_create_is_operator_only(client, monkeypatch):
+    monkeypatch.setattr(settings, "OPERATOR_API_KEY", "operator-secret")
+    body = ndjson(org("alpha"))
+    headers = {"Content-Type": "application/x-ndjson"}
+
+    for key in (None, "wrong"):
+        response = await client.post(
+            "/api/v1/org/bulk-create", content=body, headers={**headers, **({"X-Operator-Key": key} if key else {})}
+        )
+        assert response.status_code == 403
+    response = await client.post(
+        "/api/v1/org/bulk-create", content=body, headers={**headers, "X-Operator-Key": "operator-secret"}
+    )
+    assert response.status_code == 200
+    assert json.loads(response.text.splitlines()[0])["status"] == "created"
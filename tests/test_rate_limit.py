@@ -0,0 +1,125 @@
+import random
+import threading
+
+import mongomock
+import pytest
+
+from app.db.rate_limits import MongoCounterStorage
+
+LIMIT = 200
+EXPIRY = 3600
+
+
+@pytest.fixture(autouse=True)
+def mongomock_bulk_write(monkeypatch):
+    # mongomock's bulk_write predates pymongo 4.9's UpdateOne; apply the
+    # operations one by one instead.
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        for request in requests:
+            self.update_one(request._filter, request._doc, upsert=request._upsert)
+
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", bulk_write)
+
+
+def make_worker(client, sync_interval=0.0):
+    return MongoCounterStorage("counters+mongodb://localhost", sync_interval=sync_interval, client=client)
+
+
+def test_write_through_holds_limit_across_workers():
+    client = mongomock.MongoClient()
+    workers = [make_worker(client) for _ in range(3)]
+
+    admitted = sum(
+        workers[i % 3].acquire_sliding_window_entry("login/1.2.3.4", 10, EXPIRY) for i in range(30)
+    )
+
+    assert admitted == 10
+    previous, _, current, _ = workers[0].get_sliding_window("login/1.2.3.4", EXPIRY)
+    assert (previous, current) == (0, 10)
+
+
+def test_rejections_after_the_limit_skip_the_round_trip():
+    worker = make_worker(mongomock.MongoClient())
+    for _ in range(5):
+        worker.acquire_sliding_window_entry("k", 5, EXPIRY)
+    round_trips = worker.round_trips
+
+    assert not worker.acquire_sliding_window_entry("k", 5, EXPIRY)
+    assert worker.round_trips == round_trips
+
+
+@pytest.mark.parametrize("worker_count", [2, 4])
+def test_batched_workers_stay_within_global_limit(worker_count):
+    """
+    Load test: worker_count workers with their own sync threads take hits
+    concurrently. Error bound: with the worker count known, the global limit
+    is never exceeded, and the last few requests are still admitted through
+    the round-trip fallback.
+    """
+    client = mongomock.MongoClient()
+    workers = [make_worker(client, sync_interval=0.01) for _ in range(worker_count)]
+    admitted = [0] * worker_count
+
+    # Register every worker before the burst, as running replicas would be
+    for worker in workers:
+        worker.live_workers = worker._heartbeat(0) or 1
+    for worker in workers:
+        worker.sync()
+
+    def run(index):
+        rng = random.Random(index)
+        for _ in range(LIMIT):
+            if workers[index].acquire_sliding_window_entry("get/10.0.0.1", LIMIT, EXPIRY):
+                admitted[index] += 1
+            if rng.random() < 0.1:
+                threading.Event().wait(0.001)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(worker_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for worker in workers:
+        worker.close()
+
+    total = sum(admitted)
+    assert LIMIT * 0.95 <= total <= LIMIT
+    stored = client["master_metadata"]["rate_limits"].find_one({"_id": {"$regex": "^get/10.0.0.1/"}})
+    assert stored["count"] == total
+    # Batching saves most of the per-hit round trips
+    assert sum(w.round_trips for w in workers) < total
+
+
+async def test_offloaded_limiter_keeps_storage_calls_off_the_event_loop(monkeypatch):
+    from fastapi import FastAPI, Request, Response
+    from httpx import ASGITransport, AsyncClient
+    from slowapi.errors import RateLimitExceeded
+    from slowapi.util import get_remote_address
+    from slowapi import _rate_limit_exceeded_handler
+
+    from app.db.rate_limits import OffloadedLimiter
+
+    limiter = OffloadedLimiter(key_func=get_remote_address, headers_enabled=True, storage_uri="memory://")
+    storage_threads = set()
+    incr = type(limiter._storage).incr
+
+    def tracked_incr(self, *args, **kwargs):
+        storage_threads.add(threading.get_ident())
+        return incr(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(limiter._storage), "incr", tracked_incr)
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+    @app.get("/ping")
+    @limiter.limit("2/minute")
+    async def ping(request: Request, response: Response):
+        return {"ok": True}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        responses = [await client.get("/ping") for _ in range(3)]
+
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[1].headers["X-RateLimit-Remaining"] == "0"
+    assert storage_threads and threading.get_ident() not in storage_threads
@@ -0,0 +1,149 @@
+import pytest
+from bson.timestamp import Timestamp
+from mongomock_motor import AsyncMongoMockClient
+
+from app.core.hashing import PasswordHasher
+from app.db.consistency import read_preference
+from app.db.mongodb import db
+from app.db.org_cache import org_cache
+from app.models.auth import AdminLogin
+from app.models.org import OrgCreate, OrgUpdate
+from app.services import auth_service
+from app.services.auth_service import AuthService
+from app.services.org_service import OrganizationService
+
+WRITES = {"insert_one", "insert_many", "update_one", "update_many", "delete_one", "delete_many", "find_one_and_update"}
+READS = {"find_one", "find"}
+
+
+class StandInSession:
+    def __init__(self):
+        self.cluster_time = None
+        self.operation_time = None
+
+    def advance_cluster_time(self, cluster_time):
+        self.cluster_time = cluster_time
+
+    def advance_operation_time(self, operation_time):
+        if self.operation_time is None or operation_time > self.operation_time:
+            self.operation_time = operation_time
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class ReplicaSetStandIn:
+    """
+    mongomock posing as a replica set with sessions. Writes in a session
+    advance its operation time like a primary's reply would, and reads
+    record where they were routed and the afterClusterTime they would send.
+    """
+
+    def __init__(self):
+        self.inner = AsyncMongoMockClient()
+        self.time = 0
+        self.reads = []
+
+    async def start_session(self, causal_consistency=False):
+        return StandInSession()
+
+    def get_database(self, name, read_preference=None):
+        return _Database(self, self.inner[name], read_preference)
+
+    def __getitem__(self, name):
+        return _Database(self, self.inner[name], None)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+class _Database:
+    def __init__(self, client, inner, read_preference):
+        self.client, self.inner, self.read_preference = client, inner, read_preference
+
+    def __getitem__(self, name):
+        return _Collection(self.client, self.inner[name], self.read_preference)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+class _Collection:
+    def __init__(self, client, inner, read_preference):
+        self.client, self.inner, self.read_preference = client, inner, read_preference
+
+    def __getattr__(self, name):
+        method = getattr(self.inner, name)
+        if name not in WRITES | READS:
+            return method
+
+        def call(*args, session=None, **kwargs):
+            if name in WRITES and session is not None:
+                self.client.time += 1
+                session.operation_time = Timestamp(self.client.time, 0)
+            if name in READS:
+                after = session.operation_time if session is not None else None
+                self.client.reads.append((self.inner.name, self.read_preference, after))
+            return method(*args, **kwargs)
+
+        return call
+
+
+@pytest.fixture
+def replica_set(monkeypatch):
+    standin = ReplicaSetStandIn()
+    hasher = PasswordHasher(kind="thread", max_workers=1)
+    hasher.set_rounds(4)
+    monkeypatch.setattr(auth_service, "password_hasher", hasher)
+    monkeypatch.setattr(db, "client", standin)
+    monkeypatch.setattr(db, "sessions", True)
+    monkeypatch.setattr(db, "transactions", False)
+    monkeypatch.setattr(db, "clock", type(db.clock)())
+    # Opted into, as the default reads from the primary
+    monkeypatch.setattr(db, "stale_reads", read_preference("secondaryPreferred", 90))
+    org_cache.by_name.clear()
+    org_cache.by_email.clear()
+    yield standin
+    hasher.shutdown()
+
+
+def test_read_preference_modes():
+    preference = read_preference("secondaryPreferred", 90)
+    assert preference.mongos_mode == "secondaryPreferred" and preference.max_staleness == 90
+    assert read_preference("nearest").max_staleness == -1
+    with pytest.raises(ValueError):
+        read_preference("fastest")
+
+
+async def test_reads_after_writes_are_causally_consistent(replica_set):
+    login = AdminLogin(email="admin@causal.com", password="strongpassword123")
+
+    await OrganizationService.create_organization(
+        OrgCreate(organization_name="causal", email=login.email, password=login.password)
+    )
+    created = db.clock.operation_time
+    await AuthService.authenticate_admin(login)
+    login_read = replica_set.reads[-1]
+
+    await OrganizationService.update_organization(
+        "causal", OrgUpdate(organization_name="Causal", email=login.email, password=login.password)
+    )
+    renamed = db.clock.operation_time
+    org = await OrganizationService.get_organization("Causal")
+    get_read = replica_set.reads[-1]
+
+    assert org["organization_name"] == "Causal"
+    assert created is not None and renamed > created
+    for read, after in ((login_read, created), (get_read, renamed)):
+        collection, preference, after_cluster_time = read
+        assert collection == "organizations"
+        assert preference.mongos_mode == "secondaryPreferred" and preference.max_staleness == 90
+        assert after_cluster_time == after
+
+
+async def test_stale_reads_need_no_session_before_any_write(replica_set):
+    async with db.read_session() as session:
+        assert session is None
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.db.indexes import ensure_indexes
+from app.db.mongodb import db
+from app.db.tenant_pool import SpareCollectionPool
+from app.models.job import JobType
+from app.models.org import ORG_STATUS_DELETING, OrgCreate
+from app.services.job_service import JobService
+from app.services.org_service import OrganizationService
+from app.services.recovery_service import IntentService, Reconciler
+
+
+@pytest.fixture
+def mock_db(memory_db, monkeypatch):
+    monkeypatch.setattr(db, "spares", SpareCollectionPool(db, size=0))
+    monkeypatch.setattr(settings, "RECONCILE_BATCH_SIZE", 2)
+    yield db
+
+
+def _org(name, **fields):
+    return {
+        "_id": ObjectId(),
+        "organization_name": name,
+        "admin_email": f"admin@{name}.com",
+        "collection_name": f"org_{name}",
+        "placement": db.tenant_placement("collection").assign(name),
+        **fields,
+    }
+
+
+async def _collections():
+    return sorted(name for name in await db.get_master_database().list_collection_names() if name.startswith("org_"))
+
+
+async def test_creates_leave_no_intents(mock_db):
+    await ensure_indexes()
+    data = OrgCreate(organization_name="acme", email="admin@acme.com", password="password123")
+    await OrganizationService.create_organization(data)
+    with pytest.raises(HTTPException):
+        await OrganizationService.create_organization(data)
+
+    assert await db.get_master_database()[IntentService.COLLECTION].count_documents({}) == 0
+
+
+async def test_stale_intents_are_finished_or_rolled_back(mock_db, monkeypatch):
+    monkeypatch.setattr(settings, "INTENT_GRACE_SECONDS", 0)
+    committed, crashed, orphan = _org("committed"), _org("crashed"), _org("orphan")
+    intents = db.get_master_database()[IntentService.COLLECTION]
+    for org in (committed, crashed, orphan):
+        await IntentService.record(org)
+    await db.get_master_database()["organizations"].insert_one(committed)
+    # Died after claiming its collection but before the metadata was written
+    await db.provision_tenant("orphan", orphan["placement"])
+    await intents.update_many({}, {"$set": {"created_at": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+
+    assert await Reconciler().resolve_intents() == 3
+    assert await _collections() == ["org_committed"]
+    assert await intents.count_documents({}) == 0
+
+
+async def test_young_intents_are_left_alone(mock_db):
+    await IntentService.record(_org("inflight"))
+
+    assert await Reconciler().resolve_intents() == 0
+
+
+async def test_deletes_without_a_job_are_requeued(mock_db):
+    orgs = [_org(name, status=ORG_STATUS_DELETING) for name in ("a", "b", "c")]
+    await db.get_master_database()["organizations"].insert_many(orgs)
+    await JobService.enqueue(JobType.DELETE, "b", {"org_id": orgs[1]["_id"]})
+
+    assert await Reconciler().requeue_deletes() == 2
+    jobs = db.get_master_database()[JobService.COLLECTION]
+    assert sorted([job["organization_name"] async for job in jobs.find()]) == ["a", "b", "c"]
+
+
+async def test_orphaned_storage_is_dropped(mock_db):
+    live = _org("live")
+    database_tenant = _org("dbtenant", placement=db.tenant_placement("database").assign("dbtenant"))
+    pending = _org("pending")
+    await db.get_master_database()["organizations"].insert_many([live, database_tenant])
+    await IntentService.record(pending)
+    for org in (live, database_tenant, pending):
+        await db.provision_tenant(org["organization_name"], org["placement"])
+    for name in ("org_ghost1", "org_ghost2", "org_ghost3"):
+        await db.provision_collection(db.get_master_database()[name])
+    ghost_database = db.tenant_placement("database").assign("ghost")
+    await db.provision_tenant("ghost", ghost_database)
+
+    assert await Reconciler().drop_orphans() == 4
+    assert await _collections() == ["org_live", "org_pending"]
+    databases = await db.client.list_database_names()
+    assert database_tenant["placement"]["database"] in databases
+    assert ghost_database["database"] not in databases
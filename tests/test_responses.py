@@ -0,0 +1,13 @@
+import json
+
+from app.core.responses import ModelResponse
+from app.models.org import OrgResponse
+
+
+def test_model_response_renders_the_model_as_json():
+    model = OrgResponse(organization_name="Acme", collection_name="org_acme")
+    response = ModelResponse(model, status_code=202)
+
+    assert response.status_code == 202
+    assert response.headers["content-type"] == "application/json"
+    assert json.loads(response.body) == model.model_dump()
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.db.leader import LeaderLease
+from app.db.mongodb import db
+from app.serve import available_cores, worker_environment
+
+
+@pytest.fixture
+def mock_db(memory_db):
+    yield db
+
+
+@pytest.mark.parametrize("cpu_max, expected", [("max 100000", None), ("150000 100000", 2), ("50000 100000", 1)])
+def test_available_cores_honours_the_cgroup_quota(tmp_path, cpu_max, expected):
+    path = tmp_path / "cpu.max"
+    path.write_text(cpu_max)
+    unlimited = available_cores(str(tmp_path / "missing"))
+
+    assert available_cores(str(path)) == min(unlimited, expected or unlimited)
+
+
+def test_worker_environment_splits_instance_budgets():
+    config = settings.model_copy(update={
+        "MONGO_MAX_POOL_SIZE": 100,
+        "MONGO_MIN_POOL_SIZE": 10,
+        "HASH_POOL_SIZE": None,
+        "HASH_MAX_PENDING": 64,
+        "RATE_LIMIT_ENABLED": True,
+        "RATE_LIMIT_STORAGE": "memory",
+    })
+
+    assert worker_environment(config, workers=1, cores=8) == {"WEB_CONCURRENCY": "1"}
+    assert worker_environment(config, workers=3, cores=8) == {
+        "WEB_CONCURRENCY": "3",
+        "MONGO_MAX_POOL_SIZE": "34",
+        "MONGO_MIN_POOL_SIZE": "3",
+        "HASH_POOL_SIZE": "2",
+        "HASH_MAX_PENDING": "21",
+    }
+
+
+async def test_startup_lease_has_one_holder_until_it_lapses(mock_db):
+    first, second = LeaderLease("startup", 60), LeaderLease("startup", 60)
+    held = [await first.acquire(), await second.acquire(), await first.acquire()]
+    await first.release()
+    held.append(await second.acquire())
+
+    lapsed, successor = LeaderLease("checks", -1), LeaderLease("checks", 60)
+    held += [await lapsed.acquire(), await successor.acquire()]
+
+    assert held == [True, False, True, True, True, True]
+
+
+async def test_workers_wait_for_the_startup_checks(mock_db, monkeypatch):
+    from app import main
+
+    ran = []
+
+    async def check_database(timer):
+        ran.append(timer)
+        if len(ran) == 1:
+            raise RuntimeError("index build failed")
+
+    monkeypatch.setattr(main, "check_database", check_database)
+    monkeypatch.setattr(main, "STARTUP_CHECKS_POLL_SECONDS", 0.01)
+    leader, follower = LeaderLease("startup-test", 60), LeaderLease("startup-test", 60)
+    assert await leader.acquire()
+    waiting = asyncio.create_task(main.await_startup_checks(follower, "follower"))
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+
+    # The leader fails and gives the lease up; the waiting worker runs the checks itself
+    with pytest.raises(RuntimeError):
+        await main.lead_startup_checks(leader, "leader")
+    await asyncio.wait_for(waiting, 1)
+
+    assert ran == ["leader", "follower"]
+    assert await leader.finished()
+    # Later workers see the checks done and do not wait
+    await asyncio.wait_for(main.await_startup_checks(LeaderLease("startup-test", 60), "late"), 1)
+    assert ran == ["leader", "follower"]
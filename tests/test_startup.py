@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Heavy optional modules that `import app.main` must not pull in unless
+# configured to use them. The synchronous pymongo client stays: Motor
+# wraps it; only the rate limit storage built on it is deferred.
+OPTIONAL_MODULES = ("scalar_fastapi", "slowapi", "limits", "app.db.rate_limits")
+
+# Cold start budget, relative to importing the frameworks the app cannot
+# avoid in the same interpreter, so a slow or busy machine slows both
+# sides alike. The app's own imports (its modules, slowapi, zstandard,
+# bcrypt, ...) measured 0.2-0.4 of the frameworks'; this leaves room for
+# noise but fails once they cost about twice what they do now.
+FRAMEWORKS = "fastapi, motor.motor_asyncio, pydantic_settings"
+IMPORT_BUDGET_RATIO = 0.6
+
+
+def _import_app(code: str, **env: str) -> str:
+    environment = {"MONGO_URL": "mongodb://localhost:27017", "SECRET_KEY": "test-secret", **os.environ, **env}
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys; import app.main; {code}"],
+        cwd=ROOT, env=environment, capture_output=True, text=True, check=True,
+    )
+    return result.stdout.strip()
+
+
+def test_app_imports_within_budget():
+    measure = (
+        f"import time; started = time.perf_counter(); import {FRAMEWORKS}; frameworks = time.perf_counter(); "
+        "import app.main; print((time.perf_counter() - frameworks) / (frameworks - started))"
+    )
+    environment = {"MONGO_URL": "mongodb://localhost:27017", "SECRET_KEY": "test-secret", **os.environ}
+    ratios = [
+        float(subprocess.run(
+            [sys.executable, "-c", measure], cwd=ROOT, env=environment, capture_output=True, text=True, check=True,
+        ).stdout)
+        for _ in range(3)
+    ]
+
+    assert min(ratios) < IMPORT_BUDGET_RATIO
+
+
+def test_optional_modules_are_imported_lazily():
+    check = f"print(sorted(m for m in {OPTIONAL_MODULES!r} if m in sys.modules))"
+
+    assert _import_app(check, RATE_LIMIT_STORAGE="memory") == "['limits', 'slowapi']"
+    assert _import_app(check, RATE_LIMIT_ENABLED="false") == "[]"
+    assert _import_app(check, RATE_LIMIT_STORAGE="mongodb") == "['app.db.rate_limits', 'limits', 'slowapi']"
@@ -0,0 +1,168 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.db.indexes import JOB_INDEXES
+from app.db.mongodb import db
+from app.db.placement import SharedCollection
+from app.db.tenant_pool import SpareCollectionPool
+from app.models.org import OrgCreate, OrgUpdate, OrgResponse
+from app.services.org_service import OrganizationService
+
+
+@pytest.fixture
+def mock_db(memory_db, monkeypatch):
+    monkeypatch.setattr(db, "spares", SpareCollectionPool(db, size=3))
+    yield db
+
+
+async def _collection_names():
+    return sorted(await db.get_master_database().list_collection_names())
+
+
+def test_tenant_collection_options_follow_settings(monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_COLLECTION_LAYOUT", "timeseries")
+    monkeypatch.setattr(settings, "TENANT_TIMESERIES_META_FIELD", "device")
+    monkeypatch.setattr(settings, "TENANT_VALIDATOR", {"$jsonSchema": {"bsonType": "object"}})
+    options = db.tenant_collection_options()
+    assert options["timeseries"] == {"timeField": "created_at", "metaField": "device"}
+    assert options["validationLevel"] == "moderate"
+
+    monkeypatch.setattr(settings, "TENANT_COLLECTION_LAYOUT", "clustered")
+    assert db.tenant_collection_options()["clusteredIndex"] == {"key": {"_id": 1}, "unique": True}
+
+
+async def test_collection_is_created_empty_with_default_indexes(mock_db, monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_INDEXES", ["created_at"])
+    monkeypatch.setattr(db, "spares", SpareCollectionPool(db, size=0))
+
+    placement = db.tenant_placement("collection").assign("Acme Corp")
+    await db.provision_tenant("Acme Corp", placement)
+    collection = db.tenant_scope({"placement": placement}).collection
+
+    assert collection.name == "org_acme_corp"
+    assert await collection.count_documents({}) == 0
+    assert "created_at_1" in await collection.index_information()
+
+
+async def test_spares_are_claimed_by_rename_and_refilled(mock_db):
+    assert await db.spares.refill() == 3
+    spares = await _collection_names()
+
+    await db.provision_tenant("acme", db.tenant_placement("collection").assign("acme"))
+    await asyncio.sleep(0)  # Let the background refill run
+    await db.spares._refill_task
+    after = await _collection_names()
+
+    assert len(spares) == 3 and all(name.startswith("spare_tenant_") for name in spares)
+    assert "org_acme" in after
+    assert len([name for name in after if name.startswith("spare_tenant_")]) == 3
+    assert db.spares.claimed == 1
+
+
+async def test_refill_retires_spares_of_an_old_layout(mock_db, monkeypatch):
+    await db.spares.refill()
+    old = set(await _collection_names())
+    monkeypatch.setattr(settings, "TENANT_INDEXES", ["created_at"])
+    await db.spares.refill()
+    new = set(await _collection_names())
+
+    assert not old & new
+    assert len(new) == 3
+
+
+async def test_workers_share_one_spare_pool(mock_db, monkeypatch):
+    provision = db.provision_collection
+
+    async def slow_provision(collection):
+        await asyncio.sleep(0.001)  # Let the workers' refills interleave, as on a real server
+        await provision(collection)
+
+    monkeypatch.setattr(db, "provision_collection", slow_provision)
+    workers = [SpareCollectionPool(db, size=3) for _ in range(4)]
+    for _ in range(2):
+        await asyncio.gather(*(worker.refill() for worker in workers))
+        assert len([name for name in await _collection_names() if name.startswith("spare_tenant_")]) == 3
+
+    # Extras left by a larger pool are dropped
+    await SpareCollectionPool(db, size=1).refill()
+    assert len([name for name in await _collection_names() if name.startswith("spare_tenant_")]) == 1
+
+
+def test_legacy_metadata_means_collection_per_tenant():
+    placement = db.placement_of({"collection_name": "org_acme"})
+    assert placement == {"layout": "collection", "database": settings.MONGO_DB_NAME, "collection": "org_acme"}
+
+
+async def test_shared_placement_partitions_by_tenant_id(mock_db, monkeypatch):
+    monkeypatch.setitem(db.placements, "shared", SharedCollection(db))
+    strategy = db.tenant_placement("shared")
+
+    acme, globex = strategy.assign("acme"), strategy.assign("globex")
+    for name, placement in (("acme", acme), ("globex", globex)):
+        await db.provision_tenant(name, placement)
+        scope = strategy.scope(placement)
+        await scope.collection.insert_many([scope.document({"n": i}) for i in range(3)])
+
+    await db.drop_tenant({"placement": acme})
+    counts = [
+        await strategy.scope(p).collection.count_documents(strategy.scope(p).query()) for p in (acme, globex)
+    ]
+
+    assert counts == [0, 3]
+    assert "tenant_id_1__id_1" in await strategy.scope(acme).collection.index_information()
+
+
+async def test_database_placement_gets_its_own_database(mock_db):
+    strategy = db.tenant_placement("database")
+
+    placement = strategy.assign("acme")
+    await db.provision_tenant("acme", placement)
+    assert placement["database"] in await db.client.list_database_names()
+    await db.drop_tenant({"placement": placement})
+    assert placement["database"] not in await db.client.list_database_names()
+
+
+async def test_rename_is_metadata_only_outside_collection_layout(mock_db, monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_PLACEMENT", "database")
+
+    await OrganizationService.create_organization(
+        OrgCreate(organization_name="acme", email="admin@acme.com", password="password123")
+    )
+    before = await db.get_master_database()["organizations"].find_one({"organization_name": "acme"})
+    result = await OrganizationService.update_organization(
+        "acme", OrgUpdate(organization_name="globex", email="admin@acme.com", password="password123")
+    )
+    after = await db.get_master_database()["organizations"].find_one({"organization_name": "globex"})
+
+    assert isinstance(result, OrgResponse) and result.collection_name == "org_globex"
+    assert after["placement"] == before["placement"]
+    assert after["placement"]["layout"] == "database"
+
+
+async def test_queued_rename_holds_its_target_name(mock_db):
+    await db.get_master_database()["jobs"].create_indexes(JOB_INDEXES)
+    credentials = {"email": "admin@acme.com", "password": "password123"}
+    await OrganizationService.create_organization(OrgCreate(organization_name="acme", **credentials))
+    job = await OrganizationService.update_organization("acme", OrgUpdate(organization_name="globex", **credentials))
+
+    with pytest.raises(HTTPException) as exc:
+        await OrganizationService.create_organization(
+            OrgCreate(organization_name="Globex", email="admin@globex.com", password="password123")
+        )
+    assert exc.value.status_code == 400
+    assert await db.get_master_database()["organizations"].count_documents({}) == 1
+
+    # A collection the job did not create is never migrated into
+    await db.get_master_database()["org_globex"].insert_one({"_id": "other"})
+    queued = await db.get_master_database()["jobs"].find_one({"_id": job.job_id})
+
+    async def report(progress):
+        pass
+
+    with pytest.raises(HTTPException) as exc:
+        await OrganizationService.perform_rename(queued, report)
+    assert exc.value.status_code == 409
+    assert await db.get_master_database()["org_globex"].find().to_list(length=None) == [{"_id": "other"}]
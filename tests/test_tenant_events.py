@@ -0,0 +1,116 @@
+import asyncio
+import itertools
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.core.config import settings
+from app.db.mongodb import db
+from app.services.event_service import OrgEventFeed, to_event
+from app.services.summary_service import SUMMARIES_COLLECTION, TenantSummaryFeed, TenantSummaryService
+
+
+def ns(collection):
+    return {"db": settings.MONGO_DB_NAME, "coll": collection}
+
+
+# Resume tokens sort in stream order
+_tokens = itertools.count(1)
+
+
+def change(operation, namespace, key, **fields):
+    token = {"_data": f"{next(_tokens):016X}"}
+    return {"_id": token, "operationType": operation, "ns": namespace, "documentKey": {"_id": key}, **fields}
+
+
+async def test_summary_feed_folds_changes_per_tenant(memory_db, monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_SUMMARIES_ENABLED", True)
+    monkeypatch.setattr(db, "replicated", True)
+    org_id = ObjectId()
+    org = {"_id": org_id, "organization_name": "acme", "collection_name": "org_acme"}
+    written = datetime(2026, 1, 2, 3, 4, 5)
+    feed = TenantSummaryFeed(30)
+
+    await db.get_master_database()["organizations"].insert_one(org)
+    await feed.apply([
+        change("insert", ns("organizations"), org_id),
+        change("insert", ns("org_acme"), 1, size=100, wallTime=written),
+        change("insert", ns("org_acme"), 2, size=300, wallTime=written),
+        change("update", ns("org_acme"), 2, wallTime=written),
+        change("insert", ns("org_nobody"), 3, size=50),
+    ])
+    # Without a pre-image a delete takes away an average document
+    await feed.apply([change("delete", ns("org_acme"), 1, wallTime=written)])
+    summary = await TenantSummaryService.get(org)
+    await feed.apply([change("delete", ns("organizations"), org_id)])
+    remaining = await db.get_master_database()[SUMMARIES_COLLECTION].count_documents({})
+
+    assert (summary.documents, summary.approximate_bytes, summary.last_write_at) == (1, 200, written)
+    assert remaining == 0
+
+
+async def test_summary_feed_skips_replayed_changes(memory_db, monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_SUMMARIES_ENABLED", True)
+    monkeypatch.setattr(db, "replicated", True)
+    org_id = ObjectId()
+    org = {"_id": org_id, "organization_name": "acme", "collection_name": "org_acme"}
+    await db.get_master_database()["organizations"].insert_one(org)
+    first = [change("insert", ns("organizations"), org_id), change("insert", ns("org_acme"), 1, size=100)]
+    second = [change("insert", ns("org_acme"), 2, size=300)]
+    feed = TenantSummaryFeed(30)
+
+    await feed.apply(first)
+    # A restart from an older resume token sees the first batch again, split differently
+    await feed.apply(first + second)
+    await TenantSummaryFeed(30).apply(first + second)
+
+    summary = await TenantSummaryService.get(org)
+    assert (summary.documents, summary.approximate_bytes) == (2, 400)
+
+
+async def test_event_feed_replays_missed_events(memory_db, monkeypatch):
+    feed = OrgEventFeed(buffer_size=2, keepalive_seconds=60)
+    monkeypatch.setattr(feed, "_watch", asyncio.Event().wait)
+    org_id = ObjectId()
+    changes = [
+        change("insert", ns("organizations"), org_id, fullDocument={"organization_name": "acme", "collection_name": "org_acme"}),
+        change("update", ns("organizations"), org_id, updateDescription={"updatedFields": {"organization_name": "Acme"}}),
+        change("update", ns("organizations"), org_id, updateDescription={"updatedFields": {"status": "deleting"}}),
+        change("delete", ns("organizations"), org_id),
+    ]
+    events = [(c["_id"]["_data"], to_event(c)) for c in changes]
+    assert [event.type for _, event in events] == ["created", "renamed", "deleting", "deleted"]
+
+    async def read(stream, count):
+        return [await stream.__anext__() for _ in range(count)]
+
+    live = feed.stream()
+    first = asyncio.ensure_future(read(live, 2))
+    await asyncio.sleep(0)
+    for event_id, event in events[:2]:
+        feed.publish(event_id, event)
+    received = await first
+    for event_id, event in events[2:]:
+        feed.publish(event_id, event)
+    resumed = await read(feed.stream(events[2][0]), 1)
+    expired = await read(feed.stream(events[0][0]), 1)
+    await live.aclose()
+    await feed.stop()
+
+    assert received[0].startswith(f"id: {events[0][0]}\nevent: created\n") and '"organization_name":"acme"' in received[0]
+    assert received[1].startswith(f"id: {events[1][0]}\nevent: renamed\n")
+    assert resumed == [f'id: {events[3][0]}\nevent: deleted\ndata: {{"type":"deleted","id":"{org_id}"}}\n\n']
+    assert expired == ["event: reset\ndata: {}\n\n"]
+
+
+async def test_event_stream_is_operator_only(client, monkeypatch):
+    monkeypatch.setattr(settings, "OPERATOR_API_KEY", "operator-secret")
+    credentials = {"email": "admin@acme.com", "password": "strongpassword123"}
+    await client.post("/api/v1/org/create", json={"organization_name": "acme", **credentials})
+    token = (await client.post("/api/v1/admin/login", json=credentials)).json()["access_token"]
+
+    response = await client.get("/api/v1/org/events", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+    # The operator gets through to the deployment check (mongomock is standalone)
+    response = await client.get("/api/v1/org/events", headers={"X-Operator-Key": "operator-secret"})
+    assert response.status_code == 503
@@ -0,0 +1,57 @@
+import base64
+import json
+import time
+
+import pytest
+
+from app.core.tokens import HMACBackend, InvalidTokenError, JoseBackend, TokenVerifier
+
+SECRET = "test-secret-key-for-tokens"
+
+
+def claims(**overrides):
+    data = {"sub": "admin@acme.com", "org_name": "acme", "exp": int(time.time()) + 600}
+    data.update(overrides)
+    return data
+
+
+@pytest.mark.parametrize("backend_cls", [JoseBackend, HMACBackend])
+def test_verify_round_trip_and_cache(backend_cls):
+    verifier = TokenVerifier(backend_cls(SECRET, "HS256"))
+    token = verifier.encode(claims())
+
+    first = verifier.verify(token)
+    second = verifier.verify(token)
+
+    assert first.email == "admin@acme.com" and first.org_name == "acme"
+    assert second is first
+    assert verifier.cache.hits == 1
+
+
+@pytest.mark.parametrize("backend_cls", [JoseBackend, HMACBackend])
+def test_rejects_expired_and_tampered_tokens(backend_cls):
+    verifier = TokenVerifier(backend_cls(SECRET, "HS256"))
+    assert verifier.verify(verifier.encode(claims(exp=int(time.time()) - 5))) is None
+
+    header, payload, signature = verifier.encode(claims()).split(".")
+    forged = base64.urlsafe_b64encode(json.dumps(claims(org_name="other")).encode()).rstrip(b"=").decode()
+    assert verifier.verify(f"{header}.{forged}.{signature}") is None
+    assert verifier.verify("not-a-token") is None
+    assert verifier.verify(JoseBackend("other-secret", "HS256").encode(claims())) is None
+
+
+def test_hmac_backend_rejects_other_algorithms():
+    backend = HMACBackend(SECRET, "HS256")
+    with pytest.raises(InvalidTokenError):
+        backend.decode(JoseBackend(SECRET, "HS512").encode(claims()))
+    with pytest.raises(ValueError):
+        HMACBackend(SECRET, "RS256")
+
+
+def test_cache_entry_does_not_outlive_token():
+    verifier = TokenVerifier(HMACBackend(SECRET, "HS256"), ttl=300)
+    token = verifier.encode(claims(exp=int(time.time()) + 1))
+    assert verifier.verify(token) is not None
+
+    time.sleep(1.1)
+    assert verifier.verify(token) is None
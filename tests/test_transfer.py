@@ -0,0 +1,131 @@
+from datetime import datetime, timezone
+
+import bson
+import pytest
+import zstandard
+from bson import Decimal128, Int64, ObjectId
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.db.mongodb import db
+from app.db.placement import SharedCollection
+from app.models.job import JobType
+from app.services.job_service import JobService
+from app.services.transfer_service import TenantTransferService
+
+
+@pytest.fixture
+def mock_db(memory_db, monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_EXPORT_BATCH_SIZE", 3)
+    monkeypatch.setattr(settings, "TENANT_IMPORT_BATCH_SIZE", 2)
+    yield db
+
+
+def _org(name, layout="collection"):
+    return {"organization_name": name, "placement": db.tenant_placement(layout).assign(name)}
+
+
+def _documents(count):
+    return [
+        {"_id": ObjectId(), "n": i, "big": Int64(i), "price": Decimal128("1.10"), "at": datetime(2024, 1, 1)}
+        for i in range(count)
+    ]
+
+
+async def _export(org, fmt):
+    return b"".join([chunk async for chunk in TenantTransferService.export(org, fmt)])
+
+
+async def _chunks(data, size=7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _tenant_documents(org):
+    scope = db.tenant_scope(org)
+    return await scope.collection.find(scope.query(), {"tenant_id": 0}).sort("n").to_list(length=None)
+
+
+@pytest.mark.parametrize("fmt", ["bson", "ndjson"])
+async def test_export_round_trips_through_import(mock_db, fmt):
+    source, target = _org("acme"), _org("globex")
+    documents = _documents(10)
+
+    await db.tenant_scope(source).collection.insert_many(documents)
+    exported = await _export(source, fmt)
+    result = await TenantTransferService.import_documents(target, fmt, _chunks(exported))
+
+    assert exported.startswith(b"\x28\xb5\x2f\xfd")  # zstd frame magic
+    assert result.inserted == 10 and result.duplicates == 0
+    assert await _tenant_documents(target) == documents
+
+
+async def test_shared_layout_strips_and_sets_the_tenant(mock_db, monkeypatch):
+    monkeypatch.setitem(db.placements, "shared", SharedCollection(db))
+    source, target = _org("acme", "shared"), _org("globex", "collection")
+
+    scope = db.tenant_scope(source)
+    await scope.collection.insert_many([scope.document({"n": i}) for i in range(4)])
+    await db.tenant_scope(_org("initech", "shared")).collection.insert_one({"n": 99, "tenant_id": "other"})
+    await TenantTransferService.import_documents(target, "bson", _chunks(await _export(source, "bson")))
+
+    imported = await db.tenant_scope(target).collection.find({}, {"_id": 0}).to_list(length=None)
+    assert imported == [{"n": i} for i in range(4)]
+
+
+async def test_reimport_skips_existing_documents(mock_db):
+    org = _org("acme")
+
+    await db.tenant_scope(org).collection.insert_many(_documents(5))
+    exported = await _export(org, "bson")
+    await db.tenant_scope(org).collection.delete_many({"n": {"$gte": 3}})
+    result = await TenantTransferService.import_documents(org, "bson", _chunks(exported))
+
+    assert (result.inserted, result.duplicates, result.rejected) == (2, 3, 0)
+
+
+async def test_shared_layout_rejects_another_tenants_ids(mock_db, monkeypatch):
+    monkeypatch.setitem(db.placements, "shared", SharedCollection(db))
+    acme, globex = _org("acme", "shared"), _org("globex", "shared")
+    documents = _documents(3)
+    await db.tenant_scope(acme).collection.insert_many([db.tenant_scope(acme).document(d) for d in documents[:1]])
+    await db.tenant_scope(globex).collection.insert_many([db.tenant_scope(globex).document(d) for d in documents[1:2]])
+    exported = zstandard.ZstdCompressor().compress(b"".join(bson.encode(d) for d in documents))
+
+    result = await TenantTransferService.import_documents(acme, "bson", _chunks(exported))
+
+    assert (result.inserted, result.duplicates, result.rejected) == (1, 1, 1)
+    assert "another organization" in result.error
+    assert len(await _tenant_documents(globex)) == 1
+
+
+async def test_import_stops_when_a_job_is_queued(mock_db):
+    org = _org("acme")
+    await db.tenant_scope(org).collection.insert_many(_documents(10))
+    exported = await _export(org, "bson")
+    target = _org("globex")
+
+    async def chunks():
+        first = True
+        async for chunk in _chunks(exported, 64):
+            yield chunk
+            if first:
+                first = False
+                await JobService.enqueue(JobType.RENAME, "globex", {"new_name": "initech"})
+
+    with pytest.raises(HTTPException) as error:
+        await TenantTransferService.import_documents(target, "bson", chunks())
+    assert error.value.status_code == 409
+    assert len(await _tenant_documents(target)) < 10
+
+
+@pytest.mark.parametrize("body, detail", [
+    (b"not zstd at all", "Invalid zstd data"),
+    (zstandard.ZstdCompressor().compress(b"\x10\x00\x00\x00\x02a"), "Truncated BSON document"),
+    (zstandard.ZstdCompressor().compress(b"x" * 100)[:-4], "Truncated zstd data"),
+])
+async def test_corrupt_imports_are_rejected(mock_db, body, detail):
+    with pytest.raises(HTTPException) as error:
+        await TenantTransferService.import_documents(_org("acme"), "bson", _chunks(body))
+    assert error.value.status_code == 400
+    assert detail in error.value.detail